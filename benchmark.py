@@ -0,0 +1,1602 @@
+#!/usr/bin/env python3
+"""
+Benchmarks do Controlador de Transparência sobre o sistema de janelas simulado
+
+Roda em qualquer sistema (inclusive Linux), usando o FakeBackend no lugar do
+Win32 real. Com `--output`, os resultados são gravados em JSON; com
+`--baseline`, são comparados com um arquivo gravado antes e o processo
+termina com código 1 se algum tempo piorar além da tolerância. Toda
+verificação de correção (valor booleano, ou contador de erros diferente de
+zero) que falhar também termina o processo com código 1, com ou sem
+baseline. `--only` roda só os benchmarks escolhidos.
+"""
+
+import argparse
+import contextlib
+import json
+import platform
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from fade_scheduler import FadeScheduler, PreviewThrottle
+from focus_dimmer import FocusDimmer
+import opacity_cli
+from list_reconciler import ListboxReconciler
+from metrics import Metrics, NullMetrics
+from opacity_daemon import DaemonClient, OpacityDaemon
+from opacity_journal import OpacityJournal
+from opacity_state import OpacityState
+from opacity_profiles import ProfileAutoApplier, ProfileMatcher, ProfileStore
+from opacity_rules import BatchOpacityEngine, OpacityRule
+from refresh_worker import RefreshScheduler, RefreshWorker, diff_windows
+from virtual_list import VirtualListModel
+from process_cache import ProcessInfoCache
+from window_backend import (EVENT_OBJECT_CREATE, WS_EX_LAYERED, FakeBackend, ProcessUnavailable, WindowBackend,
+                            WindowSnapshot)
+from window_classifier import EXCLUDE, WindowClassifier
+from window_core import WindowCore
+from window_registry import WindowRecord, WindowRegistry
+from window_events import WindowEventTracker
+from window_lists import WindowLists
+from window_search import WindowSearchIndex
+
+
+class FakeListbox:
+    """Listbox em memória com a mesma interface usada pelo ListboxReconciler"""
+
+    def __init__(self):
+        self.items = []
+        self.selection = set()
+
+    def insert(self, index, *texts):
+        if index == 'end':
+            index = len(self.items)
+        self.items[index:index] = texts
+        self.selection = {i + len(texts) if i >= index else i for i in self.selection}
+
+    def delete(self, first, last=None):
+        if last is not None:
+            self.items = []
+            self.selection = set()
+            return
+        del self.items[first]
+        self.selection = {i - 1 if i > first else i for i in self.selection if i != first}
+
+    def size(self):
+        return len(self.items)
+
+    def get(self, index):
+        return self.items[index]
+
+    def curselection(self):
+        return tuple(sorted(self.selection))
+
+    def selection_set(self, index):
+        self.selection.add(index)
+
+
+def timed(func, repeat: int = 5) -> float:
+    """Melhor tempo (em segundos) entre `repeat` execuções"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_get_windows_list(count: int, latency: float) -> dict:
+    """Custo de uma enumeração completa com o cache de processos já aquecido"""
+    backend = FakeBackend(latency=latency)
+    backend.populate(count)
+    core = WindowCore(backend)
+    core.get_windows_list()
+    elapsed = timed(core.get_windows_list)
+    return {'windows': count, 'ms': elapsed * 1000, 'us_per_window': elapsed * 1e6 / count}
+
+
+def bench_enumeration(count: int, latency: float) -> dict:
+    """Enumeração em colunas contra a consulta janela por janela
+
+    O caminho antigo chama um método do backend por campo de cada janela e
+    monta uma tupla por janela; o novo preenche um WindowSnapshot
+    reaproveitado. Fora do Windows, os tempos `fake_*` medem só o custo em
+    Python sobre o FakeBackend (sem chamadas reais ao sistema); as chamadas
+    por janela valem para o Win32, que faz as mesmas. No Windows, compara
+    também o pywin32 com o enumerador ctypes sobre as janelas reais.
+    """
+    backend = FakeBackend(latency=latency)
+    backend.populate(count)
+    for _ in range(count // 4):
+        backend.add_window("")  # Visíveis sem título, como as janelas auxiliares de um desktop real
+
+    def per_call():
+        rows = []
+        for hwnd in backend.enum_windows():
+            if backend.is_window_visible(hwnd):
+                title = backend.get_window_text(hwnd)
+                if title:
+                    rows.append((hwnd, True, title, backend.get_class_name(hwnd), backend.get_window_pid(hwnd)))
+                else:
+                    rows.append((hwnd, True, "", "", 0))
+            else:
+                rows.append((hwnd, False, "", "", 0))
+        return rows
+
+    total = len(backend.windows)
+    snapshot = WindowSnapshot()
+    backend.calls.clear()
+    backend.enum_snapshot(snapshot)
+    calls = sum(backend.calls.values())
+    result = {'windows': total,
+              'fake_per_call_us': timed(per_call) * 1e6 / total,
+              'fake_snapshot_us': timed(lambda: backend.enum_snapshot(snapshot)) * 1e6 / total,
+              'calls_per_window': calls / total,
+              'same_rows': list(backend.enum_snapshot(snapshot).rows()) == per_call()
+              and list(WindowBackend.enum_snapshot(backend).rows()) == per_call()}
+
+    # Contêineres apenas: as strings são as mesmas nos dois formatos
+    rows = per_call()
+    result['tuple_bytes_per_window'] = (sys.getsizeof(rows) + sum(sys.getsizeof(r) for r in rows)) / total
+    result['snapshot_bytes_per_window'] = sum(sys.getsizeof(getattr(snapshot, column))
+                                              for column in WindowSnapshot.__slots__) / total
+
+    if os.name == 'nt':
+        from window_backend import Win32Backend
+        native = Win32Backend()
+        windows = len(native.enum_windows())
+        result['win32_windows'] = windows
+        result['pywin32_us'] = timed(lambda: WindowBackend.enum_snapshot(native)) * 1e6 / windows
+        result['ctypes_us'] = timed(lambda: native.enum_snapshot(snapshot)) * 1e6 / windows
+    return result
+
+
+def bench_process_lookup(count: int, latency: float) -> dict:
+    """Consulta do processo de cada janela, direto no sistema e pelo cache
+
+    Sem cache, cada janela custa as duas chamadas que o cache faz numa falta
+    (horário de criação e informações); com o cache aquecido, nenhuma.
+    """
+    backend = FakeBackend(latency=latency)
+    hwnds = backend.populate(count, hidden_ratio=0.0)
+    pids = [backend.get_window_pid(hwnd) for hwnd in hwnds]
+
+    def uncached():
+        for pid in pids:
+            try:
+                backend.get_process_create_time(pid)
+                backend.get_process_info(pid)
+            except ProcessUnavailable:
+                pass
+
+    cache = ProcessInfoCache(backend)
+    cache.prune(pids)  # Como em scan_windows: o limite acompanha os processos vivos
+
+    def cached():
+        for pid in pids:
+            cache.prefetch(pid)
+
+    backend.calls.clear()
+    uncached()
+    uncached_calls = sum(backend.calls.values())
+    cached()
+    backend.calls.clear()
+    cached()
+    cached_calls = sum(backend.calls.values())
+    return {'windows': count, 'processes': len(set(pids)), 'uncached_ms': timed(uncached) * 1000,
+            'cached_ms': timed(cached) * 1000, 'uncached_calls': uncached_calls, 'cached_calls': cached_calls,
+            'hit_rate': cache.stats()['hit_rate']}
+
+
+def bench_apply_opacity(count: int, latency: float) -> dict:
+    """Custo de aplicar e resetar a opacidade de `count` janelas"""
+    backend = FakeBackend(latency=latency)
+    backend.populate(count, hidden_ratio=0.0)
+    core = WindowCore(backend)
+    windows = core.get_windows_list()
+
+    start = time.perf_counter()
+    for window in windows:
+        core.apply_opacity(window, 70)
+    apply_elapsed = time.perf_counter() - start
+
+    # Reaplicar o mesmo valor não deve gerar escritas
+    for window in windows:
+        core.apply_opacity(window, 70)
+
+    start = time.perf_counter()
+    core.reset_all()
+    reset_elapsed = time.perf_counter() - start
+    stats = core.opacity_state.stats()
+
+    # Listas depois de aplicar/resetar uma janela: remontagem completa contra só a linha dela
+    lists = WindowLists(core, FakeListbox(), FakeListbox())
+    lists.apply_changes({window.hwnd: window for window in windows})
+    samples = windows[::max(1, len(windows) // 50)]
+    start = time.perf_counter()
+    for window in samples:
+        core.apply_opacity(window, 60)
+        lists.rebuild()
+        core.reset_opacity(window.hwnd)
+        lists.rebuild()
+    rebuild_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    for window in samples:
+        core.apply_opacity(window, 60)
+        lists.refresh([window.hwnd])
+        core.reset_opacity(window.hwnd)
+        lists.refresh([window.hwnd])
+    row_elapsed = time.perf_counter() - start
+    return {'windows': len(windows), 'apply_ms': apply_elapsed * 1000, 'reset_ms': reset_elapsed * 1000,
+            'writes_issued': stats['writes_issued'], 'writes_suppressed': stats['writes_suppressed'],
+            'list_rebuild_us': rebuild_elapsed * 1e6 / len(samples), 'list_row_us': row_elapsed * 1e6 / len(samples),
+            'rows_ok': len(lists.available_reconciler.rows) == len(windows) and not lists.applied_reconciler.rows}
+
+
+def bench_style_roundtrip(count: int, latency: float) -> dict:
+    """Estilo estendido depois do reset: o de antes da aplicação, bit a bit
+
+    As janelas começam com estilos variados (sem camadas, com outros bits,
+    já em camadas com alpha de outro programa). Um terço é resetado uma a
+    uma, um terço por "resetar todas" e o restante só passou por
+    pré-visualização e volta com `unlayer_all`. Compara com o reset antigo
+    (só alpha 255), que deixa as janelas em camadas.
+    """
+    WS_EX_TOPMOST = 0x00000008
+    WS_EX_TOOLWINDOW = 0x00000080
+    styles = [(0, 255), (WS_EX_TOPMOST, 255), (WS_EX_TOOLWINDOW | WS_EX_TOPMOST, 255), (WS_EX_LAYERED, 200)]
+    result = {'windows': count}
+    for mode in ('alpha_only', 'restore'):
+        backend = FakeBackend(latency=latency)
+        hwnds = backend.populate(count, hidden_ratio=0.0)
+        for i, hwnd in enumerate(hwnds):
+            backend.windows[hwnd].exstyle, backend.windows[hwnd].alpha = styles[i % len(styles)]
+        before = {hwnd: (window.exstyle, window.alpha) for hwnd, window in backend.windows.items()}
+        core = WindowCore(backend)
+        windows = core.get_windows_list()
+        third = len(windows) // 3
+        for window in windows[:2 * third]:
+            core.apply_opacity(window, 70)
+        for window in windows[2 * third:]:
+            core.opacity_state.set_alpha(window.hwnd, 128)  # Pré-visualização sem aplicar
+        backend.calls.clear()
+        if mode == 'alpha_only':
+            for window in windows:
+                core.opacity_state.reset_alpha(window.hwnd)
+        else:
+            for window in windows[:third]:
+                core.reset_opacity(window.hwnd)
+            core.reset_all()
+            core.unlayer_all()
+        after = {hwnd: (window.exstyle, window.alpha) for hwnd, window in backend.windows.items()}
+        result[f'{mode}_writes'] = backend.calls['set_exstyle'] + backend.calls['set_layered_alpha']
+        result[f'{mode}_left_layered'] = sum(1 for hwnd in hwnds
+                                             if after[hwnd][0] & WS_EX_LAYERED and not before[hwnd][0] & WS_EX_LAYERED)
+        if mode == 'restore':
+            result['restore_exact'] = after == before
+    result['nothing_tracked'] = not core.registry.applied and not core.opacity_state.original
+
+    # Outro programa muda o alpha e acrescenta um bit ao estilo depois da nossa leitura
+    state = core.opacity_state
+    external = windows[:max(1, len(windows) // 10)]
+    for window in external:
+        state.set_alpha(window.hwnd, 128)
+        backend.windows[window.hwnd].alpha = 200
+        backend.windows[window.hwnd].exstyle = WS_EX_TOPMOST
+    for window in external:
+        state.set_alpha(window.hwnd, 128)
+    result['external_alpha_ok'] = all(backend.windows[window.hwnd].alpha == 128 for window in external)
+    result['external_style_kept'] = all(backend.windows[window.hwnd].exstyle == WS_EX_TOPMOST | WS_EX_LAYERED
+                                        for window in external)
+
+    # O reset tira só o bit de camadas do estilo atual, inclusive bits postos por outros depois da leitura
+    core = WindowCore(backend)
+    window = windows[0]
+    backend.windows[window.hwnd].exstyle, backend.windows[window.hwnd].alpha = 0, 255
+    core.apply_opacity(window, 70)
+    backend.windows[window.hwnd].exstyle |= WS_EX_TOOLWINDOW
+    core.reset_opacity(window.hwnd)
+    result['restore_style_ok'] = backend.windows[window.hwnd].exstyle == WS_EX_TOOLWINDOW
+
+    # Janela só pré-visualizada que fecha e tem o hwnd reaproveitado por outro programa
+    hwnd = windows[1].hwnd
+    core.opacity_state.set_alpha(hwnd, 90)
+    backend.close_window(hwnd)
+    backend.add_window("Sobreposição de outro programa", exe_name='overlay.exe', hwnd=hwnd)
+    backend.set_exstyle(hwnd, WS_EX_LAYERED)
+    backend.set_layered_alpha(hwnd, 100)
+    restored = core.unlayer_all()
+    result['unlayer_recycled_ok'] = (hwnd not in restored and backend.windows[hwnd].alpha == 100
+                                     and hwnd not in core.opacity_state.original)
+    return result
+
+
+def bench_batch_apply(count: int, latency: float) -> dict:
+    """Aplicação em lote por regras, repetida para medir as escritas evitadas"""
+    backend = FakeBackend(latency=latency)
+    hwnds = backend.populate(count, hidden_ratio=0.0)
+    backend.set_foreground(hwnds[0])
+    engine = BatchOpacityEngine(WindowCore(backend))
+    rules = [OpacityRule(80, exe='chrome.exe'), OpacityRule(60, exclude_foreground=True)]
+
+    first = engine.apply(rules).summary()
+    second = engine.apply(rules).summary()
+    # Regras por classe usam a classe lida na enumeração
+    windows = engine.core.get_windows_list()
+    backend.calls.clear()
+    by_class = engine.resolve([OpacityRule(70, class_name='FakeWindowClass')], windows)
+    return {'windows': first['windows'], 'first_ms': first['elapsed_ms'], 'first_writes': first['writes'],
+            'repeat_ms': second['elapsed_ms'], 'repeat_writes': second['writes'], 'repeat_skipped': second['skipped'],
+            'class_reads': backend.calls['get_class_name'],
+            'class_rule_ok': len(by_class) == len(windows) and not backend.calls['get_class_name']}
+
+
+def bench_profiles(count: int, latency: float, profiles: int = 300) -> dict:
+    """Carga dos perfis do disco e primeira aplicação automática na inicialização"""
+    backend = FakeBackend(latency=latency)
+    backend.populate(count, hidden_ratio=0.0)
+    core = WindowCore(backend)
+    windows = core.get_windows_list()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = ProfileStore(os.path.join(temp_dir, 'profiles.json'))
+        for i in range(profiles):
+            # Perfis de executáveis que não existem, mais alguns que casam por título
+            store.set_profile(OpacityRule(50 + i % 50, exe=f"app{i}.exe", title=f"janela {i}$", name=f"p{i}"))
+        store.set_profile(OpacityRule(80, exe='chrome.exe', name='chrome'))
+        store.set_profile(OpacityRule(70, title=r'documento \d*7 ', name='titulo'))
+        store.save()
+
+        store = ProfileStore(store.path)
+        store.load()
+
+    start = time.perf_counter()
+    applier = ProfileAutoApplier(core, ProfileMatcher(store.profiles))
+    first = applier.apply_new(windows)
+    startup = time.perf_counter() - start
+    steady = timed(lambda: applier.apply_new(windows))
+
+    # Salvar um perfil novo não desfaz o reset manual de janelas de outro perfil
+    chrome = next(window for window in windows if window.hwnd in core.registry.applied
+                  and window.exe_name == 'chrome.exe')
+    core.reset_opacity(chrome.hwnd)
+    profile = OpacityRule(60, exe='code.exe', name='code')
+    store.set_profile(profile)
+    start = time.perf_counter()
+    saved = applier.set_matcher(ProfileMatcher(store.profiles), [profile], windows)
+    save_elapsed = time.perf_counter() - start
+    code = [window.hwnd for window in windows if applier.matcher.match(window) is profile]
+    # Perfis por classe casam com a classe lida na enumeração, sem consultas novas
+    backend.calls.clear()
+    by_class = ProfileMatcher([OpacityRule(40, class_name='FakeWindowClass')])
+    class_matched = all(by_class.match(window) is not None for window in windows)
+    return {'windows': len(windows), 'profiles': len(store.profiles), 'load_ms': store.load_time * 1000,
+            'first_apply_ms': startup * 1000, 'applied': applier.applied, 'writes': first.writes,
+            'steady_ms': steady * 1000, 'save_ms': save_elapsed * 1000, 'save_reapplied': len(saved.results),
+            'reset_kept': chrome.hwnd not in core.registry.applied,
+            'saved_applied': bool(code) and all(core.registry.applied.get(hwnd) == 60 for hwnd in code),
+            'class_profile_ok': class_matched and not backend.calls['get_class_name']}
+
+
+def bench_fades(count: int, latency: float, duration: float = 0.2, fps: int = 60) -> dict:
+    """Transição simultânea de `count` janelas para 30% em `duration` segundos"""
+    backend = FakeBackend(latency=latency)
+    hwnds = backend.populate(count, hidden_ratio=0.0)
+    core = WindowCore(backend)
+    fader = FadeScheduler(core.opacity_state, fps=fps)
+    fader.start()
+    start = time.perf_counter()
+    for hwnd in hwnds:
+        fader.fade(hwnd, int(0.3 * 255), duration)
+    while fader.active() and time.perf_counter() - start < duration * 20:
+        time.sleep(0.005)
+    elapsed = time.perf_counter() - start
+    fader.stop()
+
+    reached = sum(1 for hwnd in hwnds if backend.windows[hwnd].alpha == int(0.3 * 255))
+    # Leituras só no início (alpha de partida e estado original): os quadros confiam no estado conhecido
+    reads = core.opacity_state.reads
+    result = {'windows': count, 'elapsed_ms': elapsed * 1000, 'reached_target': reached,
+              'reads_per_window': reads / count, 'frame_reads_ok': reads <= 4 * count}
+    result.update(fader.stats())
+    return result
+
+
+def bench_preview(count: int, latency: float, events: int = 600, drag: float = 1.0) -> dict:
+    """Arraste do slider: `events` movimentos em `drag` segundos com pré-visualização ao vivo"""
+    backend = FakeBackend(latency=latency)
+    hwnd = backend.populate(max(1, count // 100), hidden_ratio=0.0)[0]
+    core = WindowCore(backend)
+    clock = [0.0]
+    preview = PreviewThrottle(core.opacity_state, clock=lambda: clock[0])
+    preview.begin(hwnd)
+    for i in range(events):
+        clock[0] = drag * i / events
+        preview.update(255 - i % 200)
+    preview.end(77)
+    return {'slider_events': preview.updates, 'writes': preview.writes,
+            'final_alpha_ok': backend.windows[hwnd].alpha == 77}
+
+
+def focus_trace(hwnds: list, switches: int = 400, seed: int = 3) -> list:
+    """Trocas de foco sintéticas: (instante, hwnd)
+
+    A maior parte é uma troca isolada a cada ~2 s; de vez em quando vem um
+    Alt-Tab segurado, que passa por 5 a 12 janelas com 15 ms entre elas.
+    """
+    rng = random.Random(seed)
+    trace = []
+    t = 0.0
+    while len(trace) < switches:
+        t += rng.expovariate(1 / 2.0)
+        if rng.random() < 0.15:
+            for _ in range(rng.randint(5, 12)):
+                trace.append((t, rng.choice(hwnds)))
+                t += 0.015
+        else:
+            trace.append((t, rng.choice(hwnds)))
+    return trace
+
+
+def bench_focus(count: int, latency: float) -> dict:
+    """Modo foco reproduzindo `focus_trace` sobre `count` janelas (1/5 delas no conjunto)
+
+    Compara com reaplicar a opacidade de todo o conjunto a cada troca. As
+    trocas rodam em tempo virtual (os agendamentos do limitador são
+    executados no instante devido) e a latência evento -> escrita é medida
+    em tempo real, passando pelo despacho de eventos do backend.
+    """
+    backend = FakeBackend(latency=latency)
+    hwnds = backend.populate(count, hidden_ratio=0.0)
+    members = {hwnd: 150 for hwnd in hwnds[::5]}
+    others = [hwnd for hwnd in hwnds if hwnd not in members][:len(members) // 4 + 1]
+    trace = focus_trace(list(members) + others)
+
+    # Antes: cada troca reaplica a opacidade de todas as janelas do conjunto
+    state = OpacityState(backend)
+    for hwnd, alpha in members.items():
+        state.set_alpha(hwnd, alpha)
+    backend.calls.clear()
+    start = time.perf_counter()
+    for _, foreground in trace:
+        for hwnd, alpha in members.items():
+            state.set_alpha(hwnd, 255 if hwnd == foreground else alpha)
+    reapply_elapsed = time.perf_counter() - start
+    reapply_writes = backend.calls['set_layered_alpha']
+
+    now = [0.0]
+    timers = []
+    dimmer = FocusDimmer(OpacityState(backend), clock=lambda: now[0],
+                         schedule=lambda delay, callback: timers.append((now[0] + delay, callback)))
+    dimmer.start(members)
+    backend.calls.clear()
+    start = time.perf_counter()
+    for t, hwnd in trace:
+        while timers and timers[0][0] <= t:
+            now[0] = timers[0][0]
+            timers.pop(0)[1]()
+        now[0] = t
+        backend.set_foreground(hwnd)
+    while timers:
+        now[0] = timers[0][0]
+        timers.pop(0)[1]()
+    dimmer_elapsed = time.perf_counter() - start
+    dimmer_writes = backend.calls['set_layered_alpha']
+    last = trace[-1][1]
+    final_ok = all(backend.windows[hwnd].alpha == (255 if hwnd == last else alpha)
+                   for hwnd, alpha in members.items())
+    # A interface ganha o foco: o hook não entrega o evento, a interface chama focus_own
+    backend.own_pid = backend.add_process("python.exe")
+    own_hwnd = backend.add_window("Controlador de Transparência", pid=backend.own_pid)
+    backend.set_foreground(next(iter(members)))
+    while timers:
+        now[0] = timers[0][0]
+        timers.pop(0)[1]()
+    now[0] += 1.0
+    backend.set_foreground(own_hwnd)
+    own_skipped = dimmer.focused is not None
+    dimmer.focus_own()
+    own_focus_ok = own_skipped and all(backend.windows[hwnd].alpha == alpha for hwnd, alpha in members.items())
+    dimmer.stop()
+    stopped_ok = all(backend.windows[hwnd].alpha == alpha for hwnd, alpha in members.items())
+
+    # Latência real do evento até a escrita, sem o limitador
+    timed_dimmer = FocusDimmer(OpacityState(backend), min_interval=0.0)
+    timed_dimmer.start(members)
+    for _, hwnd in trace:
+        backend.set_foreground(hwnd)
+    timed_dimmer.stop()
+
+    result = {'windows': count, 'members': len(members), 'switches': len(trace),
+              'reapply_writes_per_switch': reapply_writes / len(trace),
+              'reapply_us_per_switch': reapply_elapsed * 1e6 / len(trace),
+              'writes_per_switch': dimmer_writes / len(trace),
+              'us_per_switch': dimmer_elapsed * 1e6 / len(trace), 'coalesced': dimmer.coalesced,
+              'final_ok': final_ok, 'own_focus_ok': own_focus_ok, 'stopped_ok': stopped_ok}
+    result.update(timed_dimmer.latency_stats())
+    return result
+
+
+def bench_refresh_loop(count: int, latency: float, ticks: int = 20, churn: int = 5) -> dict:
+    """Ciclo completo de atualização (enumeração, diferença e listas) com `churn` janelas mudando por ciclo"""
+    backend = FakeBackend(latency=latency)
+    backend.populate(count, hidden_ratio=0.0)
+    core = WindowCore(backend)
+    lists = WindowLists(core, FakeListbox(), FakeListbox())
+    delivered = {}
+
+    def refresh():
+        nonlocal delivered
+        windows = core.scan_windows()
+        changes = diff_windows(delivered, windows)
+        delivered = windows
+        lists.apply_changes(changes)
+        return lists.available_reconciler.last_stats
+
+    refresh()
+    touched = 0
+    start = time.perf_counter()
+    for tick in range(ticks):
+        hwnds = list(backend.windows)
+        for i in range(churn):
+            backend.close_window(hwnds[(tick * churn + i) % len(hwnds)])
+            backend.add_window(f"Nova janela {tick}-{i}", exe_name='notepad.exe')
+        touched += refresh()['touched']
+    elapsed = time.perf_counter() - start
+    return {'windows': count, 'ms_per_tick': elapsed * 1000 / ticks, 'rows_touched_per_tick': touched / ticks}
+
+
+def bench_event_tracking(count: int, latency: float, batches: int = 50, churn: int = 5) -> dict:
+    """Modo orientado a eventos: trace sintético de criação, renomeação e fechamento
+
+    Compara as chamadas ao sistema por lote de eventos com as de uma
+    enumeração completa, e mede a latência entre evento e lista atualizada.
+    """
+    backend = FakeBackend(latency=latency)
+    backend.populate(count, hidden_ratio=0.0)
+    core = WindowCore(backend)
+    lists = WindowLists(core, FakeListbox(), FakeListbox())
+    tracker = WindowEventTracker(core)
+
+    def apply(changes, event_times):
+        lists.apply_changes(changes)
+        tracker.record_latency(event_times)
+
+    tracker.start()
+    lists.apply_changes(tracker.resync())
+    backend.calls.clear()
+    core.scan_windows()
+    calls_per_scan = sum(backend.calls.values())
+
+    backend.calls.clear()
+    for batch in range(batches):
+        hwnds = list(backend.windows)
+        trace = []
+        for i in range(churn):
+            trace.append((0, 'add_window', f"Nova janela {batch}-{i}", None, "FakeWindowClass", True, 'notepad.exe'))
+            trace.append((0, 'set_title', hwnds[(batch * churn + i) % len(hwnds)], f"Renomeada {batch}-{i}"))
+        trace.extend((0, 'close_window', hwnds[-1 - i]) for i in range(churn))
+        backend.replay(trace)
+        tracker.drain(apply)
+    calls = sum(backend.calls.values())
+    # Lote que não muda nada (mesmo título): não chega à interface nem conta latência
+    samples = len(tracker.latencies)
+    hwnd = next(iter(tracker.windows))
+    backend.set_title(hwnd, backend.windows[hwnd].title)
+    tracker.drain(apply)
+    tracker.stop()
+
+    # O hook pode entregar eventos antes de `start_events` voltar
+    class EagerBackend(FakeBackend):
+        def start_events(self, callback):
+            super().start_events(callback)
+            self._emit(EVENT_OBJECT_CREATE, next(iter(self.windows)))
+
+    eager = EagerBackend(latency=latency)
+    eager.populate(1, hidden_ratio=0.0)
+    early = []
+
+    def listener(event, hwnd):
+        early.append(hwnd)
+
+    eager.add_event_listener(listener)
+    eager.remove_event_listener(listener)
+
+    result = {'windows': count, 'events': tracker.events_received,
+              'calls_per_batch': calls / batches, 'calls_per_full_scan': calls_per_scan,
+              'noop_ignored': len(tracker.latencies) == samples, 'early_event_ok': len(early) == 1}
+    result.update(tracker.latency_stats())
+    return result
+
+
+def bench_daemon(count: int, latency: float, clients: int = 4, requests: int = 500) -> dict:
+    """Carga no serviço: vários clientes em paralelo pelo socket local
+
+    Cada cliente mantém a conexão aberta e alterna `ping` com `apply` por
+    hwnd (opacidade alternada, para sempre haver escrita).
+    """
+    if not hasattr(os, 'getuid'):
+        return {'skipped': 'socket Unix indisponível'}
+    backend = FakeBackend(latency=latency)
+    backend.populate(count, hidden_ratio=0.0)
+    directory = tempfile.mkdtemp()
+    address = os.path.join(directory, 'daemon.sock')
+    journal_path = os.path.join(directory, 'daemon.jsonl')
+    daemon = OpacityDaemon(backend, address, refresh_interval=3600, journal_path=journal_path)
+    daemon.start()
+    socket_mode = os.stat(address).st_mode & 0o777
+    hwnds = list(daemon.snapshot())
+    latencies = {'ping': [], 'apply': []}
+    lock = threading.Lock()
+
+    def run_client(index: int):
+        samples = {'ping': [], 'apply': []}
+        with DaemonClient(address) as client:
+            for i in range(requests):
+                start = time.perf_counter()
+                if i % 2:
+                    client.request('apply', hwnd=[hwnds[(index + i) % len(hwnds)]], opacity=50 + i % 4 * 10)
+                    samples['apply'].append(time.perf_counter() - start)
+                else:
+                    client.request('ping')
+                    samples['ping'].append(time.perf_counter() - start)
+        with lock:
+            for key, values in samples.items():
+                latencies[key].extend(values)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=run_client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    journaled = set(OpacityJournal(journal_path).load()) == set(daemon.core.registry.applied)
+
+    # reset-all só desfaz o que o serviço aplicou; a janela de outro programa continua transparente
+    other = backend.add_window("Sobreposição de outro programa", exe_name='overlay.exe')
+    backend.set_exstyle(other, WS_EX_LAYERED)
+    backend.set_layered_alpha(other, 100)
+    with DaemonClient(address) as client:
+        reset = client.request('reset-all')
+    daemon.stop()
+
+    result = {'windows': count, 'clients': clients, 'requests_per_sec': clients * requests / elapsed,
+              'socket_private': socket_mode == 0o600,
+              'journal_ok': journaled and not OpacityJournal(journal_path).load(),
+              'reset_all_scoped': backend.windows[other].alpha == 100 and bool(reset)
+              and all(backend.windows[hwnd].alpha == 255 for hwnd in hwnds)}
+    for key, values in latencies.items():
+        values.sort()
+        result[f'{key}_p50_ms'] = values[len(values) // 2] * 1000
+        result[f'{key}_p99_ms'] = values[int(len(values) * 0.99)] * 1000
+    return result
+
+
+def bench_handle_gc(count: int, latency: float, cycles: int = 20) -> dict:
+    """Janelas aplicadas que fecham ao longo de uma sessão longa
+
+    A cada ciclo, `count` janelas novas recebem transparência e a maioria
+    fecha; parte dos hwnds fechados é reaproveitada por janelas de outros
+    processos. Sem a verificação, as entradas mortas se acumulam e o
+    "resetar todas" escreve nelas (inclusive nas reaproveitadas); com a
+    verificação a cada ciclo, o registro fica limitado às janelas vivas.
+    """
+    rng = random.Random(count)
+    results = {}
+    for mode in ('no_sweep', 'sweep'):
+        backend = FakeBackend(latency=latency)
+        core = WindowCore(backend)
+        live = []
+        recycled = []
+        sweep_elapsed = 0.0
+        checked = 0
+        for _ in range(cycles):
+            pid = backend.add_process("app.exe")
+            for i in range(count):
+                hwnd = backend.add_window(f"Documento {i}", pid=pid)
+                window = core.describe_window(hwnd)
+                core.apply_opacity(window, 70)
+                live.append(hwnd)
+            rng.shuffle(live)
+            closing, live = live[:count * 9 // 10], live[count * 9 // 10:]
+            for hwnd in closing:
+                backend.close_window(hwnd)
+            # Outro programa recebe alguns dos hwnds liberados e usa a própria transparência
+            other = backend.add_process("other.exe")
+            for hwnd in closing[:count // 10]:
+                recycled.append(backend.add_window("Outro programa", pid=other, class_name="Other", hwnd=hwnd))
+                backend.windows[hwnd].exstyle = WS_EX_LAYERED
+                backend.windows[hwnd].alpha = 200
+            if mode == 'sweep':
+                checked += len(core.registry.applied)
+                start = time.perf_counter()
+                core.sweep_applied()
+                sweep_elapsed += time.perf_counter() - start
+        results[f'{mode}_applied'] = len(core.registry.applied)
+        backend.calls.clear()
+        if mode == 'sweep':
+            core.reset_all()
+        else:
+            # "Resetar todas" antes da verificação: escreve em todo hwnd registrado
+            for hwnd in list(core.registry.applied):
+                core.opacity_state.reset_alpha(hwnd)
+        results[f'{mode}_reset_writes'] = backend.calls['set_layered_alpha']
+        results[f'{mode}_recycled_written'] = sum(1 for hwnd in recycled if backend.windows[hwnd].alpha != 200)
+        if mode == 'sweep':
+            results['evicted'] = core.evicted
+            results['sweep_us_per_window'] = sweep_elapsed * 1e6 / checked
+    results['live'] = len(live)
+    return results
+
+
+JOURNAL_CHILD = """
+import sys
+import time
+from opacity_journal import OpacityJournal
+from opacity_rules import BatchOpacityEngine, OpacityRule
+from window_backend import FakeBackend
+from window_core import WindowCore
+backend = FakeBackend()
+backend.populate(%d, hidden_ratio=0.0)
+core = WindowCore(backend)
+core.journal = OpacityJournal(%r)
+write = backend.set_layered_alpha
+def set_layered_alpha(hwnd, alpha):
+    write(hwnd, alpha)
+    sys.stdout.write(f"{hwnd} {alpha}\\n")
+    sys.stdout.flush()
+    time.sleep(0.0002)
+backend.set_layered_alpha = set_layered_alpha
+engine = BatchOpacityEngine(core)
+items = list(engine.resolve([OpacityRule(60)], core.get_windows_list()).items())
+for i in range(0, len(items), %d):
+    engine.apply_targets(dict(items[i:i + %d]))
+time.sleep(60)
+"""
+
+
+def bench_journal(count: int, latency: float, cycles: int = 50) -> dict:
+    """Diário das janelas aplicadas: custo na aplicação, compactação e recuperação após uma falha
+
+    Um processo filho aplica transparência em lotes de `count // 4` janelas
+    e é morto no meio do terceiro lote. As janelas que ele escreveu são
+    reproduzidas num backend simulado idêntico e a recuperação roda sobre o
+    diário que ficou: toda janela escrita precisa estar no diário, e depois
+    da recuperação todas devem estar como antes (ou readotadas). Também
+    confere que pré-visualização, modo foco, transições e a linha de comando
+    registram no diário as janelas em que escrevem, e que a thread que
+    aplica nunca faz fsync, nem quando o arquivo é compactado.
+    """
+    result = {'windows': count}
+    with tempfile.TemporaryDirectory() as directory:
+        # Custo na aplicação: a primeira aplicação de cada janela grava no diário
+        for name, journal in (('plain', None), ('journal', OpacityJournal(os.path.join(directory, 'apply.jsonl')))):
+            backend = FakeBackend(latency=latency)
+            backend.populate(count, hidden_ratio=0.0)
+            core = WindowCore(backend)
+            core.journal = journal
+            windows = core.get_windows_list()
+            start = time.perf_counter()
+            for window in windows:
+                core.apply_opacity(window, 70)
+            result[f'{name}_apply_us'] = (time.perf_counter() - start) * 1e6 / len(windows)
+            engine = BatchOpacityEngine(core)
+            core.reset_all()
+            commits = journal.commits if journal else 0
+            start = time.perf_counter()
+            engine.apply([OpacityRule(60)], windows)
+            result[f'{name}_batch_us'] = (time.perf_counter() - start) * 1e6 / len(windows)
+        result['batch_commits'] = journal.commits - commits
+
+        # Sessão longa: aplicar e resetar repetidamente mantém o arquivo pequeno,
+        # sem fsync na thread que aplica (compactação inclusive)
+        caller = threading.get_ident()
+        caller_fsyncs = []
+        fsync = os.fsync
+
+        def counted_fsync(fd):
+            if threading.get_ident() == caller:
+                caller_fsyncs.append(fd)
+            fsync(fd)
+
+        os.fsync = counted_fsync
+        try:
+            for _ in range(cycles):
+                for window in windows[:max(1, count // 10)]:
+                    core.apply_opacity(window, 50)
+                    core.reset_opacity(window.hwnd)
+                time.sleep(journal.sync_delay / 10)
+        finally:
+            os.fsync = fsync
+        result['caller_fsyncs'] = len(caller_fsyncs)
+        journal.close()  # Compactação e fsync ficam na thread de gravação até aqui
+        result['session_lines'] = journal.lines
+        result['compactions'] = journal.compactions
+        result['fsyncs'] = journal.fsyncs
+        result['compact_off_caller_ok'] = not caller_fsyncs and journal.compactions > 0
+
+        # Escritores além da aplicação: cada um escreve em janelas próprias
+        backend = FakeBackend(latency=latency)
+        hwnds = backend.populate(max(3, min(count, 30)), hidden_ratio=0.0)
+        core = WindowCore(backend)
+        core.journal = OpacityJournal(os.path.join(directory, 'writers.jsonl'))
+        third = len(hwnds) // 3
+        preview = PreviewThrottle(core.opacity_state)
+        for hwnd in hwnds[:third]:
+            preview.begin(hwnd)
+            preview.update(150)
+            preview.end(120)
+        fader = FadeScheduler(core.opacity_state)
+        for hwnd in hwnds[third:2 * third]:
+            fader.fade(hwnd, 90, duration=0.01, start_alpha=255)
+        while fader.active():
+            fader.tick()
+        dimmer = FocusDimmer(core.opacity_state, min_interval=0.0)
+        dimmer.start({hwnd: 100 for hwnd in hwnds[2 * third:]})
+        for hwnd in hwnds[2 * third:]:
+            dimmer.focus(hwnd)  # A anterior, ao perder o foco, vai para o alpha dela
+        dimmer.focus_own()
+        dimmer.stop()
+        core.journal.close()
+        journaled = OpacityJournal(core.journal.path).load()
+        result['writers_unjournaled'] = sum(1 for hwnd in hwnds
+                                            if backend.windows[hwnd].exstyle & WS_EX_LAYERED and hwnd not in journaled)
+
+        # Linha de comando sem o serviço: execuções seguidas sobre as mesmas janelas simuladas
+        cli_path = os.path.join(directory, 'cli.jsonl')
+        cli_args = ['--backend', 'fake', '--journal', cli_path, '--json']
+        backend = FakeBackend()
+        hwnds = backend.populate(5, hidden_ratio=0.0)
+        create_backend, opacity_cli.create_backend = opacity_cli.create_backend, lambda args: backend
+        try:
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull), \
+                    contextlib.redirect_stderr(devnull):
+                for hwnd in hwnds[:3]:
+                    opacity_cli.main(cli_args + ['apply', '50', '--hwnd', str(hwnd)])
+                applied = set(OpacityJournal(cli_path).load()) == set(hwnds[:3])
+                opacity_cli.main(cli_args + ['reset', '--hwnd', str(hwnds[0])])
+                reset = set(OpacityJournal(cli_path).load()) == set(hwnds[1:3])
+                unlayer_code = opacity_cli.main(cli_args + ['unlayer-all'])
+                reset_all_code = opacity_cli.main(cli_args + ['reset-all'])
+        finally:
+            opacity_cli.create_backend = create_backend
+        result['cli_journal_ok'] = applied and reset
+        result['cli_unlayer_rejected_ok'] = unlayer_code == 2
+        result['cli_reset_all_ok'] = (reset_all_code == 0 and not OpacityJournal(cli_path).load() and all(
+            window.exstyle & WS_EX_LAYERED == 0 and window.alpha == 255 for window in backend.windows.values()))
+
+        # Processo morto no meio de um lote
+        path = os.path.join(directory, 'journal.jsonl')
+        batch = max(1, count // 4)
+        here = os.path.dirname(os.path.abspath(__file__))
+        child = subprocess.Popen([sys.executable, '-c', JOURNAL_CHILD % (count, path, batch, batch)], cwd=here,
+                                 stdout=subprocess.PIPE, text=True)
+        written = {}
+        for line in child.stdout:
+            hwnd, alpha = map(int, line.split())
+            written[hwnd] = alpha
+            if len(written) >= batch * 2 + batch // 2:
+                break
+        child.kill()
+        for line in child.stdout.read().splitlines():
+            hwnd, alpha = map(int, line.split())
+            written[hwnd] = alpha
+        child.wait()
+        result['written_before_kill'] = len(written)
+        journaled = OpacityJournal(path).load()
+        result['unjournaled_writes'] = sum(1 for hwnd in written if hwnd not in journaled)
+
+        for mode in ('restore', 'adopt'):
+            backend = FakeBackend(latency=latency)
+            backend.populate(count, hidden_ratio=0.0)
+            for hwnd, alpha in written.items():
+                backend.windows[hwnd].exstyle |= WS_EX_LAYERED
+                backend.windows[hwnd].alpha = alpha
+            core = WindowCore(backend)
+            core.journal = OpacityJournal(path)
+            recovered = core.recover_journal(adopt=(mode == 'adopt'))
+            result[f'{mode}_ms'] = recovered['elapsed_ms']
+            if mode == 'restore':
+                result['restored_ok'] = (recovered['restored'] == len(journaled) and all(
+                    window.exstyle == 0 and window.alpha == 255 for window in backend.windows.values()))
+                result['journal_lines_after'] = core.journal.lines
+                # Nada restaurado ainda no diário: refazer o estado da falha para readotar
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.writelines(json.dumps(entry.to_dict()) + "\n" for entry in journaled.values())
+            else:
+                result['adopted_ok'] = (recovered['adopted'] == len(written)
+                                        and set(core.registry.applied) == set(written))
+    return result
+
+
+def bench_metrics(count: int, latency: float, ops: int = 100000) -> dict:
+    """Custo da instrumentação ligada e desligada
+
+    Mede uma enumeração completa com cada modo, o custo por medição isolada
+    e confere que o snapshot gravado em JSON lines traz as fases da varredura.
+    """
+    result = {'windows': count}
+    for name, metrics in (('disabled', NullMetrics()), ('enabled', Metrics())):
+        backend = FakeBackend(latency=latency)
+        backend.populate(count)
+        core = WindowCore(backend, metrics=metrics)
+        core.get_windows_list()
+        result[f'{name}_scan_ms'] = timed(core.get_windows_list) * 1000
+
+        def measure():
+            for _ in range(ops):
+                with metrics.timer('bench'):
+                    pass
+        result[f'{name}_timer_ns'] = timed(measure, 3) * 1e9 / ops
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'metrics.jsonl')
+        metrics.dump(path)
+        with open(path, encoding='utf-8') as f:
+            dumped = json.loads(f.readline())
+    result['dump_ok'] = (dumped['counters']['scan.count'] == 6 and 'scan.enumerate' in dumped['histograms']
+                         and 'hits' in dumped['process_cache'])
+    return result
+
+
+def bench_ui_block(count: int, latency: float, duration: float = 1.0, frame: float = 1 / 60,
+                   churn: int = 5) -> dict:
+    """Teste de estresse: tempo que a thread da interface fica bloqueada por atualização
+
+    Simula o laço da interface (um quadro a cada `frame` segundos) pedindo
+    varreduras continuamente enquanto `churn` janelas abrem e fecham por
+    quadro. No modo síncrono a varredura e a montagem das listas rodam no
+    próprio quadro; com o RefreshWorker o quadro só aplica as janelas que
+    mudaram. A primeira carga (todas as janelas de uma vez) é medida à parte,
+    e `frame_budget_ok` exige que o p99 dos quadros seguintes caiba em um quadro.
+    """
+    backend = FakeBackend(latency=latency)
+    backend.populate(count, hidden_ratio=0.0)
+
+    sync_core = WindowCore(backend)
+    start = time.perf_counter()
+    WindowLists(sync_core, FakeListbox(), FakeListbox()).apply_changes(sync_core.scan_windows())
+    sync_block = time.perf_counter() - start
+
+    core = WindowCore(backend)
+    lists = WindowLists(core, FakeListbox(), FakeListbox())
+    worker = RefreshWorker(core)
+    worker.request_scan()
+    delta = worker.slot.take()
+    while delta is None:
+        time.sleep(0.001)
+        delta = worker.slot.take()
+    start = time.perf_counter()
+    lists.apply_changes(delta.changes)
+    initial_fill = time.perf_counter() - start
+
+    blocks = []
+    tick = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        hwnds = list(backend.windows)
+        for i in range(churn):
+            backend.close_window(hwnds[(tick * churn + i) % len(hwnds)])
+            backend.add_window(f"Nova janela {tick}-{i}", exe_name='notepad.exe')
+        tick += 1
+        worker.request_scan()
+        start = time.perf_counter()
+        delta = worker.slot.take()
+        if delta is not None:
+            lists.apply_changes(delta.changes)
+        blocks.append(time.perf_counter() - start)
+        time.sleep(frame)
+    worker.shutdown(wait=True)
+    delta = worker.slot.take()
+    if delta is not None:
+        lists.apply_changes(delta.changes)
+    expected = {hwnd for hwnd, window in WindowCore(backend).scan_windows().items() if window.is_exe}
+
+    blocks.sort()
+    p99 = blocks[int(len(blocks) * 0.99)]
+    return {'windows': count, 'sync_block_ms': sync_block * 1000, 'initial_fill_ms': initial_fill * 1000,
+            'async_p99_ms': p99 * 1000, 'async_max_ms': blocks[-1] * 1000, 'frames': len(blocks),
+            'scans': worker.scans, 'coalesced': worker.slot.coalesced, 'frame_budget_ok': p99 <= frame,
+            'rows_ok': set(lists.available_reconciler.rows) == expected}
+
+
+GUI_STARTUP = """
+import os
+import window_opacity_controller
+if os.environ.get('DISPLAY') or os.name == 'nt':
+    from window_backend import FakeBackend
+    backend = FakeBackend()
+    backend.populate(%d)
+    app = window_opacity_controller.WindowOpacityController(backend, event_driven=False)
+    app.root.update()
+    app.root.destroy()
+"""
+
+
+def bench_cold_start(count: int, repeat: int = 5) -> dict:
+    """Tempo de processo completo: linha de comando vs interface gráfica
+
+    Sem servidor gráfico (Linux sem DISPLAY), a interface mede só as importações.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+
+    def run(args):
+        subprocess.run([sys.executable] + args, cwd=here, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    baseline = timed(lambda: run(['-c', 'pass']), repeat)
+    cli = timed(lambda: run(['opacity_cli.py', '--backend', 'fake', '--fake-windows', str(count),
+                             '--json', 'list']), repeat)
+    gui = timed(lambda: run(['-c', GUI_STARTUP % count]), repeat)
+    return {
+        'python_ms': baseline * 1000,
+        'cli_list_ms': cli * 1000,
+        'gui_startup_ms': gui * 1000,
+        'gui_measured': 'window' if os.environ.get('DISPLAY') or os.name == 'nt' else 'imports'
+    }
+
+
+def bench_registry(count: int = 10000, lookups: int = 1000, churn: int = 100) -> dict:
+    """Registro por hwnd contra os dicionários por título que ele substituiu
+
+    Compara memória por janela (dict vs WindowRecord com __slots__), a busca
+    de uma janela aplicada (varredura com startswith vs consulta por hwnd) e
+    o custo de sincronizar um snapshot com `churn` janelas trocadas.
+    """
+    fields = [(0x10000 + i * 2, f"Documento {i} - app{i % 50}.exe", 1000 + i % 500 * 4,
+               f"app{i % 50}.exe", f"C:\\Apps\\app{i % 50}.exe", f"app{i % 50}.exe", True) for i in range(count)]
+    names = WindowRecord.__slots__
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    as_dicts = [dict(zip(names, values)) for values in fields]
+    dict_bytes = tracemalloc.get_traced_memory()[0] - before
+    before = tracemalloc.get_traced_memory()[0]
+    records = [WindowRecord(*values) for values in fields]
+    record_bytes = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    # Antes: janelas aplicadas por título e seleção resolvida por prefixo
+    applied_by_title = {window['title']: {'hwnd': window['hwnd'], 'opacity': 70} for window in as_dicts}
+    targets = [as_dicts[(i * 7919) % count]['title'][:40] for i in range(lookups)]
+
+    def find_by_title():
+        for selected in targets:
+            for title in applied_by_title:
+                if title.startswith(selected) or selected.startswith(title):
+                    break
+
+    registry = WindowRegistry()
+    registry.update(records)
+    for record in records:
+        registry.set_applied(record, 70)
+    hwnds = [records[(i * 7919) % count].hwnd for i in range(lookups)]
+
+    def find_by_hwnd():
+        for hwnd in hwnds:
+            if hwnd in registry.applied:
+                registry.get(hwnd)
+
+    snapshot = records[churn:] + [WindowRecord(0x90000 + i * 2, f"Nova {i}", 9000, "new.exe", None, "new.exe", True)
+                                  for i in range(churn)]
+    plain = WindowRegistry()
+    plain.update(records)
+    start = time.perf_counter()
+    plain.update(snapshot)
+    update_elapsed = time.perf_counter() - start
+
+    return {
+        'windows': count,
+        'dict_bytes_per_window': dict_bytes / count,
+        'record_bytes_per_window': record_bytes / count,
+        'title_lookup_us': timed(find_by_title, 1) * 1e6 / lookups,
+        'hwnd_lookup_us': timed(find_by_hwnd) * 1e6 / lookups,
+        'update_ms': update_elapsed * 1000,
+        'exe_index_ok': len(plain.windows_of_exe('new.exe')) == churn
+    }
+
+
+def bench_classifier(count: int = 5000, ticks: int = 10) -> dict:
+    """Classificação das janelas a cada atualização
+
+    Compara as listas fixas antigas (um `any(... in title.lower())` por janela
+    a cada atualização) com o classificador compilado, cujo resultado fica
+    guardado por hwnd. Confere também que a exclusão do próprio aplicativo
+    é feita pelo PID: uma janela nossa some da lista mesmo sem o título
+    "Controlador de Transparência", e a de outro programa com "opacity" no
+    título continua aparecendo; e que um processo que deixa de poder ser
+    consultado não reaproveita o resultado guardado.
+    """
+    backend = FakeBackend()
+    backend.populate(count, hidden_ratio=0.0)
+    for i in range(count // 10):
+        backend.add_window(f"Chrome - Aba {i}", pid=backend.add_process("chrome.exe", access_denied=True))
+    backend.own_pid = backend.add_process("python.exe")
+    own_hwnd = backend.add_window("Janela sem o nome do aplicativo", pid=backend.own_pid)
+    other_hwnd = backend.add_window("CSS opacity - Firefox", exe_name="firefox.exe")
+    core = WindowCore(backend)
+    candidates = []
+    for hwnd in backend.enum_windows():
+        title, class_name, pid = core._probe_window(hwnd)
+        try:
+            process = core.process_cache.lookup(pid)
+        except Exception:
+            process = None
+        candidates.append((hwnd, title, class_name, pid, process))
+
+    def inline_lists():
+        for hwnd, title, _, pid, process in candidates:
+            if process is None:
+                any(keyword in title.lower() for keyword in ['cursor', 'code', 'notepad', 'chrome', 'firefox', 'edge', 'opera'])
+            elif not any(exclude in title.lower() for exclude in ['controlador de transparência', 'opacity']):
+                is_exe = bool(process.exe_path and process.exe_path.lower().endswith('.exe'))
+                is_exe or process.exe_name.lower() in ['cursor.exe', 'code.exe', 'notepad++.exe', 'sublime_text.exe',
+                                                       'atom.exe', 'vim.exe', 'emacs.exe']
+
+    classifier = WindowClassifier(backend)
+
+    def compiled():
+        for hwnd, title, class_name, pid, process in candidates:
+            classifier.classify(hwnd, title, pid, process, class_name)
+
+    start = time.perf_counter()
+    compiled()
+    first_elapsed = time.perf_counter() - start
+    windows = core.scan_windows()
+
+    # Regra por classe: a classe vem da enumeração, sem consultas a mais
+    backend.calls.clear()
+    WindowCore(backend).scan_windows()
+    plain_calls = sum(backend.calls.values())
+    backend.calls.clear()
+    WindowCore(backend, classifier=WindowClassifier(backend, exclude_classes=['Shell_TrayWnd'])).scan_windows()
+    class_rule_calls = sum(backend.calls.values())
+
+    # Processo que some depois de classificado: a janela é classificada de novo, sem erro
+    vanished = backend.add_window("Editor - processo encerrado", exe_name="editor.exe")
+    core.scan_windows()
+    core.process_cache.clear()
+    del backend.processes[backend.windows[vanished].pid]
+    try:
+        vanished_ok = vanished not in core.scan_windows()
+    except AttributeError:
+        vanished_ok = False
+    return {'windows': len(candidates), 'inline_ms': timed(inline_lists, ticks) * 1000,
+            'first_ms': first_elapsed * 1000, 'cached_ms': timed(compiled, ticks) * 1000,
+            'hit_rate': classifier.hits / (classifier.hits + classifier.misses),
+            'own_excluded': own_hwnd not in windows and classifier.classify(
+                own_hwnd, "Janela sem o nome do aplicativo", backend.own_pid, None) == EXCLUDE,
+            'opacity_title_listed': other_hwnd in windows,
+            'class_rule_extra_calls': class_rule_calls - plain_calls,
+            'vanished_process_ok': vanished_ok}
+
+
+def churn_trace(seed: int = 7) -> tuple:
+    """Dia de trabalho sintético de 8 horas: (instantes de mudança, períodos minimizado, duração)
+
+    Uma hora de muita atividade (uma janela aberta ou fechada a cada ~20 s),
+    duas horas quase paradas (~15 min), duas horas minimizado e três horas
+    de atividade moderada (~2 min).
+    """
+    rng = random.Random(seed)
+    changes = []
+    for start, end, mean in ((0, 3600, 20), (3600, 10800, 900), (10800, 18000, 300), (18000, 28800, 120)):
+        t = start + rng.expovariate(1 / mean)
+        while t < end:
+            changes.append(t)
+            t += rng.expovariate(1 / mean)
+    return changes, [(10800, 18000)], 28800
+
+
+def bench_refresh_schedule() -> dict:
+    """Acordadas por hora do agendador adaptativo contra o intervalo fixo de 3 s
+
+    Simula o RefreshScheduler em tempo virtual sobre `churn_trace` e mede
+    também quanto tempo uma mudança (com a janela exibida) espera até a
+    atualização que a mostra. Como na interface, o resultado de cada
+    atualização é informado (`report`) só depois, quando a interface mostra
+    as mudanças, e o prazo da próxima é recalculado a partir do fim da
+    anterior, como faz a thread do agendador.
+    Por fim, com a thread real: depois de recuar até o intervalo máximo, um
+    `report(True)` vindo de outra thread traz a próxima atualização para o
+    intervalo mínimo, e a thread encerra com `stop`.
+    """
+    changes, minimized, duration = churn_trace()
+    ui_lag = 0.05  # Da atualização até a interface mostrar as mudanças e informar o resultado
+    now = 0.0
+    last_refresh = 0.0
+    delays = []
+    reports = []  # (instante, houve mudança) ainda não entregues ao agendador
+
+    def refresh():
+        nonlocal last_refresh
+        seen = [t for t in changes if last_refresh < t <= now]
+        # Mudanças ocorridas com a janela minimizada só aparecem ao restaurar, de propósito
+        delays.extend(now - t for t in seen if not any(start <= t < end for start, end in minimized))
+        reports.append((now + ui_lag, bool(seen)))
+        last_refresh = now
+
+    scheduler = RefreshScheduler(refresh, liveness=lambda: None)
+    transitions = sorted([(start, True) for start, _ in minimized] + [(end, False) for _, end in minimized])
+    last_tick = 0.0
+    while now < duration:
+        due = max(now, last_tick + scheduler.next_timeout())
+        if reports and reports[0][0] <= due:
+            now, changed = reports.pop(0)
+            scheduler.report(changed)
+            continue
+        if transitions and transitions[0][0] <= due:
+            now, paused = transitions.pop(0)
+            scheduler.set_paused(paused)
+            if not paused:
+                scheduler.tick()  # Retomar acorda a thread na hora
+                last_tick = now
+            continue
+        now = due
+        scheduler.tick()
+        last_tick = now
+    hours = duration / 3600
+    fixed = duration / 3.0
+
+    ticks = []
+    threaded = RefreshScheduler(lambda: ticks.append(time.perf_counter()), min_interval=0.02, max_interval=2.0,
+                                backoff=100.0)
+    threaded.report(False)  # Já no intervalo máximo, como depois de um período sem mudanças
+    threaded.start()
+    time.sleep(0.05)
+    reported = time.perf_counter()
+    threaded.report(True)
+    time.sleep(0.2)
+    thread = threaded._thread
+    start = time.perf_counter()
+    threaded.stop()
+    stop_elapsed = time.perf_counter() - start
+    churn_wait = min((t for t in ticks if t > reported), default=float('inf')) - reported
+    delays.sort()
+    return {'hours': hours, 'fixed_wakeups_per_hour': fixed / hours,
+            'adaptive_wakeups_per_hour': scheduler.wakeups / hours,
+            'reduction': 1 - scheduler.wakeups / fixed, 'liveness_checks': scheduler.liveness_checks,
+            'mean_delay_s': sum(delays) / len(delays), 'p95_delay_s': delays[int(len(delays) * 0.95)],
+            'churn_wait_ms': churn_wait * 1000, 'churn_wakeup_ok': churn_wait < 0.1,
+            'stop_ms': stop_elapsed * 1000, 'stopped': not thread.is_alive()}
+
+
+def bench_virtual_list(count: int, visible: int = 25, churn_ratio: float = 0.01, ticks: int = 10) -> dict:
+    """Atualização da lista de janelas com `count` linhas
+
+    Compara a atualização antiga (apagar e reinserir todas as linhas) e a
+    reconciliação do snapshot inteiro a cada ciclo com o caminho atual: o
+    RefreshWorker entrega só as janelas que mudaram e a lista virtual,
+    ordenada por chave, altera só essas linhas e redesenha as `visible` da
+    tela. Com servidor gráfico, mede também os widgets Tk reais recebendo as
+    mesmas mudanças.
+    """
+    rng = random.Random(count)
+    hwnds = list(range(0x10000, 0x10000 + count * 2, 2))
+    labels = {hwnd: f"app.exe - Documento {hwnd}" for hwnd in hwnds}
+    initial = {hwnd: labels[hwnd] for hwnd in hwnds}
+    next_hwnd = hwnds[-1] + 2
+    snapshots = []
+    deltas = []
+    for _ in range(ticks):
+        removed = []
+        upserts = {}
+        for _ in range(max(1, int(count * churn_ratio))):
+            gone = hwnds.pop(rng.randrange(len(hwnds)))
+            if upserts.pop(gone, None) is None:
+                removed.append(gone)
+            hwnds.append(next_hwnd)
+            upserts[next_hwnd] = labels[next_hwnd] = f"app.exe - Nova {next_hwnd}"
+            next_hwnd += 2
+        snapshots.append([(hwnd, labels[hwnd]) for hwnd in hwnds])
+        deltas.append((upserts, removed))
+
+    listbox = FakeListbox()
+    start = time.perf_counter()
+    for entries in snapshots:
+        listbox.delete(0, 'end')
+        for _, label in entries:
+            listbox.insert('end', label)
+    full_elapsed = time.perf_counter() - start
+
+    reconciler = ListboxReconciler(VirtualListModel(), key=lambda hwnd: hwnd)
+    reconciler.reconcile(initial)
+    start = time.perf_counter()
+    for entries in snapshots:
+        reconciler.reconcile(entries)
+    snapshot_elapsed = time.perf_counter() - start
+
+    model = VirtualListModel()
+    reconciler = ListboxReconciler(model, key=lambda hwnd: hwnd)
+    reconciler.reconcile(initial)
+    drawn = model.visible_rows(0, visible)
+    redrawn = 0
+    operations = 0
+    start = time.perf_counter()
+    for upserts, removed in deltas:
+        operations += reconciler.apply(upserts, removed)['touched']
+        rows = model.visible_rows(0, visible)
+        redrawn += sum(1 for old, new in zip(drawn, rows) if old[1:] != new[1:])
+        drawn = rows
+    virtual_elapsed = time.perf_counter() - start
+
+    result = {'rows': count, 'full_refresh_ms': full_elapsed * 1000 / ticks, 'full_row_ops': count + 1,
+              'snapshot_diff_ms': snapshot_elapsed * 1000 / ticks,
+              'virtual_refresh_ms': virtual_elapsed * 1000 / ticks, 'virtual_row_ops': operations / ticks,
+              'rows_redrawn_per_tick': redrawn / ticks,
+              'rows_ok': model.rows == [labels[hwnd] for hwnd in sorted(hwnds)]}
+    if os.environ.get('DISPLAY') or os.name == 'nt':
+        import tkinter as tk
+        from virtual_list import VirtualListbox
+        root = tk.Tk()
+        for name, widget in (('tk_listbox_ms', tk.Listbox(root)), ('tk_virtual_ms', VirtualListbox(root))):
+            widget.pack()
+            root.update()
+            reconciler = ListboxReconciler(widget, key=lambda hwnd: hwnd)
+            reconciler.reconcile(initial)
+            root.update()
+            start = time.perf_counter()
+            for upserts, removed in deltas:
+                reconciler.apply(upserts, removed)
+                root.update()
+            result[name] = (time.perf_counter() - start) * 1000 / ticks
+        root.destroy()
+    return result
+
+
+def bench_search(count: int, query: str = "documento 12 chrome", churn_ratio: float = 0.01) -> dict:
+    """Latência por tecla da busca sobre a lista de `count` janelas
+
+    Cada tecla faz o que a interface faz (WindowLists.search): buscar no
+    índice e alterar só as linhas que entram ou saem. Digita `query` letra a
+    letra e depois apaga tudo, medindo à parte as teclas depois que a busca
+    já restringiu a lista; compara com filtrar o texto exibido de todas as
+    janelas a cada tecla e mede a atualização do índice por diferença contra
+    reconstruí-lo. `class_calls` conta as consultas de classe feitas pelo
+    índice (a classe vem do registro).
+
+    A tecla mais lenta é a que apaga o termo que restringia a lista (as
+    janelas voltam e a lista é remontada); `keystroke_budget_ok` exige que
+    mesmo ela caiba em um quadro a 60 Hz.
+    """
+    backend = FakeBackend()
+    backend.populate(count, hidden_ratio=0.0)
+    core = WindowCore(backend)
+    windows = core.get_windows_list()
+    lists = WindowLists(core, VirtualListModel(), FakeListbox())
+    index = lists.search_index
+    backend.calls.clear()
+    start = time.perf_counter()
+    lists.apply_changes({window.hwnd: window for window in windows})
+    build_elapsed = time.perf_counter() - start
+    class_calls = backend.calls['get_class_name']
+
+    prefixes = [query[:i] for i in range(1, len(query) + 1)]
+    keystrokes = prefixes + prefixes[-2::-1] + ['']
+    latencies = []
+    narrow_latencies = []
+    for text in keystrokes:
+        start = time.perf_counter()
+        lists.search(text)
+        elapsed = time.perf_counter() - start
+        latencies.append(elapsed)
+        if len(text) > 1 and text != query:
+            narrow_latencies.append(elapsed)
+
+    def linear_filter():
+        for text in prefixes:
+            needle = text.lower()
+            [entry for entry in core.build_entries(windows, True) if needle in entry[1].lower()]
+    linear_elapsed = timed(linear_filter) / len(prefixes)
+
+    # Snapshot seguinte com uma fração das janelas trocada
+    changed = list(windows)
+    for i in range(max(1, int(count * churn_ratio))):
+        old = changed.pop(i * 7 % len(changed))
+        changed.append(WindowRecord(old.hwnd + 1, f"Nova {i} - {old.exe_name}", old.pid, old.exe_name,
+                                    old.exe_path, old.process_name, old.is_exe, old.class_name))
+    start = time.perf_counter()
+    index.update(changed)
+    diff_elapsed = time.perf_counter() - start
+    rebuild_elapsed = timed(lambda: WindowSearchIndex().update(changed))
+    return {'windows': count, 'index_build_ms': build_elapsed * 1000,
+            'keystroke_mean_ms': sum(latencies) * 1000 / len(latencies),
+            'keystroke_max_ms': max(latencies) * 1000,
+            'keystroke_budget_ok': max(latencies) <= 1 / 60,
+            'narrowed_keystroke_ms': sum(narrow_latencies) * 1000 / len(narrow_latencies),
+            'linear_filter_ms': linear_elapsed * 1000, 'class_calls': class_calls,
+            'rows_ok': len(lists.available_reconciler.rows) == len(lists.available),
+            'narrowed': index.narrowed_searches, 'full': index.full_searches,
+            'diff_update_ms': diff_elapsed * 1000, 'rebuild_ms': rebuild_elapsed * 1000}
+
+
+def print_result(name: str, result: dict):
+    values = "  ".join(f"{key}={value:.3f}" if isinstance(value, float) else f"{key}={value}"
+                       for key, value in result.items())
+    print(f"  {name:<20} {values}")
+
+
+# Sufixos das chaves de tempo (quanto menor, melhor) e o fator para milissegundos
+TIME_SUFFIXES = (('_ns', 1e-6), ('_us', 1e-3), ('us_per_window', 1e-3), ('ms', 1.0))
+# Caudas da distribuição (uma amostra ruim decide o valor): mostradas, mas não comparadas
+TAIL_MARKERS = ('p95', 'p99', 'max')
+
+
+def time_unit(key: str) -> float:
+    """Fator para milissegundos de uma chave de tempo comparável, ou 0 se não for uma"""
+    if any(marker in key for marker in TAIL_MARKERS):
+        return 0.0
+    for suffix, factor in TIME_SUFFIXES:
+        if key.endswith(suffix):
+            return factor
+    return 0.0
+
+
+def compare_results(baseline: dict, current: dict, tolerance: float = 1.0, min_ms: float = 0.5) -> list:
+    """Comparar dois conjuntos de resultados e listar as regressões
+
+    Um tempo regrediu se passou de `tolerance` (fração) acima do baseline e a
+    diferença é maior que `min_ms`, o que ignora o ruído de medições muito
+    curtas. Uma verificação (valor booleano) regrediu se deixou de ser
+    verdadeira. Benchmarks e chaves ausentes em um dos lados são ignorados.
+    """
+    regressions = []
+    for name, result in current.items():
+        before = baseline.get(name)
+        if not isinstance(before, dict):
+            continue
+        for key, value in result.items():
+            old = before.get(key)
+            if old is None:
+                continue
+            if isinstance(value, bool):
+                if old is True and value is False:
+                    regressions.append(f"{name}.{key}: {old} -> {value}")
+                continue
+            factor = time_unit(key)
+            if not factor or not isinstance(value, (int, float)) or not isinstance(old, (int, float)):
+                continue
+            if value > old * (1 + tolerance) and (value - old) * factor > min_ms:
+                change = f"+{(value / old - 1) * 100:.0f}%" if old else "novo custo"
+                regressions.append(f"{name}.{key}: {old:.3f} -> {value:.3f} ({change})")
+    return regressions
+
+
+# Contadores de erro: qualquer valor diferente de zero é uma falha
+ERROR_COUNTERS = {'unjournaled_writes', 'writers_unjournaled', 'restore_left_layered', 'sweep_recycled_written'}
+
+
+def failed_checks(results: dict) -> list:
+    """Listar as verificações de correção que falharam
+
+    Todo valor booleano dos resultados é uma verificação e precisa ser
+    verdadeiro, e os contadores de `ERROR_COUNTERS` precisam ser zero.
+    """
+    failures = []
+    for name, result in results.items():
+        for key, value in result.items():
+            if isinstance(value, bool):
+                if not value:
+                    failures.append(f"{name}.{key}: {value}")
+            elif key in ERROR_COUNTERS and value:
+                failures.append(f"{name}.{key}: {value}")
+    return failures
+
+
+# Benchmarks na ordem em que rodam (nomes aceitos por --only); os a partir de
+# get_windows_list rodam uma vez para cada quantidade de janelas de --sizes
+BENCHMARKS = ('cold_start', 'registry', 'classifier', 'refresh_schedule', 'virtual_list', 'search',
+              'get_windows_list', 'enumeration', 'process_lookup', 'apply_opacity', 'style_roundtrip',
+              'batch_apply', 'profiles', 'fades', 'preview', 'focus', 'refresh_loop', 'event_tracking',
+              'daemon', 'metrics', 'handle_gc', 'journal', 'ui_block')
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Benchmarks do Controlador de Transparência")
+    parser.add_argument('--sizes', default='50,500,5000',
+                        help="quantidades de janelas simuladas, separadas por vírgula")
+    parser.add_argument('--latency-us', type=float, default=0.0,
+                        help="latência simulada de cada chamada ao sistema, em microssegundos")
+    parser.add_argument('--output', metavar='ARQUIVO',
+                        help="gravar os resultados em JSON")
+    parser.add_argument('--baseline', metavar='ARQUIVO',
+                        help="comparar com resultados gravados antes por --output (código de saída 1 se houver regressão)")
+    parser.add_argument('--tolerance', type=float, default=1.0,
+                        help="piora tolerada nos tempos em relação ao baseline, como fração (padrão: 1.0, o dobro)")
+    parser.add_argument('--min-ms', type=float, default=0.5,
+                        help="diferenças menores que isto, em milissegundos, nunca são regressão")
+    parser.add_argument('--only', metavar='NOMES',
+                        help="rodar só estes benchmarks, separados por vírgula: " + ", ".join(BENCHMARKS))
+    args = parser.parse_args()
+
+    selected = set(BENCHMARKS)
+    if args.only:
+        selected = {name.strip() for name in args.only.split(',')}
+        unknown = selected - set(BENCHMARKS)
+        if unknown:
+            parser.error(f"benchmarks desconhecidos: {', '.join(sorted(unknown))}")
+    sizes = [int(size) for size in args.sizes.split(',')]
+    latency = args.latency_us / 1e6
+    baseline = None
+    if args.baseline:
+        # Ler antes de rodar: um arquivo inválido falha logo
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    results = {}
+
+    def section(title: str, *names: str) -> bool:
+        """Mostrar o título de um grupo se algum dos seus benchmarks foi escolhido"""
+        if selected.isdisjoint(names):
+            return False
+        print(f"\n{title}")
+        return True
+
+    def report(name: str, bench, *bench_args, size: int = None):
+        if name not in selected:
+            return
+        result = bench(*bench_args)
+        print_result(name, result)
+        results[name if size is None else f"{name}/{size}"] = result
+
+    print("📊 Controlador de Transparência - Benchmarks")
+    print("=" * 50)
+    if section(f"🚀 Inicialização a frio ({sizes[0]} janelas)", 'cold_start'):
+        report("cold_start", bench_cold_start, sizes[0])
+    if section("🗂️ Registro de janelas (10000 janelas)", 'registry'):
+        report("registry", bench_registry)
+    if section("🧭 Classificação de janelas (5000 janelas)", 'classifier'):
+        report("classifier", bench_classifier)
+    if section("⏲️ Agendamento das atualizações (8 h simuladas)", 'refresh_schedule'):
+        report("refresh_schedule", bench_refresh_schedule)
+    if section("📜 Lista virtual", 'virtual_list'):
+        for rows in (100, 1000, 10000):
+            report("virtual_list", bench_virtual_list, rows, size=rows)
+    if section("🔎 Busca na lista", 'search'):
+        for count in (1000, 5000):
+            report("search", bench_search, count, size=count)
+    per_size = BENCHMARKS[BENCHMARKS.index('get_windows_list'):]
+    for size in sizes:
+        if section(f"🪟 {size} janelas", *per_size):
+            for name in per_size:
+                report(name, globals()[f'bench_{name}'], size, latency, size=size)
+
+    if args.output:
+        data = {'python': platform.python_version(), 'platform': platform.platform(), 'sizes': sizes,
+                'latency_us': args.latency_us, 'time': time.time(), 'results': results}
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        print(f"\n💾 Resultados gravados em {args.output}")
+
+    failed = False
+    failures = failed_checks(results)
+    if failures:
+        print(f"\n❌ {len(failures)} verificações falharam:")
+        for failure in failures:
+            print(f"  {failure}")
+        failed = True
+
+    if baseline is not None:
+        regressions = compare_results(baseline.get('results', {}), results, args.tolerance, args.min_ms)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regressões em relação a {args.baseline}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            failed = True
+        else:
+            print(f"\n✅ Nenhuma regressão em relação a {args.baseline}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
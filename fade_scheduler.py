@@ -0,0 +1,213 @@
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from opacity_state import OpacityState
+
+
+class Fade:
+    """Transição de alpha em andamento para uma janela"""
+    __slots__ = ('hwnd', 'start_alpha', 'target_alpha', 'start_time', 'duration', 'last_alpha')
+
+    def __init__(self, hwnd: int, start_alpha: int, target_alpha: int, start_time: float, duration: float):
+        self.hwnd = hwnd
+        self.start_alpha = start_alpha
+        self.target_alpha = target_alpha
+        self.start_time = start_time
+        self.duration = duration
+        self.last_alpha = start_alpha
+
+    def alpha_at(self, now: float) -> int:
+        if self.duration <= 0:
+            return self.target_alpha
+        progress = min(1.0, max(0.0, (now - self.start_time) / self.duration))
+        return round(self.start_alpha + (self.target_alpha - self.start_alpha) * progress)
+
+    def done_at(self, now: float) -> bool:
+        return now - self.start_time >= self.duration
+
+
+class FadeScheduler:
+    """Anima a transparência de várias janelas com um orçamento fixo por quadro
+
+    Cada quadro calcula o alpha interpolado de todas as transições ativas e
+    escreve apenas os que mudaram (uma escrita por hwnd por quadro: um novo
+    `fade` para a mesma janela substitui o anterior). Se um quadro atrasar, os
+    quadros intermediários são descartados em vez de enfileirados, e o próximo
+    quadro já usa o alpha do instante atual.
+    """
+
+    def __init__(self, state: OpacityState, fps: int = 60, default_duration: float = 0.2,
+                 clock: Callable[[], float] = time.perf_counter):
+        self.state = state
+        self.frame_interval = 1.0 / fps
+        self.default_duration = default_duration
+        self.clock = clock
+        self._fades: Dict[int, Fade] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.frames = 0
+        self.missed_frames = 0
+        self.writes = 0
+        self.active_time = 0.0
+
+    def fade(self, hwnd: int, target_alpha: int, duration: Optional[float] = None,
+             start_alpha: Optional[int] = None):
+        """Iniciar uma transição até `target_alpha` (0-255)"""
+        if duration is None:
+            duration = self.default_duration
+        with self._lock:
+            current = self._fades.get(hwnd)
+            if start_alpha is None:
+                if current is not None:
+                    start_alpha = current.last_alpha
+                else:
+                    _, alpha = self.state.current(hwnd)
+                    start_alpha = 255 if alpha is None else alpha
+            self._fades[hwnd] = Fade(hwnd, start_alpha, target_alpha, self.clock(), duration)
+        self._wake.set()
+
+    def cancel(self, hwnd: int):
+        with self._lock:
+            self._fades.pop(hwnd, None)
+
+    def active(self) -> int:
+        with self._lock:
+            return len(self._fades)
+
+    def tick(self, now: Optional[float] = None) -> int:
+        """Processar um quadro; retorna o número de janelas escritas"""
+        if now is None:
+            now = self.clock()
+        with self._lock:
+            fades = list(self._fades.values())
+        written = 0
+        finished = []
+        for fade in fades:
+            alpha = fade.alpha_at(now)
+            if alpha != fade.last_alpha or fade.done_at(now):
+                try:
+                    self.writes += self.state.set_alpha(fade.hwnd, alpha, verify=False)
+                    written += 1
+                except Exception:
+                    finished.append(fade)  # Janela provavelmente fechada
+                    continue
+                fade.last_alpha = alpha
+            if fade.done_at(now):
+                finished.append(fade)
+        if finished:
+            with self._lock:
+                for fade in finished:
+                    if self._fades.get(fade.hwnd) is fade:
+                        del self._fades[fade.hwnd]
+        self.frames += 1
+        return written
+
+    def start(self):
+        """Iniciar a thread de quadros (fica ociosa enquanto não há transições)"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="FadeScheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(1)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            started = self.clock()
+            next_frame = started
+            while not self._stop.is_set() and self.active():
+                self.tick()
+                next_frame += self.frame_interval
+                now = self.clock()
+                if now > next_frame:
+                    # Atrasado: descartar os quadros perdidos em vez de recuperá-los
+                    missed = int((now - next_frame) / self.frame_interval) + 1
+                    self.missed_frames += missed
+                    next_frame += missed * self.frame_interval
+                time.sleep(max(0.0, next_frame - self.clock()))
+            self.active_time += self.clock() - started
+
+    def stats(self) -> dict:
+        return {
+            'frames': self.frames,
+            'missed_frames': self.missed_frames,
+            'writes': self.writes,
+            'achieved_fps': self.frames / self.active_time if self.active_time else 0.0
+        }
+
+
+class PreviewThrottle:
+    """Limita as escritas de pré-visualização ao vivo (slider) a uma taxa alvo
+
+    Durante o arraste só o alpha é escrito, no máximo `rate` vezes por segundo;
+    o valor mais recente que ficou para trás é enviado por um agendamento
+    (`schedule(atraso, callback)`, por exemplo `root.after`). `end` sempre
+    envia o valor final.
+    """
+
+    def __init__(self, state: OpacityState, rate: float = 30.0,
+                 schedule: Optional[Callable[[float, Callable[[], None]], None]] = None,
+                 clock: Callable[[], float] = time.perf_counter):
+        self.state = state
+        self.interval = 1.0 / rate
+        self.schedule = schedule
+        self.clock = clock
+        self.hwnd: Optional[int] = None
+        self._pending: Optional[int] = None
+        self._scheduled = False
+        self._last_write = float('-inf')
+        self.updates = 0
+        self.writes = 0
+
+    def begin(self, hwnd: int):
+        if self.hwnd != hwnd:
+            self.hwnd = hwnd
+            self._pending = None
+            self._last_write = float('-inf')
+
+    def update(self, alpha: int):
+        """Novo valor do slider; escreve agora ou deixa pendente até a próxima janela de tempo"""
+        if self.hwnd is None:
+            return
+        self.updates += 1
+        self._pending = alpha
+        wait = self._last_write + self.interval - self.clock()
+        if wait <= 0:
+            self.flush()
+        elif not self._scheduled and self.schedule is not None:
+            self._scheduled = True
+            self.schedule(wait, self._scheduled_flush)
+
+    def _scheduled_flush(self):
+        self._scheduled = False
+        self.flush()
+
+    def flush(self):
+        """Escrever o valor pendente, se houver"""
+        if self.hwnd is None or self._pending is None:
+            return
+        alpha, self._pending = self._pending, None
+        self._last_write = self.clock()
+        self.state.set_alpha(self.hwnd, alpha, verify=False)
+        self.writes += 1
+
+    def end(self, alpha: Optional[int] = None) -> Optional[int]:
+        """Encerrar o arraste enviando o valor final; retorna o hwnd pré-visualizado"""
+        hwnd = self.hwnd
+        if hwnd is not None:
+            if alpha is not None:
+                self._pending = alpha
+            self.flush()
+        self.hwnd = None
+        return hwnd
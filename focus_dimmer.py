@@ -0,0 +1,169 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+from metrics import latency_stats
+from opacity_state import OpacityState
+from window_backend import EVENT_SYSTEM_FOREGROUND
+
+
+def _timer_schedule(delay: float, callback: Callable[[], None]):
+    timer = threading.Timer(delay, callback)
+    timer.daemon = True
+    timer.start()
+
+
+class FocusDimmer:
+    """Modo foco: janelas do conjunto ficam transparentes, a que está em primeiro plano fica opaca
+
+    `set_members` define o conjunto (hwnd -> alpha quando fora de foco). A
+    cada EVENT_SYSTEM_FOREGROUND, só duas janelas são escritas: a que perdeu o
+    foco volta ao seu alpha e a que ganhou vai a `focus_alpha`. Trocas mais
+    próximas que `min_interval` (Alt-Tab segurado) são agrupadas: a primeira é
+    escrita na hora e só a última das seguintes é aplicada, por um
+    agendamento (`schedule(atraso, callback)`) ao fim do intervalo.
+
+    Os eventos podem chegar de qualquer thread. O hook do Win32 ignora as
+    janelas do próprio processo (WINEVENT_SKIPOWNPROCESS), então quem as
+    exibe chama `focus_own` quando uma delas ganha o foco.
+    """
+
+    def __init__(self, state: OpacityState, focus_alpha: int = 255, min_interval: float = 0.05,
+                 schedule: Optional[Callable[[float, Callable[[], None]], None]] = None,
+                 clock: Callable[[], float] = time.perf_counter, latency_samples: int = 1000):
+        self.state = state
+        self.focus_alpha = focus_alpha
+        self.min_interval = min_interval
+        self.schedule = schedule or _timer_schedule
+        self.clock = clock
+        self.fader = None  # FadeScheduler cujas transições devem ser canceladas antes de escrever
+        self.members: Dict[int, int] = {}
+        self.focused: Optional[int] = None  # Membro atualmente em focus_alpha
+        self.running = False
+        self._lock = threading.Lock()
+        self._pending: Optional[tuple] = None  # (hwnd, instante do evento) aguardando o intervalo
+        self._scheduled = False
+        self._last_switch = float('-inf')
+        self.latencies = deque(maxlen=latency_samples)  # segundos entre evento e escrita
+        self.events = 0
+        self.switches = 0
+        self.coalesced = 0
+        self.writes = 0
+
+    def start(self, members: Dict[int, int]):
+        """Ligar o modo foco sobre `members` e começar a ouvir as trocas de foco"""
+        if self.running:
+            return
+        self.state.backend.add_event_listener(self.on_event)  # Levanta se não houver eventos
+        self.running = True
+        self.set_members(members)
+
+    def stop(self):
+        """Desligar: a janela em foco volta ao seu alpha e os eventos deixam de ser ouvidos"""
+        if not self.running:
+            return
+        self.state.backend.remove_event_listener(self.on_event)
+        with self._lock:
+            self.running = False
+            self._pending = None
+            if self.focused is not None:
+                self._write(self.focused, self.members[self.focused])
+            self.focused = None
+            self.members = {}
+
+    def set_members(self, members: Dict[int, int]):
+        """Trocar o conjunto de janelas (hwnd -> alpha fora de foco)
+
+        Não escreve nas janelas que saíram do conjunto (quem as tirou já as
+        resetou). A janela em primeiro plano, se for membro, vai a `focus_alpha`.
+        """
+        foreground = self.state.backend.get_foreground_window()
+        with self._lock:
+            if not self.running:
+                return
+            self.members = dict(members)
+            if self.focused is not None and self.focused not in self.members:
+                self.focused = None
+            self._switch(foreground)
+            if self.focused is not None:
+                # Pode ter recebido outro alpha enquanto estava em foco (reaplicação)
+                self._write(self.focused, self.focus_alpha)
+
+    def on_event(self, event: int, hwnd: int):
+        """Destinatário dos eventos do backend"""
+        if event == EVENT_SYSTEM_FOREGROUND:
+            self.focus(hwnd)
+
+    def focus(self, hwnd: int, timestamp: Optional[float] = None):
+        """Nova janela em primeiro plano, escrita agora ou ao fim do intervalo mínimo"""
+        now = self.clock()
+        if timestamp is None:
+            timestamp = now
+        with self._lock:
+            if not self.running:
+                return
+            self.events += 1
+            wait = self._last_switch + self.min_interval - now
+            if wait > 0:
+                # Tempestade de trocas: guardar só a mais recente
+                if self._pending is not None:
+                    self.coalesced += 1
+                self._pending = (hwnd, timestamp)
+                if self._scheduled:
+                    return
+                self._scheduled = True
+            else:
+                self._switch(hwnd, timestamp)
+                return
+        self.schedule(wait, self.flush)
+
+    def focus_own(self):
+        """Uma janela do próprio aplicativo ganhou o foco (não chega pelo hook)
+
+        Nunca é membro do conjunto: a janela que estava em foco volta ao seu alpha.
+        """
+        self.focus(0)
+
+    def flush(self):
+        """Aplicar a troca de foco pendente, se houver"""
+        with self._lock:
+            self._scheduled = False
+            if self._pending is None or not self.running:
+                return
+            hwnd, timestamp = self._pending
+            self._pending = None
+            self._switch(hwnd, timestamp)
+
+    # _switch e _write devem ser chamados com o lock adquirido
+
+    def _switch(self, hwnd: int, timestamp: Optional[float] = None):
+        new = hwnd if hwnd in self.members else None
+        old = self.focused
+        self._last_switch = self.clock()
+        if new == old:
+            return
+        self.switches += 1
+        if old is not None:
+            self._write(old, self.members[old])
+        if new is not None:
+            self._write(new, self.focus_alpha)
+        self.focused = new
+        if timestamp is not None:
+            self.latencies.append(self.clock() - timestamp)
+
+    def _write(self, hwnd: int, alpha: int):
+        if self.fader is not None:
+            self.fader.cancel(hwnd)
+        try:
+            self.writes += self.state.set_alpha(hwnd, alpha, verify=False)
+        except Exception:
+            pass  # Janela fechada: a verificação das aplicadas a remove do conjunto
+
+    def latency_stats(self) -> dict:
+        """Latência entre o evento de foco e as escritas, em milissegundos"""
+        return latency_stats(self.latencies)
+
+    def stats(self) -> dict:
+        return {'events': self.events, 'switches': self.switches, 'coalesced': self.coalesced,
+                'writes': self.writes}
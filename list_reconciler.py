@@ -0,0 +1,192 @@
+import bisect
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+
+class ListboxReconciler:
+    """Reconcilia um Listbox incrementalmente a partir de snapshots indexados por hwnd
+
+    Em vez de apagar e reinserir todas as linhas a cada atualização, compara o
+    snapshot novo com o anterior e aplica apenas as inserções e remoções
+    necessárias. Linhas que já existem permanecem no lugar, preservando a
+    seleção e a posição de rolagem do usuário.
+
+    Com `key`, as linhas ficam ordenadas por `key(hwnd)` (calculada uma vez,
+    na inserção): a linha de um hwnd é achada por bisseção, e `apply` altera
+    só as linhas das janelas informadas, sem percorrer as demais.
+    """
+
+    def __init__(self, listbox, key: Optional[Callable[[int], Any]] = None):
+        self.listbox = listbox
+        self.key = key
+        self.rows: List[int] = []  # hwnd de cada linha, na ordem do Listbox
+        self.keys: List[Any] = []  # chave de cada linha, na mesma ordem (só com `key`)
+        self.key_of: Dict[int, Any] = {}  # hwnd -> chave (só com `key`)
+        self.labels: Dict[int, str] = {}  # hwnd -> texto exibido
+        self.last_stats = {'added': 0, 'removed': 0, 'retitled': 0, 'touched': 0, 'rows': 0}
+        self.total_touched = 0
+        self.rebuilds = 0
+        self.ticks = 0
+
+    def hwnd_at(self, index: int) -> Optional[int]:
+        """Obter o hwnd exibido em uma linha"""
+        if 0 <= index < len(self.rows):
+            return self.rows[index]
+        return None
+
+    def index_of(self, hwnd: int) -> Optional[int]:
+        """Obter a linha em que um hwnd está exibido"""
+        if hwnd not in self.labels:
+            return None
+        if self.key is None:
+            return self.rows.index(hwnd)
+        return bisect.bisect_left(self.keys, self.key_of[hwnd])
+
+    def reconcile(self, entries: Union[Mapping[int, str], Iterable[Tuple[int, str]]]) -> dict:
+        """Aplicar ao Listbox a diferença entre o snapshot anterior e `entries`
+
+        `entries` é a lista desejada de pares (hwnd, texto) na ordem preferida.
+        Janelas novas são inseridas logo após a janela que as precede em
+        `entries`; janelas existentes não são reordenadas. Com `key`, a ordem
+        de `entries` não importa: cada janela nova vai para a posição da sua
+        chave, e o custo é proporcional às linhas atuais mais `entries`.
+        """
+        desired = dict(entries)
+        if self.key is not None:
+            removed = [hwnd for hwnd in self.rows if hwnd not in desired]
+            return self.apply(desired, removed)
+
+        entries = list(desired.items())
+        removed = [hwnd for hwnd in self.rows if hwnd not in desired]
+        retitled = {hwnd for hwnd in self.rows
+                    if hwnd in desired and desired[hwnd] != self.labels[hwnd]}
+        added = {hwnd for hwnd, _ in entries if hwnd not in self.labels}
+
+        # Remoções de baixo para cima para não invalidar os índices restantes
+        if removed:
+            removed_set = set(removed)
+            for index in range(len(self.rows) - 1, -1, -1):
+                hwnd = self.rows[index]
+                if hwnd in removed_set:
+                    self.listbox.delete(index)
+                    del self.labels[hwnd]
+            self.rows = [hwnd for hwnd in self.rows if hwnd not in removed_set]
+
+        # Montar a ordem final: cada janela nova fica ancorada à anterior que já existe
+        if added:
+            anchored: Dict[Optional[int], List[int]] = {}
+            anchor = None
+            for hwnd, _ in entries:
+                if hwnd in added:
+                    anchored.setdefault(anchor, []).append(hwnd)
+                else:
+                    anchor = hwnd
+            final_rows = list(anchored.get(None, []))
+            for hwnd in self.rows:
+                final_rows.append(hwnd)
+                final_rows.extend(anchored.get(hwnd, []))
+
+            for index, hwnd in enumerate(final_rows):
+                if hwnd in added:
+                    self.listbox.insert(index, desired[hwnd])
+                    self.labels[hwnd] = desired[hwnd]
+            self.rows = final_rows
+
+        # Títulos alterados: substituir a linha no mesmo índice, mantendo a seleção
+        if retitled:
+            selected = set(self.listbox.curselection())
+            for index, hwnd in enumerate(self.rows):
+                if hwnd in retitled:
+                    self.listbox.delete(index)
+                    self.listbox.insert(index, desired[hwnd])
+                    self.labels[hwnd] = desired[hwnd]
+                    if index in selected:
+                        self.listbox.selection_set(index)
+
+        return self._record(len(added), len(removed), len(retitled))
+
+    def apply(self, upserts: Mapping[int, str], removed: Iterable[int] = ()) -> dict:
+        """Alterar só as linhas informadas: incluir ou retitular `upserts` e retirar `removed`
+
+        Hwnds de `removed` que não estão na lista são ignorados. Sem `key`,
+        janelas novas vão para o fim. Quando a mudança atinge boa parte da
+        lista, ela é remontada de uma vez em vez de linha por linha.
+        """
+        removed = [hwnd for hwnd in removed if hwnd in self.labels and hwnd not in upserts]
+        added = [hwnd for hwnd in upserts if hwnd not in self.labels]
+        retitled = [hwnd for hwnd, label in upserts.items() if hwnd in self.labels and self.labels[hwnd] != label]
+        changes = len(removed) + len(added) + len(retitled)
+        if not changes:
+            return self._record(0, 0, 0)
+
+        if self.key is not None and changes > max(64, len(self.rows) // 4):
+            desired = dict(zip(self.rows, map(self.labels.__getitem__, self.rows)))
+            for hwnd in removed:
+                del desired[hwnd]
+            desired.update(upserts)
+            self._rebuild(desired)
+            return self._record(len(added), len(removed), len(retitled))
+
+        for hwnd in removed:
+            index = self.index_of(hwnd)
+            self.listbox.delete(index)
+            del self.rows[index]
+            del self.labels[hwnd]
+            if self.key is not None:
+                del self.keys[index]
+                del self.key_of[hwnd]
+        if retitled:
+            selected = set(self.listbox.curselection())
+            for hwnd in retitled:
+                index = self.index_of(hwnd)
+                self.listbox.delete(index)
+                self.listbox.insert(index, upserts[hwnd])
+                self.labels[hwnd] = upserts[hwnd]
+                if index in selected:
+                    self.listbox.selection_set(index)
+        for hwnd in added:
+            if self.key is None:
+                index = len(self.rows)
+            else:
+                key = self.key_of[hwnd] = self.key(hwnd)
+                index = bisect.bisect_left(self.keys, key)
+                self.keys.insert(index, key)
+            self.rows.insert(index, hwnd)
+            self.labels[hwnd] = upserts[hwnd]
+            self.listbox.insert(index, upserts[hwnd])
+        return self._record(len(added), len(removed), len(retitled))
+
+    def _rebuild(self, desired: Dict[int, str]):
+        """Remontar a lista inteira na ordem das chaves, mantendo a seleção"""
+        selected = {self.rows[index] for index in self.listbox.curselection() if index < len(self.rows)}
+        key_of = {hwnd: self.key_of[hwnd] if hwnd in self.key_of else self.key(hwnd) for hwnd in desired}
+        self.rows = sorted(desired, key=key_of.__getitem__)
+        self.keys = [key_of[hwnd] for hwnd in self.rows]
+        self.key_of = key_of
+        self.labels = desired
+        self.listbox.delete(0, 'end')
+        self.listbox.insert('end', *map(desired.__getitem__, self.rows))  # Uma só inserção
+        for index, hwnd in enumerate(self.rows):
+            if hwnd in selected:
+                self.listbox.selection_set(index)
+        self.rebuilds += 1
+
+    def _record(self, added: int, removed: int, retitled: int) -> dict:
+        touched = added + removed + retitled
+        self.last_stats = {
+            'added': added,
+            'removed': removed,
+            'retitled': retitled,
+            'touched': touched,
+            'rows': len(self.rows)
+        }
+        self.total_touched += touched
+        self.ticks += 1
+        return self.last_stats
+
+    def clear(self):
+        """Remover todas as linhas"""
+        self.listbox.delete(0, 'end')
+        self.rows = []
+        self.keys = []
+        self.key_of = {}
+        self.labels = {}
@@ -0,0 +1,207 @@
+import bisect
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+# Limites superiores dos intervalos dos histogramas, em milissegundos
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+class Histogram:
+    """Distribuição de durações em intervalos fixos (escala aproximadamente logarítmica)"""
+    __slots__ = ('counts', 'count', 'total', 'min', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)  # o último intervalo não tem limite
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+
+    def observe(self, ms: float):
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms < self.min:
+            self.min = ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, fraction: float) -> float:
+        """Limite superior do intervalo que contém o percentil (o máximo, no último)"""
+        target = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return min(BUCKETS_MS[index], self.max) if index < len(BUCKETS_MS) else self.max
+        return self.max
+
+    def to_dict(self) -> dict:
+        if not self.count:
+            return {'count': 0}
+        return {'count': self.count, 'total_ms': self.total, 'mean_ms': self.total / self.count,
+                'min_ms': self.min, 'max_ms': self.max, 'p50_ms': self.percentile(0.5),
+                'p99_ms': self.percentile(0.99),
+                'buckets': {('+inf' if index == len(BUCKETS_MS) else str(BUCKETS_MS[index])): count
+                            for index, count in enumerate(self.counts) if count}}
+
+
+def latency_stats(samples: Iterable[float]) -> dict:
+    """Resumo de latências exatas (em segundos), em milissegundos"""
+    samples = sorted(samples)
+    if not samples:
+        return {'samples': 0, 'mean_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0}
+    return {
+        'samples': len(samples),
+        'mean_ms': sum(samples) / len(samples) * 1000,
+        'p99_ms': samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000,
+        'max_ms': samples[-1] * 1000
+    }
+
+
+class _Timer:
+    """Mede a duração de um bloco `with` e a registra nos histogramas indicados"""
+    __slots__ = ('metrics', 'names', 'start')
+
+    def __init__(self, metrics: 'Metrics', names):
+        self.metrics = metrics
+        self.names = names
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        ms = (time.perf_counter() - self.start) * 1000
+        for name in self.names:
+            self.metrics.observe(name, ms)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+    """Contadores e histogramas de duração do ciclo de atualização
+
+    Pode ser usado de várias threads. Contadores que outros componentes já
+    mantêm (cache de processos, escritas Win32) entram por `add_source`: são
+    lidos só quando um `snapshot` é pedido, sem custo nos caminhos medidos.
+    """
+
+    enabled = True
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        self.sources: Dict[str, Callable[[], dict]] = {}
+        self.started = clock()
+
+    def incr(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name: str, ms: float):
+        """Registrar uma duração, em milissegundos"""
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(ms)
+
+    def timer(self, *names: str):
+        """Medir um bloco `with` e registrar a duração em cada histograma de `names`"""
+        return _Timer(self, names)
+
+    def add_source(self, name: str, stats: Callable[[], dict]):
+        """Incluir no snapshot os contadores devolvidos por `stats`"""
+        self.sources[name] = stats
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            data = {'time': self.clock(), 'uptime': self.clock() - self.started,
+                    'counters': dict(self.counters),
+                    'histograms': {name: histogram.to_dict() for name, histogram in self.histograms.items()}}
+        for name, stats in self.sources.items():
+            data[name] = stats()
+        return data
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self.started = self.clock()
+
+    def dump(self, path: str):
+        """Acrescentar o snapshot atual como uma linha JSON ao arquivo `path`"""
+        import json
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(self.snapshot(), separators=(',', ':')) + "\n")
+
+
+class NullMetrics(Metrics):
+    """Métricas desligadas: todas as operações são vazias"""
+
+    enabled = False
+
+    def incr(self, name: str, amount: int = 1):
+        pass
+
+    def observe(self, name: str, ms: float):
+        pass
+
+    def timer(self, *names: str):
+        return _NULL_TIMER
+
+    def add_source(self, name: str, stats: Callable[[], dict]):
+        pass
+
+
+class MetricsDumper:
+    """Grava periodicamente os snapshots de `metrics` em um arquivo JSON lines"""
+
+    def __init__(self, metrics: Metrics, path: str, interval: float = 60.0):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.dumps = 0
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="MetricsDumper", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.dump()
+
+    def dump(self):
+        try:
+            self.metrics.dump(self.path)
+            self.dumps += 1
+        except OSError as e:
+            print(f"❌ Erro ao gravar métricas: {e}")
+
+    def stop(self):
+        """Parar e gravar um último snapshot"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(2)
+        self._thread = None
+        self.dump()
+
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Linha de comando do Controlador de Transparência
+
+Usa apenas o núcleo sem interface gráfica: não importa tkinter nem PIL e não
+monta nenhuma janela, então comandos como "deixar o notepad.exe em 70%"
+terminam em uma única enumeração. Com `--daemon`, o comando é enviado ao
+serviço residente (opacity_daemon.py) e custa só a ida e volta pelo canal.
+
+Exemplos:
+    python opacity_cli.py list
+    python opacity_cli.py apply 70 --exe notepad.exe
+    python opacity_cli.py reset --title "Sem título"
+    python opacity_cli.py reset-all
+    python opacity_cli.py reset-all --translucent
+    python opacity_cli.py --daemon unlayer-all
+    python opacity_cli.py watch --interval 1 --json
+    python opacity_cli.py --daemon apply 50 --title "YouTube"
+"""
+
+import argparse
+import json
+import sys
+import time
+from typing import Dict, List, Optional
+
+from opacity_commands import CommandError, CommandHandler
+from opacity_journal import OpacityJournal, default_journal_path
+from window_backend import FakeBackend, WindowBackend, default_backend
+from window_core import WindowCore
+
+
+def create_backend(args) -> WindowBackend:
+    if args.backend == 'fake':
+        backend = FakeBackend()
+        backend.populate(args.fake_windows)
+        return backend
+    return default_backend()
+
+
+# Comandos que escrevem nas janelas: sem o serviço, usam o diário da linha de comando
+JOURNALED_COMMANDS = ('apply', 'reset', 'reset-all')
+
+
+def journal_path(args) -> Optional[str]:
+    """Diário da linha de comando sem o serviço (nenhum com o backend simulado, salvo --journal)"""
+    if args.journal is None and args.backend != 'fake':  # Janelas simuladas não vão para o diário do usuário
+        return default_journal_path('cli')
+    return args.journal
+
+
+def create_core(args) -> WindowCore:
+    """Núcleo local; para comandos que escrevem, com o diário e as janelas readotadas dele
+
+    O diário guarda o estado original de cada janela alterada por execuções
+    anteriores, para que `reset` a devolva ao estilo de antes e `reset-all`
+    saiba quais janelas a linha de comando alterou.
+    """
+    core = WindowCore(create_backend(args))
+    path = journal_path(args)
+    if path and args.command in JOURNALED_COMMANDS:
+        core.journal = OpacityJournal(path)
+        core.recover_journal(adopt=True)
+    return core
+
+
+def output(args, data, text_lines: List[str]):
+    if args.json:
+        print(json.dumps(data, ensure_ascii=False))
+    else:
+        for line in text_lines:
+            print(line)
+
+
+def format_row(row: dict) -> str:
+    return f"{row['hwnd']:>10}  {row['opacity']:>3}%  {row['exe_name']:<20}  {row['title']}"
+
+
+def build_request(args) -> dict:
+    """Comando no formato do CommandHandler a partir das opções da linha de comando"""
+    request = {'cmd': args.command}
+    for key in ('hwnd', 'exe', 'title', 'class_name', 'opacity', 'all', 'translucent'):
+        value = getattr(args, key, None)
+        if value is not None and value is not False:
+            request[key] = value
+    return request
+
+
+def print_list(args, rows: List[dict]) -> int:
+    output(args, rows, [format_row(row) for row in rows] or ["Nenhuma janela encontrada"])
+    return 0
+
+
+def print_apply(args, data: dict) -> int:
+    summary = data['summary']
+    lines = [f"{item['status']:<9}  {item['hwnd']:>10}  {item['title']}" for item in data['results']]
+    lines.append(f"✅ {summary['windows']} janelas em {args.opacity}% "
+                 f"({summary['writes']} escritas, {summary['skipped']} sem mudança)")
+    output(args, data, lines)
+    return 0 if data['results'] else 1
+
+
+def print_reset(args, results: List[dict]) -> int:
+    lines = [f"🔄 {item['hwnd']:>10}  {item['title']}" for item in results]
+    lines.append(f"🔄 {len(results)} janelas resetadas")
+    output(args, results, lines)
+    return 0 if results or args.command in ('reset-all', 'unlayer-all') else 1
+
+
+def print_stats(args, stats: dict) -> int:
+    output(args, stats, [f"{key}: {value}" for key, value in stats.items()])
+    return 0
+
+
+def print_metrics(args, metrics: dict) -> int:
+    if not metrics['enabled']:
+        lines = ["Métricas desligadas; consulte o serviço com --daemon"]
+    else:
+        lines = [f"{name}: {value}" for name, value in sorted(metrics['counters'].items())]
+        for name, histogram in sorted(metrics['histograms'].items()):
+            if histogram['count']:
+                lines.append(f"{name}: {histogram['count']}x  média {histogram['mean_ms']:.2f} ms  "
+                             f"p99 {histogram['p99_ms']:.2f} ms  máx {histogram['max_ms']:.2f} ms")
+    output(args, metrics, lines)
+    return 0
+
+
+PRINTERS = {'list': print_list, 'apply': print_apply, 'reset': print_reset,
+            'reset-all': print_reset, 'unlayer-all': print_reset, 'stats': print_stats,
+            'metrics': print_metrics}
+
+
+def cmd_watch(core: WindowCore, args) -> int:
+    """Mostrar janelas abertas, fechadas e renomeadas até Ctrl+C (ou --count ciclos)"""
+    handler = CommandHandler(core)
+    previous: Dict[int, dict] = {}
+    tick = 0
+    try:
+        while args.count is None or tick < args.count:
+            current = core.scan_windows()
+            changes = []
+            for hwnd, window in current.items():
+                old = previous.get(hwnd)
+                if old is None:
+                    changes.append(('added', window))
+                elif old.title != window.title:
+                    changes.append(('retitled', window))
+            changes.extend(('removed', window) for hwnd, window in previous.items() if hwnd not in current)
+            if tick == 0 and not args.initial:
+                changes = []
+            for change, window in changes:
+                row = handler.row(window)
+                if args.json:
+                    row['change'] = change
+                    row['time'] = time.time()
+                    print(json.dumps(row, ensure_ascii=False), flush=True)
+                else:
+                    symbol = {'added': '+', 'removed': '-', 'retitled': '~'}[change]
+                    print(f"{symbol} {format_row(row)}", flush=True)
+            previous = current
+            tick += 1
+            if args.count is None or tick < args.count:
+                time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def add_selectors(parser: argparse.ArgumentParser):
+    parser.add_argument('--hwnd', type=lambda value: int(value, 0), action='append',
+                        help="handle da janela (pode repetir)")
+    parser.add_argument('--exe', help="nome do executável, por exemplo notepad.exe")
+    parser.add_argument('--title', help="expressão regular buscada no título")
+    parser.add_argument('--class', dest='class_name', help="classe da janela")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='opacity_cli', description="Controlador de Transparência - linha de comando")
+    parser.add_argument('--json', action='store_true', help="saída em JSON")
+    parser.add_argument('--daemon', action='store_true', help="enviar o comando ao serviço em execução")
+    parser.add_argument('--address', help="endereço do serviço (padrão: o do usuário atual)")
+    parser.add_argument('--journal', metavar='ARQUIVO',
+                        help="diário das janelas alteradas sem o serviço (padrão: cli.jsonl junto aos perfis)")
+    parser.add_argument('--backend', choices=['win32', 'fake'], default='win32', help=argparse.SUPPRESS)
+    parser.add_argument('--fake-windows', type=int, default=50, help=argparse.SUPPRESS)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    list_parser = commands.add_parser('list', help="listar janelas")
+    add_selectors(list_parser)
+    list_parser.add_argument('--all', action='store_true', help="incluir processos não .exe")
+
+    apply_parser = commands.add_parser('apply', help="aplicar transparência")
+    apply_parser.add_argument('opacity', type=int, help="opacidade de 0 a 100")
+    add_selectors(apply_parser)
+
+    reset_parser = commands.add_parser('reset', help="resetar transparência das janelas selecionadas")
+    add_selectors(reset_parser)
+
+    reset_all_parser = commands.add_parser('reset-all',
+                                           help="resetar as janelas em que a ferramenta aplicou transparência")
+    reset_all_parser.add_argument('--translucent', action='store_true',
+                                  help="resetar toda janela com transparência, inclusive de outros programas")
+    commands.add_parser('unlayer-all',
+                        help="devolver o estilo original a todas as janelas alteradas pelo serviço (só com --daemon)")
+    commands.add_parser('stats', help="estatísticas de cache e escritas")
+    commands.add_parser('metrics', help="contadores e tempos do ciclo de atualização do serviço")
+
+    watch_parser = commands.add_parser('watch', help="acompanhar janelas abertas e fechadas")
+    watch_parser.add_argument('--interval', type=float, default=1.0, help="segundos entre verificações")
+    watch_parser.add_argument('--count', type=int, help="número de verificações (padrão: até Ctrl+C)")
+    watch_parser.add_argument('--initial', action='store_true', help="mostrar também as janelas já abertas")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Função principal"""
+    args = build_parser().parse_args(argv)
+    if args.command == 'watch':
+        if args.daemon:
+            print("O comando watch roda apenas localmente", file=sys.stderr)
+            return 2
+        return cmd_watch(WindowCore(create_backend(args)), args)
+    if args.command == 'unlayer-all' and not args.daemon:
+        # Só o serviço conhece as janelas apenas pré-visualizadas; o diário local cobre o reset-all
+        print("O comando unlayer-all roda apenas com --daemon; sem o serviço, use reset-all", file=sys.stderr)
+        return 2
+    if args.command == 'reset-all' and not args.daemon and not args.translucent and not journal_path(args):
+        # Sem o serviço nem o diário, este processo não sabe quais janelas a ferramenta alterou
+        print("Sem --daemon nem --journal, use reset-all --translucent (reseta toda janela com transparência)",
+              file=sys.stderr)
+        return 2
+
+    request = build_request(args)
+    try:
+        if args.daemon:
+            from opacity_daemon import DaemonClient
+            try:
+                client = DaemonClient(args.address)
+            except OSError:
+                print("❌ Serviço não encontrado; inicie com: python opacity_daemon.py", file=sys.stderr)
+                return 1
+            with client:
+                result = client.request(**request)
+        else:
+            core = create_core(args)
+            try:
+                result = CommandHandler(core).handle(request)
+            finally:
+                if core.journal is not None:
+                    core.journal.close()
+    except CommandError as e:
+        print(e, file=sys.stderr)
+        return 2
+    return PRINTERS[args.command](args, result)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
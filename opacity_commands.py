@@ -0,0 +1,148 @@
+import re
+import time
+from typing import Callable, Dict, List, Optional
+
+from opacity_rules import BatchOpacityEngine, OpacityRule
+from window_core import WindowCore
+from window_registry import WindowRecord
+
+
+class CommandError(ValueError):
+    """Comando inválido (parâmetro ausente ou fora do intervalo)"""
+
+
+def select_windows(windows, hwnd: Optional[List[int]] = None, exe: Optional[str] = None,
+                   title: Optional[str] = None, class_name: Optional[str] = None,
+                   get_class: Optional[Callable[[int], str]] = None) -> List[WindowRecord]:
+    """Janelas que casam com os filtros de hwnd, executável, título (regex) e classe"""
+    windows = list(windows)
+    if hwnd:
+        hwnds = set(hwnd)
+        windows = [window for window in windows if window.hwnd in hwnds]
+    if exe or title or class_name:
+        try:
+            rule = OpacityRule(100, exe=exe, title=title, class_name=class_name)
+        except re.error as e:
+            raise CommandError(f"Expressão regular inválida em --title: {e}")
+        windows = [window for window in windows
+                   if rule.matches(window, get_class(window.hwnd) if class_name else None)]
+    return windows
+
+
+class CommandHandler:
+    """Executa os comandos da linha de comando e do serviço sobre um WindowCore
+
+    Um comando é um dicionário com `cmd` e seus parâmetros (os mesmos nomes das
+    opções da linha de comando); o resultado é sempre serializável em JSON.
+    `snapshot` fornece as janelas atuais: uma enumeração nova na linha de
+    comando, ou o último snapshot mantido pelo serviço.
+    """
+
+    COMMANDS = ('ping', 'list', 'apply', 'reset', 'reset-all', 'unlayer-all', 'stats', 'metrics')
+
+    def __init__(self, core: WindowCore, snapshot: Optional[Callable[[], Dict[int, WindowRecord]]] = None):
+        self.core = core
+        self.snapshot = snapshot or core.scan_windows
+        self.engine = BatchOpacityEngine(core)
+        self.started = time.time()
+        self.handled = 0
+
+    def handle(self, request: dict):
+        command = request.get('cmd')
+        if command not in self.COMMANDS:
+            raise CommandError(f"Comando desconhecido: {command}")
+        self.handled += 1
+        return getattr(self, 'cmd_' + command.replace('-', '_'))(request)
+
+    def _select(self, request: dict) -> List[WindowRecord]:
+        windows = self.snapshot()
+        hwnds = request.get('hwnd')
+        if hwnds:
+            # Consulta direta no snapshot em vez de percorrer todas as janelas
+            windows = {hwnd: windows[hwnd] for hwnd in hwnds if hwnd in windows}
+        return select_windows(windows.values(), None, request.get('exe'), request.get('title'),
+                              request.get('class_name'), self.core.backend.get_class_name)
+
+    def _require_selector(self, request: dict):
+        if not any(request.get(key) for key in ('hwnd', 'exe', 'title', 'class_name')):
+            raise CommandError("Informe ao menos um filtro: --hwnd, --exe, --title ou --class")
+
+    def row(self, window: WindowRecord) -> dict:
+        """Dados de uma janela para exibição, incluindo a opacidade atual"""
+        _, alpha = self.core.opacity_state.known.get(window.hwnd, (0, None))
+        return {
+            'hwnd': window.hwnd,
+            'pid': window.pid,
+            'exe_name': window.exe_name,
+            'title': window.title,
+            'opacity': 100 if alpha is None else round(alpha / 255 * 100)
+        }
+
+    def _reset(self, windows: List[WindowRecord]) -> List[dict]:
+        results = []
+        for window in windows:
+            item = {'hwnd': window.hwnd, 'title': window.title, 'writes': 0, 'error': None}
+            try:
+                item['writes'] = self.core.reset_opacity(window.hwnd)
+            except Exception as e:
+                item['error'] = str(e)
+            results.append(item)
+        return results
+
+    def cmd_ping(self, request: dict) -> str:
+        return 'pong'
+
+    def cmd_list(self, request: dict) -> List[dict]:
+        windows = self.core.finalize_windows(self._select(request))
+        if not request.get('all'):
+            windows = [window for window in windows if window.is_exe]
+        return [self.row(window) for window in windows]
+
+    def cmd_apply(self, request: dict) -> dict:
+        self._require_selector(request)
+        opacity = request.get('opacity')
+        if not isinstance(opacity, int) or not 0 <= opacity <= 100:
+            raise CommandError("A opacidade deve estar entre 0 e 100")
+        rule = OpacityRule(opacity)
+        result = self.engine.apply_targets({window.hwnd: (window, rule) for window in self._select(request)})
+        return {'summary': result.summary(), 'results': result.results}
+
+    def cmd_reset(self, request: dict) -> List[dict]:
+        self._require_selector(request)
+        return self._reset(self._select(request))
+
+    def cmd_reset_all(self, request: dict) -> List[dict]:
+        """Resetar as janelas em que esta ferramenta aplicou transparência
+
+        Com `translucent`, reseta todas as janelas listáveis com transparência,
+        inclusive as deixadas assim por outros programas.
+        """
+        if request.get('translucent'):
+            known = self.core.opacity_state.known
+            windows = [window for window in self.snapshot().values()
+                       if known.get(window.hwnd, (0, None))[1] not in (None, 255)]
+        else:
+            windows = [window for window, _ in self.core.registry.applied_records()]
+        return self._reset(windows)
+
+    def cmd_unlayer_all(self, request: dict) -> List[dict]:
+        """Devolver o estilo original a todas as janelas em que este processo escreveu"""
+        results = []
+        for hwnd, writes in self.core.unlayer_all().items():
+            window = self.core.registry.get(hwnd)
+            results.append({'hwnd': hwnd, 'title': window.title if window else '', 'writes': writes, 'error': None})
+        return results
+
+    def cmd_stats(self, request: dict) -> dict:
+        return {
+            'uptime': time.time() - self.started,
+            'handled': self.handled,
+            'applied_windows': len(self.core.registry.applied),
+            'evicted_windows': self.core.evicted,
+            'known_windows': len(self.core.registry),
+            'process_cache': self.core.process_cache.stats(),
+            'opacity_state': self.core.opacity_state.stats()
+        }
+
+    def cmd_metrics(self, request: dict) -> dict:
+        return dict(self.core.metrics.snapshot(), enabled=self.core.metrics.enabled)
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Serviço residente do Controlador de Transparência
+
+Mantém o núcleo (estado de transparência, caches e snapshot de janelas)
+vivo em segundo plano e atende clientes locais por um canal IPC: pipe nomeado
+no Windows, socket Unix nos demais sistemas. Cada mensagem é um objeto JSON
+compacto enviado com `send_bytes`; a resposta é `{"ok": true, "result": ...}`
+ou `{"ok": false, "error": "..."}`.
+
+Exemplos:
+    python opacity_daemon.py
+    python opacity_cli.py --daemon apply 70 --exe notepad.exe
+    python opacity_daemon.py --stop
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Dict, List, Optional
+
+from metrics import Metrics, MetricsDumper
+from opacity_commands import CommandError, CommandHandler
+from opacity_journal import OpacityJournal, default_journal_path
+from window_backend import FakeBackend, WindowBackend
+from window_core import WindowCore
+from window_registry import WindowRecord
+
+
+def default_address() -> str:
+    """Endereço padrão do canal, um por usuário"""
+    if sys.platform == 'win32':
+        return r'\\.\pipe\OpacityWindow-' + os.environ.get('USERNAME', 'user')
+    return os.path.join(tempfile.gettempdir(), f'opacity-window-{os.getuid()}.sock')
+
+
+def encode(message) -> bytes:
+    return json.dumps(message, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def decode(data: bytes):
+    return json.loads(data.decode('utf-8'))
+
+
+class OpacityDaemon:
+    """Serviço que possui o estado das janelas e atende comandos pelo canal IPC
+
+    Uma thread aceita conexões e cada cliente ganha sua própria thread (uma
+    conexão pode enviar vários comandos). A enumeração roda periodicamente em
+    outra thread; os comandos usam o último snapshot, então um comando custa
+    apenas a ida e volta pelo canal. Enumeração e comandos são serializados
+    por um único lock. As métricas ficam sempre ligadas (comando `metrics`) e,
+    com `metrics_path`, são gravadas a cada `metrics_interval` segundos.
+
+    Com `journal_path`, as janelas alteradas vão para um diário: ao iniciar,
+    as que uma execução interrompida deixou transparentes são readotadas.
+    """
+
+    def __init__(self, backend: Optional[WindowBackend] = None, address: Optional[str] = None,
+                 refresh_interval: float = 3.0, metrics_path: Optional[str] = None,
+                 metrics_interval: float = 60.0, journal_path: Optional[str] = None):
+        self.metrics = Metrics()
+        self.core = WindowCore(backend, metrics=self.metrics)
+        if journal_path:
+            self.core.journal = OpacityJournal(journal_path)
+        self.recovered: Optional[dict] = None  # Resultado da recuperação do diário em `start`
+        self.dumper = MetricsDumper(self.metrics, metrics_path, metrics_interval) if metrics_path else None
+        self.address = address or default_address()
+        self.refresh_interval = refresh_interval
+        self.handler = CommandHandler(self.core, self.snapshot)
+        self._lock = threading.Lock()
+        self._windows: Dict[int, WindowRecord] = {}
+        self._listener: Optional[Listener] = None
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self.connections = 0
+        self.refreshes = 0
+
+    def snapshot(self) -> Dict[int, WindowRecord]:
+        return self._windows
+
+    def refresh(self):
+        """Enumerar as janelas agora"""
+        with self._lock, self.metrics.timer('daemon.refresh'):
+            self._windows = self.core.scan_windows()
+            self.core.registry.update(self._windows.values())
+            self.core.sweep_applied()  # Janelas aplicadas que foram fechadas ou reaproveitadas
+            self.refreshes += 1
+
+    def _check_address(self):
+        """Recusar iniciar se outro serviço já atende no endereço; remover socket órfão"""
+        try:
+            Client(self.address).close()
+        except OSError:
+            if sys.platform != 'win32' and os.path.exists(self.address):
+                os.unlink(self.address)
+            return
+        raise RuntimeError(f"Já existe um serviço em {self.address}")
+
+    def start(self):
+        """Abrir o canal e iniciar as threads de atendimento e de atualização"""
+        self._check_address()
+        if sys.platform == 'win32':
+            self._listener = Listener(self.address)
+        else:
+            # Socket criado já restrito ao usuário, sem intervalo em que outros possam conectar
+            umask = os.umask(0o177)
+            try:
+                self._listener = Listener(self.address)
+            finally:
+                os.umask(umask)
+        if self.core.journal is not None:
+            self.recovered = self.core.recover_journal(adopt=True)
+        self.refresh()
+        self._stop.clear()
+        for target, name in ((self._accept_loop, "DaemonAccept"), (self._refresh_loop, "DaemonRefresh")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        if self.dumper is not None:
+            self.dumper.start()
+
+    def serve_forever(self):
+        """Atender até Ctrl+C ou o comando `shutdown`"""
+        if self._listener is None:
+            self.start()
+        try:
+            while not self._stop.wait(1.0):
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        """Fechar o canal e encerrar as threads"""
+        if self._listener is None:
+            return
+        self._stop.set()
+        # Acordar o accept bloqueado com uma conexão própria
+        try:
+            Client(self.address).close()
+        except OSError:
+            pass
+        for thread in self._threads:
+            thread.join(2)
+        self._threads = []
+        self._listener.close()
+        self._listener = None
+        if self.dumper is not None:
+            self.dumper.stop()
+        if self.core.journal is not None:
+            self.core.journal.close()
+
+    def _accept_loop(self):
+        while not self._stop.is_set():
+            try:
+                conn = self._listener.accept()
+            except OSError:
+                if self._stop.is_set():
+                    break
+                continue
+            if self._stop.is_set():
+                conn.close()
+                break
+            self.connections += 1
+            threading.Thread(target=self._serve_connection, args=(conn,), name="DaemonClient", daemon=True).start()
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Erro ao atualizar janelas: {e}")
+
+    def _serve_connection(self, conn: Connection):
+        with conn:
+            while not self._stop.is_set():
+                try:
+                    data = conn.recv_bytes()
+                except (EOFError, OSError):
+                    break
+                request = None
+                try:
+                    request = decode(data)
+                    if request.get('cmd') == 'shutdown':
+                        response = {'ok': True, 'result': 'bye'}
+                    else:
+                        with self._lock, self.metrics.timer('daemon.command'):
+                            response = {'ok': True, 'result': self.handler.handle(request)}
+                        self.metrics.incr('daemon.requests')
+                except CommandError as e:
+                    response = {'ok': False, 'error': str(e)}
+                except Exception as e:
+                    response = {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+                try:
+                    conn.send_bytes(encode(response))
+                except OSError:
+                    break
+                if request is not None and request.get('cmd') == 'shutdown':
+                    self._stop.set()
+                    break
+
+
+class DaemonClient:
+    """Conexão com o serviço; não deve ser compartilhada entre threads"""
+
+    def __init__(self, address: Optional[str] = None):
+        self.address = address or default_address()
+        self._conn = Client(self.address)
+
+    def request(self, cmd: str, **params):
+        """Enviar um comando e devolver o resultado (CommandError se o serviço recusar)"""
+        params['cmd'] = cmd
+        self._conn.send_bytes(encode(params))
+        response = decode(self._conn.recv_bytes())
+        if not response['ok']:
+            raise CommandError(response['error'])
+        return response['result']
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Função principal"""
+    parser = argparse.ArgumentParser(prog='opacity_daemon', description="Controlador de Transparência - serviço")
+    parser.add_argument('--address', help="pipe nomeado ou socket Unix (padrão: um por usuário)")
+    parser.add_argument('--refresh-interval', type=float, default=3.0, help="segundos entre enumerações")
+    parser.add_argument('--stop', action='store_true', help="encerrar o serviço em execução")
+    parser.add_argument('--metrics', metavar='ARQUIVO', help="gravar as métricas periodicamente (JSON lines)")
+    parser.add_argument('--metrics-interval', type=float, default=60.0, help="segundos entre gravações de métricas")
+    parser.add_argument('--journal', metavar='ARQUIVO',
+                        help="diário das janelas alteradas (padrão: daemon.jsonl junto aos perfis)")
+    parser.add_argument('--backend', choices=['win32', 'fake'], default='win32', help=argparse.SUPPRESS)
+    parser.add_argument('--fake-windows', type=int, default=50, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.stop:
+        try:
+            with DaemonClient(args.address) as client:
+                client.request('shutdown')
+        except OSError:
+            print("❌ Nenhum serviço em execução", file=sys.stderr)
+            return 1
+        print("🛑 Serviço encerrado")
+        return 0
+
+    backend = None
+    journal_path = args.journal or default_journal_path('daemon')
+    if args.backend == 'fake':
+        backend = FakeBackend()
+        backend.populate(args.fake_windows)
+        journal_path = args.journal  # Janelas simuladas não vão para o diário do usuário
+    daemon = OpacityDaemon(backend, args.address, args.refresh_interval, args.metrics, args.metrics_interval,
+                           journal_path)
+    try:
+        daemon.start()
+    except RuntimeError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    print(f"🟢 Serviço ouvindo em {daemon.address}")
+    if daemon.recovered and daemon.recovered['adopted']:
+        print(f"♻️ {daemon.recovered['adopted']} janelas transparentes readotadas do diário")
+    daemon.serve_forever()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,254 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+
+def default_journal_path(name: str = 'journal') -> str:
+    """Local padrão do diário de janelas aplicadas (%APPDATA% no Windows)
+
+    Interface, serviço e linha de comando usam nomes diferentes: cada
+    processo reescreve o próprio arquivo ao compactá-lo.
+    """
+    base = os.environ.get('APPDATA') or os.path.join(os.path.expanduser('~'), '.config')
+    return os.path.join(base, 'OpacityWindow', f'{name}.jsonl')
+
+
+class JournalEntry:
+    """Janela registrada no diário: identidade e estado original antes da primeira escrita"""
+    __slots__ = ('hwnd', 'pid', 'class_name', 'exstyle', 'alpha')
+
+    def __init__(self, hwnd: int, pid: int, class_name: str, exstyle: int, alpha: Optional[int]):
+        self.hwnd = hwnd
+        self.pid = pid
+        self.class_name = class_name
+        self.exstyle = exstyle
+        self.alpha = alpha
+
+    def to_dict(self) -> dict:
+        return {'op': 'apply', 'hwnd': self.hwnd, 'pid': self.pid, 'class': self.class_name,
+                'exstyle': self.exstyle, 'alpha': self.alpha}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'JournalEntry':
+        return cls(data['hwnd'], data['pid'], data['class'], data['exstyle'], data['alpha'])
+
+
+class OpacityJournal:
+    """Diário em disco (write-ahead) das janelas que receberam transparência
+
+    Cada janela é registrada uma única vez, antes da primeira escrita nela,
+    com o PID, a classe e o estilo estendido e o alpha originais. `record`
+    só acumula as entradas; `commit` as entrega de uma vez ao sistema
+    operacional (write + flush) e deve ser chamado antes das escritas no
+    Win32: um processo morto logo depois não perde a entrada. O fsync, que
+    só protege contra a queda da máquina (quando as janelas também deixam de
+    existir), fica para uma thread de gravação que espera `sync_delay`
+    segundos e junta num único fsync os commits desse intervalo; `sync` e
+    `close` o fazem na hora. As remoções (`discard`) vão para o arquivo no
+    próximo `commit`, `compact` ou `close`: se se perderem, a recuperação
+    encontra a janela já restaurada e não muda nada.
+
+    O arquivo é JSON lines; uma última linha incompleta (processo morto no
+    meio da gravação) é ignorada em `load`. Quando as linhas passam de
+    `compact_factor` vezes as janelas registradas (e de `compact_min`), a
+    thread de gravação reescreve o arquivo só com elas; quem chamou `commit`
+    não espera pelo disco.
+    """
+
+    def __init__(self, path: Optional[str] = None, compact_factor: int = 4, compact_min: int = 256,
+                 sync_delay: float = 0.05):
+        self.path = path or default_journal_path()
+        self.compact_factor = compact_factor
+        self.compact_min = compact_min
+        self.sync_delay = sync_delay
+        self.entries: Dict[int, JournalEntry] = {}
+        self._lock = threading.Lock()
+        self._sync_requested = threading.Condition(self._lock)
+        self._sync_thread: Optional[threading.Thread] = None
+        self._closing = False
+        self._file = None
+        self._pending = []  # Linhas ainda não gravadas
+        self._durable = 0  # Quantas das linhas pendentes são janelas novas
+        self._unsynced = False  # Janelas novas já no arquivo, ainda sem fsync
+        self._compact_requested = False
+        self._tail: Optional[list] = None  # Linhas gravadas durante uma compactação em andamento
+        self.lines = 0  # Linhas no arquivo
+        self.commits = 0
+        self.fsyncs = 0
+        self.compactions = 0
+        self.load_time = 0.0
+
+    def __contains__(self, hwnd: int) -> bool:
+        return hwnd in self.entries
+
+    def load(self) -> Dict[int, JournalEntry]:
+        """Ler o diário deixado pela execução anterior (arquivo inexistente = vazio)"""
+        start = time.perf_counter()
+        entries = {}
+        lines = 0
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        data = json.loads(line)
+                        if data['op'] == 'apply':
+                            entries[data['hwnd']] = JournalEntry.from_dict(data)
+                        else:
+                            entries.pop(data['hwnd'], None)
+                    except (ValueError, KeyError):
+                        continue  # Linha incompleta ou corrompida
+                    lines += 1
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            self.entries = entries
+            self.lines = lines
+        self.load_time = time.perf_counter() - start
+        return entries
+
+    def record(self, entry: JournalEntry):
+        """Registrar uma janela antes da primeira escrita (gravado no próximo `commit`)"""
+        with self._lock:
+            if entry.hwnd in self.entries:
+                return
+            self.entries[entry.hwnd] = entry
+            self._pending.append(json.dumps(entry.to_dict(), separators=(',', ':')))
+            self._durable += 1
+
+    def discard(self, hwnds: Iterable[int]):
+        """Tirar janelas do diário (resetadas ou fechadas)"""
+        with self._lock:
+            for hwnd in hwnds:
+                if self.entries.pop(hwnd, None) is not None:
+                    self._pending.append(f'{{"op":"reset","hwnd":{hwnd}}}')
+
+    def commit(self):
+        """Gravar as entradas pendentes; fsync e compactação ficam para a thread de gravação"""
+        with self._lock:
+            if self._durable:
+                self.commits += 1
+                self._unsynced = True
+            self._write(sync=False)
+            if self._tail is None and self.lines > max(self.compact_min, self.compact_factor * len(self.entries)):
+                self._compact_requested = True
+            if self._unsynced or self._compact_requested:
+                if self._sync_thread is None:
+                    self._sync_thread = threading.Thread(target=self._sync_loop, name="JournalSync", daemon=True)
+                    self._sync_thread.start()
+                self._sync_requested.notify()
+
+    def sync(self):
+        """Fazer agora o fsync das janelas novas já gravadas (sem segurar o lock durante o fsync)"""
+        with self._lock:
+            if not self._unsynced or self._file is None:
+                return
+            self._unsynced = False
+            fd = os.dup(self._file.fileno())  # `compact` pode fechar o arquivo enquanto isso
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        with self._lock:
+            self.fsyncs += 1
+
+    def compact(self):
+        """Reescrever o arquivo só com as janelas registradas, de forma atômica
+
+        O arquivo novo é gravado e sincronizado sem segurar o lock; as linhas
+        gravadas enquanto isso vão para o fim dele antes da troca.
+        """
+        with self._lock:
+            if self._tail is not None:
+                return  # Já em andamento em outra thread
+            self._compact_requested = False
+            self._write(sync=False)
+            lines = [json.dumps(entry.to_dict(), separators=(',', ':')) for entry in self.entries.values()]
+            self._tail = []
+        temp_path = self.path + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.writelines(line + "\n" for line in lines)
+                f.flush()
+                os.fsync(f.fileno())
+            with self._lock:
+                self._write(sync=False)
+                tail, self._tail = self._tail, None
+                if tail:
+                    with open(temp_path, 'a', encoding='utf-8') as f:
+                        f.writelines(line + "\n" for line in tail)
+                # No Windows, nenhum dos dois arquivos pode estar aberto na troca
+                self._close_file()
+                os.replace(temp_path, self.path)
+                if tail:
+                    self._file = open(self.path, 'a', encoding='utf-8')  # Para o próximo `sync`
+                self.fsyncs += 1
+                self.compactions += 1
+                self.lines = len(lines) + len(tail)
+                self._unsynced = bool(tail)
+        finally:
+            with self._lock:
+                self._tail = None
+
+    def close(self):
+        """Parar a thread de gravação, gravar o que estiver pendente com fsync e fechar o arquivo"""
+        with self._lock:
+            self._closing = True
+            self._sync_requested.notify()
+            thread, self._sync_thread = self._sync_thread, None
+        if thread is not None:
+            thread.join()
+        with self._lock:
+            self._closing = False
+            compact = self._compact_requested
+        if compact:
+            self.compact()  # Pedida por um `commit` que a thread não chegou a atender
+        with self._lock:
+            self._unsynced = True  # Inclusive as remoções
+            self._write(sync=True)
+            self._close_file()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'entries': len(self.entries), 'lines': self.lines, 'commits': self.commits,
+                    'fsyncs': self.fsyncs, 'compactions': self.compactions}
+
+    def _sync_loop(self):
+        while True:
+            with self._lock:
+                while not self._unsynced and not self._compact_requested and not self._closing:
+                    self._sync_requested.wait()
+                if self._closing:
+                    return
+                compact = self._compact_requested
+            if compact:
+                self.compact()  # Já inclui o fsync do que estava gravado
+                continue
+            time.sleep(self.sync_delay)  # Os commits deste intervalo entram no mesmo fsync
+            self.sync()
+
+    # _write e _close_file devem ser chamados com o lock adquirido
+
+    def _write(self, sync: bool):
+        if self._pending:
+            if self._file is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write("\n".join(self._pending) + "\n")
+            self._file.flush()
+            self.lines += len(self._pending)
+            if self._tail is not None:
+                self._tail.extend(self._pending)
+            self._pending = []
+            self._durable = 0
+        if sync and self._unsynced and self._file is not None:
+            os.fsync(self._file.fileno())
+            self.fsyncs += 1
+            self._unsynced = False
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,164 @@
+import json
+import os
+import time
+from typing import Dict, Iterable, List, Mapping, Optional
+
+from opacity_rules import BatchOpacityEngine, BatchResult, OpacityRule
+from window_core import WindowCore
+from window_registry import WindowRecord
+
+
+def default_profiles_path() -> str:
+    """Local padrão do arquivo de perfis (%APPDATA% no Windows)"""
+    base = os.environ.get('APPDATA') or os.path.join(os.path.expanduser('~'), '.config')
+    return os.path.join(base, 'OpacityWindow', 'profiles.json')
+
+
+class ProfileStore:
+    """Perfis de transparência gravados em disco (JSON)
+
+    Cada perfil é uma OpacityRule com nome; a ordem do arquivo define a
+    prioridade quando mais de um perfil casa com a mesma janela.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or default_profiles_path()
+        self.profiles: List[OpacityRule] = []
+        self.load_time = 0.0
+
+    def load(self) -> List[OpacityRule]:
+        """Ler os perfis do disco (arquivo inexistente = nenhum perfil)"""
+        start = time.perf_counter()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.profiles = [OpacityRule.from_dict(item) for item in data.get('profiles', [])]
+        except FileNotFoundError:
+            self.profiles = []
+        self.load_time = time.perf_counter() - start
+        return self.profiles
+
+    def save(self):
+        """Gravar os perfis de forma atômica"""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        data = {'version': self.VERSION, 'profiles': [profile.to_dict() for profile in self.profiles]}
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.path)
+
+    def set_profile(self, profile: OpacityRule):
+        """Adicionar um perfil, substituindo outro com o mesmo nome"""
+        self.profiles = [p for p in self.profiles if p.name is None or p.name != profile.name]
+        self.profiles.append(profile)
+
+    def remove_profile(self, name: str) -> bool:
+        before = len(self.profiles)
+        self.profiles = [p for p in self.profiles if p.name != name]
+        return len(self.profiles) != before
+
+
+class ProfileMatcher:
+    """Índice pré-compilado para encontrar o perfil de uma janela
+
+    Perfis com `exe` ficam em um dicionário por nome do executável; a busca
+    começa por essa consulta de hash e só então avalia títulos (regex) e
+    classes, e apenas dos perfis daquele executável mais os genéricos. A lista
+    de candidatos de cada executável é montada uma única vez.
+    """
+
+    def __init__(self, profiles: Iterable[OpacityRule]):
+        self.profiles = list(profiles)
+        self._by_exe: Dict[str, List[tuple]] = {}
+        self._generic: List[tuple] = []
+        for order, profile in enumerate(self.profiles):
+            if profile.exe is not None:
+                self._by_exe.setdefault(profile.exe, []).append((order, profile))
+            else:
+                self._generic.append((order, profile))
+        self._candidates: Dict[str, List[OpacityRule]] = {}
+
+    def candidates(self, exe_name: str) -> List[OpacityRule]:
+        """Perfis que podem casar com janelas de um executável, em ordem de prioridade"""
+        exe_name = exe_name.lower()
+        candidates = self._candidates.get(exe_name)
+        if candidates is None:
+            merged = sorted(self._by_exe.get(exe_name, []) + self._generic, key=lambda item: item[0])
+            candidates = self._candidates[exe_name] = [profile for _, profile in merged]
+        return candidates
+
+    def match(self, window: WindowRecord) -> Optional[OpacityRule]:
+        """Primeiro perfil que casa com a janela (a classe é a lida na enumeração)"""
+        for profile in self.candidates(window.exe_name or ''):
+            if profile.matches(window, window.class_name):
+                return profile
+        return None
+
+
+class ProfileAutoApplier:
+    """Aplica os perfis automaticamente às janelas que aparecem
+
+    Só janelas ainda não vistas são avaliadas a cada snapshot, então o custo de
+    uma atualização sem janelas novas é apenas a comparação de conjuntos (ou,
+    com `apply_changes`, proporcional às janelas que mudaram).
+    """
+
+    def __init__(self, core: WindowCore, matcher: ProfileMatcher):
+        self.core = core
+        self.matcher = matcher
+        self.engine = BatchOpacityEngine(core)
+        self.seen: set = set()
+        self.applied = 0
+        self.first_apply_time: Optional[float] = None
+
+    def set_matcher(self, matcher: ProfileMatcher, changed: Iterable[OpacityRule] = (),
+                    windows: Iterable[WindowRecord] = ()) -> Optional[BatchResult]:
+        """Trocar os perfis, reaplicando na hora só as janelas que casam com os perfis alterados
+
+        `changed` são os perfis criados ou alterados e `windows`, as janelas
+        conhecidas (o registro). As demais janelas já vistas não são
+        reavaliadas, então salvar um perfil não desfaz um reset manual de
+        outra janela.
+        """
+        self.matcher = matcher
+        changed = ProfileMatcher(changed)
+        if not changed.profiles:
+            return None
+        affected = {window.hwnd: window for window in windows
+                    if window.hwnd in self.seen
+                    and changed.match(window) is not None}
+        self.seen.difference_update(affected)
+        return self.apply_changes(affected)
+
+    def apply_new(self, windows: Iterable[WindowRecord]) -> Optional[BatchResult]:
+        """Aplicar perfis às janelas novas do snapshot"""
+        current = {window.hwnd: window for window in windows}
+        changes: Dict[int, Optional[WindowRecord]] = dict.fromkeys(self.seen - current.keys())
+        changes.update((hwnd, window) for hwnd, window in current.items() if hwnd not in self.seen)
+        return self.apply_changes(changes)
+
+    def apply_changes(self, changes: Mapping[int, Optional[WindowRecord]]) -> Optional[BatchResult]:
+        """Aplicar perfis às janelas novas entre as que mudaram (hwnd -> registro, ou None se saiu)"""
+        start = time.perf_counter()
+        new_windows = []
+        for hwnd, window in changes.items():
+            if window is None:
+                self.seen.discard(hwnd)
+            elif hwnd not in self.seen:
+                self.seen.add(hwnd)
+                new_windows.append(window)
+        if not new_windows or not self.matcher.profiles:
+            return None
+
+        targets = {}
+        for window in new_windows:
+            profile = self.matcher.match(window)
+            if profile is not None:
+                targets[window.hwnd] = (window, profile)
+        result = self.engine.apply_targets(targets)
+        self.applied += sum(1 for item in result.results if item['status'] == 'applied')
+        if self.first_apply_time is None:
+            self.first_apply_time = time.perf_counter() - start
+        return result
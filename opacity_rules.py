@@ -0,0 +1,154 @@
+import re
+import time
+from typing import Dict, Iterable, List, Optional
+
+from window_core import WindowCore
+from window_registry import WindowRecord
+
+
+class OpacityRule:
+    """Regra que associa um nível de transparência às janelas que casam com ela
+
+    Todos os critérios informados precisam casar: `exe` (nome do executável,
+    sem diferenciar maiúsculas), `title` (expressão regular buscada no título)
+    e `class_name` (classe da janela). `exclude_foreground` deixa de fora a
+    janela em primeiro plano.
+    """
+
+    def __init__(self, opacity: int, exe: Optional[str] = None, title: Optional[str] = None,
+                 class_name: Optional[str] = None, exclude_foreground: bool = False,
+                 name: Optional[str] = None):
+        if not 0 <= opacity <= 100:
+            raise ValueError(f"Opacidade fora do intervalo 0-100: {opacity}")
+        self.name = name
+        self.opacity = opacity
+        self.exe = exe.lower() if exe else None
+        self.title = title
+        self.title_regex = re.compile(title, re.IGNORECASE) if title else None
+        self.class_name = class_name
+        self.exclude_foreground = exclude_foreground
+
+    @property
+    def alpha(self) -> int:
+        return int((self.opacity / 100) * 255)
+
+    def matches(self, window: WindowRecord, class_name: Optional[str] = None, foreground: int = 0) -> bool:
+        """Verificar a regra contra uma janela (a classe só é consultada se a regra usar)"""
+        if self.exclude_foreground and window.hwnd == foreground:
+            return False
+        if self.exe is not None and window.exe_name.lower() != self.exe:
+            return False
+        if self.title_regex is not None and not self.title_regex.search(window.title):
+            return False
+        if self.class_name is not None and class_name != self.class_name:
+            return False
+        return True
+
+    def to_dict(self) -> dict:
+        data = {'opacity': self.opacity}
+        for key in ('name', 'exe', 'title', 'class_name'):
+            if getattr(self, key):
+                data[key] = getattr(self, key)
+        if self.exclude_foreground:
+            data['exclude_foreground'] = True
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'OpacityRule':
+        return cls(int(data['opacity']), exe=data.get('exe'), title=data.get('title'),
+                   class_name=data.get('class_name'), exclude_foreground=bool(data.get('exclude_foreground')),
+                   name=data.get('name'))
+
+    def __repr__(self):
+        criteria = [f"{name}={value!r}" for name, value in
+                    (('exe', self.exe), ('title', self.title), ('class_name', self.class_name)) if value]
+        if self.exclude_foreground:
+            criteria.append("exclude_foreground=True")
+        return f"OpacityRule({self.opacity}%, {', '.join(criteria) or 'todas'})"
+
+
+class BatchResult:
+    """Resultado de uma aplicação em lote"""
+
+    def __init__(self):
+        self.results: List[dict] = []  # um item por janela: hwnd, title, opacity, status, error
+        self.elapsed = 0.0
+        self.writes = 0
+        self.skipped = 0
+        self.errors = 0
+
+    def summary(self) -> dict:
+        return {
+            'windows': len(self.results),
+            'writes': self.writes,
+            'skipped': self.skipped,
+            'errors': self.errors,
+            'elapsed_ms': self.elapsed * 1000
+        }
+
+
+class BatchOpacityEngine:
+    """Aplica transparência a várias janelas de uma vez a partir de regras
+
+    As regras são resolvidas contra um único snapshot de janelas; para cada
+    janela vale a primeira regra que casar. As escritas passam pelo
+    OpacityState do núcleo: janelas que já estão em camadas com o alpha
+    desejado não recebem nenhuma escrita.
+    """
+
+    def __init__(self, core: WindowCore):
+        self.core = core
+
+    def resolve(self, rules: Iterable[OpacityRule], windows: Iterable[WindowRecord]) -> Dict[int, tuple]:
+        """Mapear hwnd -> (janela, regra) usando a primeira regra que casar"""
+        rules = list(rules)
+        exclude_foreground = any(rule.exclude_foreground for rule in rules)
+        foreground = self.core.backend.get_foreground_window() if exclude_foreground else 0
+
+        targets = {}
+        for window in windows:
+            for rule in rules:
+                if rule.matches(window, window.class_name, foreground):  # Classe já lida na enumeração
+                    targets[window.hwnd] = (window, rule)
+                    break
+        return targets
+
+    def apply(self, rules: Iterable[OpacityRule], windows: Optional[Iterable[WindowRecord]] = None) -> BatchResult:
+        """Aplicar as regras em uma única passada
+
+        Sem `windows`, faz uma enumeração própria.
+        """
+        start = time.perf_counter()
+        if windows is None:
+            windows = self.core.scan_windows().values()
+        result = self.apply_targets(self.resolve(rules, windows))
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    def apply_targets(self, targets: Dict[int, tuple]) -> BatchResult:
+        """Aplicar um mapa hwnd -> (janela, regra) já resolvido"""
+        start = time.perf_counter()
+        state = self.core.opacity_state
+        result = BatchResult()
+        self.core.journal_windows(targets)  # Um único commit no diário para o lote, antes das escritas
+        for hwnd, (window, rule) in targets.items():
+            item = {'hwnd': hwnd, 'title': window.title, 'opacity': rule.opacity, 'status': 'applied', 'error': None}
+            try:
+                alpha = rule.alpha
+                writes = state.set_alpha(hwnd, alpha, verify=False)
+                if writes:
+                    result.writes += writes
+                else:
+                    item['status'] = 'unchanged'
+                    result.skipped += 1
+                self.core.mark_applied(window, rule.opacity)
+            except Exception as e:
+                item['status'] = 'error'
+                item['error'] = str(e)
+                result.errors += 1
+            result.results.append(item)
+
+        result.elapsed = time.perf_counter() - start
+        self.core.metrics.observe('opacity.batch', result.elapsed * 1000)
+        self.core.metrics.incr('opacity.batch_windows', len(targets))
+        return result
@@ -0,0 +1,177 @@
+import threading
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from window_backend import WS_EX_LAYERED, WindowBackend
+
+
+class OpacityState:
+    """Estado de transparência conhecido de cada janela, para evitar escritas redundantes
+
+    O estilo estendido e o alpha atual são lidos uma vez por snapshot
+    (`observe`) ou na primeira escrita, e atualizados a cada escrita feita por
+    aqui. `set_alpha` só chama o Win32 quando o valor realmente muda; antes
+    de pular uma escrita pelo estado conhecido, ele é confirmado no sistema
+    (outro programa pode ter mudado o alpha), e o estilo estendido é sempre
+    lido na hora de escrever, para não desfazer bits alterados por outros
+    depois da última leitura. Escritores internos de alta frequência
+    (transições, lote, pré-visualização, modo foco) passam `verify=False` e
+    confiam no estado conhecido, que o próximo snapshot (`observe`) corrige:
+    um quadro de transição custa só a escrita. Janelas cujo alpha foi
+    alterado por outro programa ficam em `external`, e o estado de cada
+    janela antes da nossa primeira escrita fica em `original`.
+
+    Todo escritor (aplicação, lote, pré-visualização, modo foco, transição)
+    passa por `set_alpha`; `on_first_write`, se definido, é chamado com
+    (hwnd, exstyle, alpha) originais antes da primeira escrita em cada
+    janela. Se ele levantar uma exceção, a escrita não é feita.
+    """
+
+    def __init__(self, backend: WindowBackend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.known: Dict[int, Tuple[int, Optional[int]]] = {}  # hwnd -> (exstyle, alpha ou None)
+        self.written: Dict[int, int] = {}  # hwnd -> último alpha escrito por nós
+        self.external: Dict[int, int] = {}  # hwnd -> alpha definido fora deste aplicativo
+        self.original: Dict[int, Tuple[int, Optional[int]]] = {}  # hwnd -> (exstyle, alpha) antes de nós
+        self.on_first_write: Optional[Callable[[int, int, Optional[int]], None]] = None
+        self.writes_issued = 0
+        self.writes_suppressed = 0
+        self.reads = 0
+
+    def _read(self, hwnd: int) -> Tuple[int, Optional[int]]:
+        exstyle = self.backend.get_exstyle(hwnd)
+        alpha = self.backend.get_layered_alpha(hwnd) if exstyle & WS_EX_LAYERED else None
+        with self._lock:
+            self.reads += 2 if exstyle & WS_EX_LAYERED else 1
+        return exstyle, alpha
+
+    def _refresh(self, hwnd: int) -> Tuple[int, Optional[int]]:
+        """Ler de novo o estado da janela no sistema, substituindo o conhecido"""
+        state = self._read(hwnd)
+        with self._lock:
+            self.known[hwnd] = state
+        return state
+
+    def observe(self, hwnds: Iterable[int]) -> Dict[int, Optional[int]]:
+        """Ler o estado atual das janelas de um snapshot
+
+        O alpha só é consultado para janelas em camadas. Retorna hwnd -> alpha
+        (None para janelas sem transparência em camadas).
+        """
+        observed = {hwnd: self._read(hwnd) for hwnd in hwnds}
+        with self._lock:
+            for hwnd, (exstyle, alpha) in observed.items():
+                self.known[hwnd] = (exstyle, alpha)
+                expected = self.written.get(hwnd)
+                if alpha is not None and alpha < 255 and alpha != expected:
+                    self.external[hwnd] = alpha
+                elif expected is not None and alpha != expected:
+                    # Nossa transparência foi removida por outro programa
+                    self.external[hwnd] = 255 if alpha is None else alpha
+                else:
+                    self.external.pop(hwnd, None)
+            # Janelas que sumiram do snapshot não precisam mais de estado
+            for hwnd in [hwnd for hwnd in self.known if hwnd not in observed and hwnd not in self.written]:
+                del self.known[hwnd]
+                self.original.pop(hwnd, None)
+        return {hwnd: alpha for hwnd, (_, alpha) in observed.items()}
+
+    def current(self, hwnd: int) -> Tuple[int, Optional[int]]:
+        """Estado conhecido da janela, lendo do sistema apenas se ainda não houver"""
+        with self._lock:
+            state = self.known.get(hwnd)
+        if state is None:
+            state = self._read(hwnd)
+            with self._lock:
+                self.known[hwnd] = state
+        return state
+
+    def set_alpha(self, hwnd: int, alpha: int, verify: bool = True) -> int:
+        """Definir o alpha (0-255), ativando WS_EX_LAYERED se necessário
+
+        Com `verify=False`, o estado conhecido não é confirmado no sistema
+        (nem antes de pular a escrita, nem o estilo ao escrever); a primeira
+        escrita em cada janela sempre lê o estado original.
+        Retorna o número de chamadas de escrita feitas (0 se já estava assim).
+        """
+        exstyle, current_alpha = self.current(hwnd)
+        if exstyle & WS_EX_LAYERED and current_alpha == alpha:
+            if verify:
+                exstyle, current_alpha = self._refresh(hwnd)
+            if exstyle & WS_EX_LAYERED and current_alpha == alpha:
+                with self._lock:
+                    self.writes_suppressed += 1
+                    self.written[hwnd] = alpha
+                return 0
+        else:
+            with self._lock:
+                first = hwnd not in self.original
+            if first:
+                # O estado guardado para a restauração vem do sistema, não do cache
+                exstyle, current_alpha = self._read(hwnd)
+                if self.on_first_write is not None:
+                    self.on_first_write(hwnd, exstyle, current_alpha)
+            elif verify:
+                exstyle = self.backend.get_exstyle(hwnd)
+                with self._lock:
+                    self.reads += 1
+
+        writes = 0
+        with self._lock:
+            self.original.setdefault(hwnd, (exstyle, current_alpha))
+        if not exstyle & WS_EX_LAYERED:
+            exstyle |= WS_EX_LAYERED
+            self.backend.set_exstyle(hwnd, exstyle)
+            writes += 1
+        self.backend.set_layered_alpha(hwnd, alpha)
+        writes += 1
+        with self._lock:
+            self.known[hwnd] = (exstyle, alpha)
+            self.written[hwnd] = alpha
+            self.external.pop(hwnd, None)
+            self.writes_issued += writes
+        return writes
+
+    def reset_alpha(self, hwnd: int) -> int:
+        """Voltar à opacidade total, sem escrever em janelas que já estão opacas"""
+        exstyle, current_alpha = self.current(hwnd)
+        if not exstyle & WS_EX_LAYERED or current_alpha == 255:
+            # Confirmar no sistema antes de pular, como em set_alpha
+            exstyle, current_alpha = self._refresh(hwnd)
+        if not exstyle & WS_EX_LAYERED or current_alpha == 255:
+            with self._lock:
+                self.writes_suppressed += 1
+                self.written.pop(hwnd, None)
+            return 0
+        writes = self.set_alpha(hwnd, 255)
+        with self._lock:
+            self.written.pop(hwnd, None)
+        return writes
+
+    def original_state(self, hwnd: int) -> Tuple[int, Optional[int]]:
+        """(exstyle, alpha) da janela antes da nossa primeira escrita (o atual, se ainda não escrevemos)"""
+        with self._lock:
+            state = self.original.get(hwnd)
+        return state if state is not None else self.current(hwnd)
+
+    def set_original(self, hwnd: int, exstyle: int, alpha: Optional[int]):
+        """Informar o estado original de uma janela escrita antes (por uma execução anterior)"""
+        with self._lock:
+            self.original[hwnd] = (exstyle, alpha)
+
+    def forget(self, hwnd: int):
+        with self._lock:
+            self.known.pop(hwnd, None)
+            self.written.pop(hwnd, None)
+            self.external.pop(hwnd, None)
+            self.original.pop(hwnd, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'writes_issued': self.writes_issued,
+                'writes_suppressed': self.writes_suppressed,
+                'reads': self.reads,
+                'tracked': len(self.written),
+                'external': len(self.external)
+            }
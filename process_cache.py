@@ -0,0 +1,148 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+from window_backend import ProcessAccessDenied, ProcessInfo, ProcessUnavailable, WindowBackend
+
+
+class ProcessInfoCache:
+    """Cache de metadados de processos indexado por (pid, create_time)
+
+    A chave inclui o horário de criação do processo, então um PID reutilizado
+    pelo sistema nunca é confundido com o processo anterior. Entradas são
+    revalidadas após `ttl` segundos, descartadas quando o processo termina
+    (`prune`) e limitadas por ordem de uso (LRU). O limite acompanha o número
+    de processos vivos informado a `prune` (com folga de `headroom`), nunca
+    abaixo de `min_entries`: um desktop com mais processos que o limite não
+    descarta a cada varredura as entradas que a próxima vai usar.
+    """
+
+    def __init__(self, backend: WindowBackend, ttl: float = 30.0, min_entries: int = 512,
+                 headroom: float = 0.25):
+        self.backend = backend
+        self.ttl = ttl
+        self.min_entries = min_entries
+        self.headroom = headroom
+        self.max_entries = min_entries
+        self._entries: "OrderedDict[tuple, list]" = OrderedDict()  # chave -> [info ou erro, validado_em]
+        self._pid_keys: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, pid: int) -> ProcessInfo:
+        """Obter informações do processo, consultando o backend apenas em caso de falta
+
+        Levanta ProcessUnavailable como o backend. ProcessAccessDenied também é
+        guardado no cache, para não repetir a consulta a cada atualização.
+        Pode ser chamado de várias threads; as consultas ao backend são feitas
+        fora do lock.
+        """
+        now = time.monotonic()
+        with self._lock:
+            key = self._pid_keys.get(pid)
+            entry = self._entries[key] if key is not None else None
+            stale = entry is not None and now - entry[1] >= self.ttl
+            if entry is not None and not stale:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                value = entry[0]
+        if entry is not None and not stale:
+            if isinstance(value, Exception):
+                raise value
+            return value
+
+        if stale:
+            # Revalidar: se o PID foi reutilizado, o create_time mudou
+            try:
+                create_time = self.backend.get_process_create_time(pid)
+            except ProcessUnavailable:
+                create_time = None
+            with self._lock:
+                if create_time == key[1] and key in self._entries:
+                    entry[1] = now
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    value = entry[0]
+                else:
+                    self._evict(key)
+                    value = None
+            if value is not None:
+                if isinstance(value, Exception):
+                    raise value
+                return value
+
+        with self._lock:
+            self.misses += 1
+        create_time = self.backend.get_process_create_time(pid)
+        key = (pid, create_time)
+        try:
+            value = self.backend.get_process_info(pid)
+        except ProcessAccessDenied as e:
+            value = e
+        with self._lock:
+            self._store(key, value, now)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    def prefetch(self, pid: int):
+        """Carregar um processo no cache, ignorando processos inacessíveis"""
+        try:
+            self.lookup(pid)
+        except ProcessUnavailable:
+            pass
+
+    def prune(self, live_pids: Optional[Iterable[int]] = None) -> int:
+        """Descartar entradas de processos que já terminaram
+
+        `live_pids` pode ser informado para evitar uma nova consulta ao sistema.
+        O limite de entradas é ajustado ao número de processos vivos. Retorna
+        o número de entradas removidas.
+        """
+        live = set(self.backend.list_pids() if live_pids is None else live_pids)
+        with self._lock:
+            self.max_entries = max(self.min_entries, int(len(live) * (1 + self.headroom)))
+            dead = [key for pid, key in self._pid_keys.items() if pid not in live]
+            for key in dead:
+                self._evict(key)
+        return len(dead)
+
+    def clear(self):
+        """Esvaziar o cache"""
+        with self._lock:
+            self._entries.clear()
+            self._pid_keys.clear()
+
+    def stats(self) -> dict:
+        """Contadores de uso do cache"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+    # _store e _evict devem ser chamados com o lock adquirido
+
+    def _store(self, key: tuple, value, now: float):
+        old_key = self._pid_keys.get(key[0])
+        if old_key is not None and old_key != key:
+            self._evict(old_key)
+        self._entries[key] = [value, now]
+        self._entries.move_to_end(key)
+        self._pid_keys[key[0]] = key
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._evict(oldest)
+
+    def _evict(self, key: tuple):
+        if self._entries.pop(key, None) is not None:
+            self.evictions += 1
+        if self._pid_keys.get(key[0]) == key:
+            del self._pid_keys[key[0]]
@@ -0,0 +1,283 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Mapping, Optional
+
+from window_core import WindowCore
+from window_events import WindowEventTracker
+from window_registry import WindowRecord
+
+
+class WindowChanges:
+    """Diferença entre a lista de janelas entregue à interface e a atual
+
+    `changes` mapeia hwnd -> registro novo ou alterado, ou None para janelas
+    que saíram; `total` é o número de janelas do snapshot mais recente e
+    `event_times`, os instantes dos eventos que produziram as mudanças.
+    """
+    __slots__ = ('changes', 'total', 'event_times')
+
+    def __init__(self, changes: Optional[Dict[int, Optional[WindowRecord]]] = None, total: int = 0,
+                 event_times: Optional[List[float]] = None):
+        self.changes = changes if changes is not None else {}
+        self.total = total
+        self.event_times = event_times if event_times is not None else []
+
+    def merge(self, newer: 'WindowChanges'):
+        """Acumular uma diferença posterior (a mudança mais recente de cada janela vale)"""
+        self.changes.update(newer.changes)
+        self.total = newer.total
+        self.event_times.extend(newer.event_times)
+
+
+def diff_windows(old: Mapping[int, WindowRecord], new: Mapping[int, WindowRecord]) -> Dict[int, Optional[WindowRecord]]:
+    """Janelas novas, alteradas (hwnd -> registro) e removidas (hwnd -> None) de `old` para `new`"""
+    changes: Dict[int, Optional[WindowRecord]] = {hwnd: None for hwnd in old if hwnd not in new}
+    for hwnd, window in new.items():
+        if old.get(hwnd) != window:
+            changes[hwnd] = window
+    return changes
+
+
+class WindowChangesSlot:
+    """Fila de uma posição entre as threads de trabalho e a interface
+
+    Diferenças que chegam antes de a interface consumir a anterior são
+    acumuladas em uma só, então a interface nunca perde uma mudança e aplica
+    cada janela uma única vez, por mais atualizações que tenha perdido.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Optional[WindowChanges] = None
+        self.coalesced = 0
+
+    def put(self, changes: WindowChanges):
+        with self._lock:
+            if self._pending is None:
+                self._pending = changes
+            else:
+                self._pending.merge(changes)
+                self.coalesced += 1
+
+    def take(self) -> Optional[WindowChanges]:
+        """Retirar as mudanças pendentes, se houver"""
+        with self._lock:
+            changes, self._pending = self._pending, None
+            return changes
+
+
+class RefreshWorker:
+    """Executa a enumeração de janelas fora da thread da interface
+
+    Varreduras completas e o processamento de eventos rodam em uma única thread
+    de trabalho (o que mantém o snapshot do rastreador de eventos consistente);
+    as consultas de processos são distribuídas entre `lookup_workers` threads.
+    A comparação com a lista já entregue também é feita aqui: `slot` recebe
+    só as janelas que mudaram, e a interface aplica apenas essas. As
+    janelas aplicadas encontradas mortas por `request_sweep` vão para
+    `dead_windows`, para a interface removê-las do registro.
+    """
+
+    def __init__(self, core: WindowCore, tracker: Optional[WindowEventTracker] = None,
+                 lookup_workers: int = 4):
+        self.core = core
+        self.tracker = tracker
+        self.slot = WindowChangesSlot()
+        self.dead_windows: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="refresh")
+        self._lookup_pool = ThreadPoolExecutor(max_workers=lookup_workers, thread_name_prefix="lookup")
+        self._lock = threading.Lock()
+        self._delivered: Dict[int, WindowRecord] = {}  # Lista como a interface a terá ao consumir o slot
+        self._scan_pending = False
+        self._drain_pending = False
+        self.scans = 0
+
+    def request_scan(self):
+        """Agendar uma varredura completa (pode ser chamado de qualquer thread)
+
+        Se já houver uma varredura aguardando na fila, o pedido é absorvido por ela.
+        """
+        with self._lock:
+            if self._scan_pending:
+                return
+            self._scan_pending = True
+        self._executor.submit(self._scan)
+
+    def request_drain(self):
+        """Agendar o processamento dos eventos pendentes, se ainda não agendado"""
+        if self.tracker is None or self.tracker.events.empty():
+            return
+        with self._lock:
+            if self._drain_pending:
+                return
+            self._drain_pending = True
+        self._executor.submit(self._drain)
+
+    def request_sweep(self):
+        """Agendar a verificação das janelas aplicadas (pode ser chamado de qualquer thread)"""
+        self._executor.submit(self._sweep)
+
+    def _sweep(self):
+        try:
+            with self.core.metrics.timer('gc.sweep'):
+                dead = self.core.find_dead_applied()
+            if dead:
+                self.dead_windows.put(dead)
+        except Exception as e:
+            print(f"Erro ao verificar janelas aplicadas: {e}")
+
+    def _scan(self):
+        with self._lock:
+            self._scan_pending = False
+        try:
+            with self.core.metrics.timer('refresh.scan'):
+                if self.tracker is not None and self.tracker.running:
+                    windows = self.tracker.resync(self._lookup_pool)
+                else:
+                    windows = self.core.scan_windows(self._lookup_pool)
+                changes = diff_windows(self._delivered, windows)
+            self._delivered = windows
+            self.scans += 1
+            # Entregue mesmo sem mudanças: a interface usa isso para espaçar as atualizações
+            self.slot.put(WindowChanges(changes, len(windows)))
+        except Exception as e:
+            print(f"Erro ao obter janelas: {e}")
+
+    def _drain(self):
+        with self._lock:
+            self._drain_pending = False
+        try:
+            with self.core.metrics.timer('refresh.drain'):
+                self.tracker.drain(self._deliver_changes)
+        except Exception as e:
+            print(f"Erro ao processar eventos: {e}")
+
+    def _deliver_changes(self, changes: Dict[int, Optional[WindowRecord]], event_times: List[float]):
+        for hwnd, window in changes.items():
+            if window is None:
+                self._delivered.pop(hwnd, None)
+            else:
+                self._delivered[hwnd] = window
+        self.slot.put(WindowChanges(changes, len(self._delivered), event_times))
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait)
+        self._lookup_pool.shutdown(wait=wait)
+
+
+class RefreshScheduler:
+    """Decide quando pedir a próxima atualização, conforme as mudanças observadas
+
+    Depois de cada atualização que trouxe janelas novas ou fechadas
+    (`report(True)`), o intervalo volta a `min_interval`; a cada atualização
+    sem mudanças ele é multiplicado por `backoff`, até `max_interval`.
+    Pausado (por exemplo, com a janela minimizada), só chama `liveness` a cada
+    `liveness_interval` segundos; ao retomar, atualiza logo em seguida.
+
+    A próxima chamada é `next_timeout()` segundos depois do fim da anterior,
+    e o prazo é recalculado quando o intervalo muda: um `report(True)` que
+    chega depois (a interface mostra as mudanças de forma assíncrona) não
+    espera o intervalo antigo, de até `max_interval`, terminar.
+
+    `refresh` e `liveness` são chamados pela thread do agendador.
+    """
+
+    def __init__(self, refresh: Callable[[], None], liveness: Optional[Callable[[], None]] = None,
+                 min_interval: float = 3.0, max_interval: float = 60.0, backoff: float = 2.0,
+                 liveness_interval: float = 30.0):
+        self.refresh = refresh
+        self.liveness = liveness
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.liveness_interval = liveness_interval
+        self.interval = min_interval
+        self.paused = False
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)  # Intervalo alterado, retomada ou parada
+        self._now = False  # Chamar já, sem esperar o prazo
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.wakeups = 0
+        self.refreshes = 0
+        self.liveness_checks = 0
+
+    def report(self, changed: bool):
+        """Informar o resultado de uma atualização (pode ser chamado de qualquer thread)"""
+        with self._lock:
+            previous = self.interval
+            if changed:
+                self.interval = self.min_interval
+            else:
+                self.interval = min(self.interval * self.backoff, self.max_interval)
+            if self.interval < previous:
+                self._changed.notify()  # A thread recalcula o prazo com o intervalo menor
+
+    def set_range(self, min_interval: float, max_interval: float):
+        """Trocar os limites do intervalo, recomeçando pelo mínimo"""
+        with self._lock:
+            self.min_interval = min_interval
+            self.max_interval = max_interval
+            self.interval = min_interval
+            self._changed.notify()
+
+    def set_paused(self, paused: bool):
+        """Pausar as atualizações (mantendo as verificações de `liveness`) ou retomá-las"""
+        with self._lock:
+            if paused == self.paused:
+                return
+            self.paused = paused
+            if not paused:
+                self.interval = self.min_interval
+                self._now = True  # Atualizar logo ao voltar a ser exibida
+            self._changed.notify()
+
+    def next_timeout(self) -> float:
+        """Segundos até a próxima chamada"""
+        with self._lock:
+            return self.liveness_interval if self.paused else self.interval
+
+    def tick(self):
+        """Fazer a chamada devida agora: `refresh`, ou `liveness` se pausado"""
+        self.wakeups += 1
+        if self.paused:
+            if self.liveness is not None:
+                self.liveness_checks += 1
+                self.liveness()
+        else:
+            self.refreshes += 1
+            self.refresh()
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="RefreshScheduler", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        last = time.monotonic()
+        while True:
+            with self._lock:
+                while not self._stop.is_set() and not self._now:
+                    remaining = last + (self.liveness_interval if self.paused else self.interval) - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._changed.wait(remaining)
+                if self._stop.is_set():
+                    break
+                self._now = False
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"Erro ao agendar atualização: {e}")
+            last = time.monotonic()
+
+    def stop(self, timeout: float = 2.0):
+        """Encerrar a thread do agendador e esperar por ela"""
+        with self._lock:
+            self._stop.set()
+            self._changed.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
@@ -0,0 +1,53 @@
+import time
+
+# Instante da importação deste módulo, antes até de typing
+IMPORT_TIME = time.perf_counter()
+
+from typing import Callable, List, Optional, Tuple
+
+
+class StartupProfiler:
+    """Tempos das fases de inicialização da interface
+
+    Cada `mark` registra o instante em que uma fase terminou, contado a partir
+    de `start` (por padrão, a criação do perfilador; a interface usa
+    IMPORT_TIME, a primeira coisa que o módulo principal importa). Marcar a
+    mesma fase de novo não tem efeito, então pontos que rodam várias vezes
+    (como cada snapshot exibido) registram só a primeira.
+    """
+
+    def __init__(self, start: Optional[float] = None, clock: Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        self.start = clock() if start is None else start
+        self.marks: List[Tuple[str, float]] = []
+
+    def mark(self, phase: str):
+        if not self.has(phase):
+            self.marks.append((phase, self.clock() - self.start))
+
+    def has(self, phase: str) -> bool:
+        return any(name == phase for name, _ in self.marks)
+
+    def phases(self) -> List[dict]:
+        """Fases em ordem de término, com o instante acumulado e a duração de cada uma"""
+        phases = []
+        previous = 0.0
+        for name, at in sorted(self.marks, key=lambda item: item[1]):
+            phases.append({'phase': name, 'at_ms': at * 1000, 'delta_ms': (at - previous) * 1000})
+            previous = at
+        return phases
+
+    def report(self) -> str:
+        lines = ["⏱️ Inicialização:"]
+        for phase in self.phases():
+            lines.append(f"  {phase['phase']:<18} {phase['at_ms']:8.1f} ms  (+{phase['delta_ms']:.1f} ms)")
+        return "\n".join(lines)
+
+    def dump(self, path: Optional[str] = None):
+        """Imprimir o relatório, ou acrescentá-lo como uma linha JSON ao arquivo `path`"""
+        if path is None:
+            print(self.report())
+            return
+        import json  # Fora do topo para não pesar na própria medição
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'time': time.time(), 'phases': self.phases()}) + "\n")
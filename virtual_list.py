@@ -0,0 +1,225 @@
+import tkinter as tk
+import tkinter.font as tkfont
+from typing import Callable, List, Optional, Set, Tuple
+
+
+class VirtualListModel:
+    """Linhas de uma lista virtual, com a mesma interface de Listbox usada pelo ListboxReconciler
+
+    Guarda todas as linhas e a seleção; a visão só desenha o trecho visível
+    (`visible_rows`). Cada alteração incrementa `version` e chama `on_change`,
+    para a visão agendar um único redesenho.
+    """
+
+    def __init__(self, on_change: Optional[Callable[[], None]] = None):
+        self.rows: List[str] = []
+        self.selection: Set[int] = set()
+        self.version = 0
+        self.on_change = on_change
+
+    def _changed(self):
+        self.version += 1
+        if self.on_change is not None:
+            self.on_change()
+
+    def insert(self, index, *texts: str):
+        if index == tk.END or index == 'end':
+            index = len(self.rows)
+        self.rows[index:index] = texts
+        if self.selection:
+            self.selection = {i + len(texts) if i >= index else i for i in self.selection}
+        self._changed()
+
+    def delete(self, first, last=None):
+        if last is not None:
+            last = len(self.rows) - 1 if last in (tk.END, 'end') else last
+            del self.rows[first:last + 1]
+            self.selection = {i if i < first else i - (last - first + 1)
+                              for i in self.selection if not first <= i <= last}
+        else:
+            del self.rows[first]
+            if self.selection:
+                self.selection = {i - 1 if i > first else i for i in self.selection if i != first}
+        self._changed()
+
+    def size(self) -> int:
+        return len(self.rows)
+
+    def get(self, index: int) -> str:
+        return self.rows[index]
+
+    def curselection(self) -> Tuple[int, ...]:
+        return tuple(sorted(self.selection))
+
+    def selection_set(self, index: int):
+        self.selection.add(index)
+        self._changed()
+
+    def selection_clear(self, first=0, last=None):
+        self.selection = set()
+        self._changed()
+
+    def select_only(self, index: int):
+        self.selection = {index}
+        self._changed()
+
+    def visible_rows(self, top: int, count: int) -> List[Tuple[int, str, bool]]:
+        """Linhas (índice, texto, selecionada) a partir de `top`"""
+        return [(index, self.rows[index], index in self.selection)
+                for index in range(top, min(top + count, len(self.rows)))]
+
+
+class VirtualListbox(tk.Canvas):
+    """Lista que desenha apenas as linhas visíveis do modelo
+
+    Um conjunto fixo de itens do Canvas (um texto e um fundo por linha
+    visível) é reaproveitado: rolar ou atualizar o modelo só troca o texto e
+    a cor dos itens cujo conteúdo mudou, independentemente do total de linhas.
+    Aceita `insert`, `delete`, `get`, `size`, `curselection`, `selection_set`,
+    `yview` e `yscrollcommand` como um Listbox e gera `<<ListboxSelect>>`.
+    """
+
+    def __init__(self, master, font=('Segoe UI', 9), bg='#ffffff', fg='#000000',
+                 selectbackground='#0078d7', selectforeground='#ffffff', height: int = 10,
+                 yscrollcommand: Optional[Callable] = None, **kwargs):
+        self.font = tkfont.Font(font=font)
+        self.row_height = self.font.metrics('linespace') + 4
+        super().__init__(master, bg=bg, height=height * self.row_height, highlightthickness=0,
+                         borderwidth=0, **kwargs)
+        self.colors = {'bg': bg, 'fg': fg, 'select_bg': selectbackground, 'select_fg': selectforeground}
+        self.model = VirtualListModel(self._schedule_redraw)
+        self.top = 0
+        self.yscrollcommand = yscrollcommand
+        self._slots: List[Tuple[int, int]] = []  # (fundo, texto) de cada linha visível
+        self._drawn: List[Optional[Tuple[str, bool]]] = []  # conteúdo desenhado em cada slot
+        self._redraw_pending = False
+        self.rows_drawn = 0
+
+        self.bind('<Configure>', lambda event: self._resize())
+        self.bind('<Button-1>', self._on_click)
+        self.bind('<MouseWheel>', lambda event: self.yview_scroll(-event.delta // 120 * 3, 'units'))
+        self.bind('<Button-4>', lambda event: self.yview_scroll(-3, 'units'))
+        self.bind('<Button-5>', lambda event: self.yview_scroll(3, 'units'))
+        self.bind('<Up>', lambda event: self._move_selection(-1))
+        self.bind('<Down>', lambda event: self._move_selection(1))
+
+    # Interface de Listbox, delegada ao modelo
+    def insert(self, index, *texts: str):
+        self.model.insert(index, *texts)
+
+    def delete(self, first, last=None):
+        self.model.delete(first, last)
+
+    def size(self) -> int:
+        return self.model.size()
+
+    def get(self, index: int) -> str:
+        return self.model.get(index)
+
+    def curselection(self) -> Tuple[int, ...]:
+        return self.model.curselection()
+
+    def selection_set(self, index: int):
+        self.model.selection_set(index)
+
+    def selection_clear(self, first=0, last=None):
+        self.model.selection_clear(first, last)
+
+    def configure(self, cnf=None, **kwargs):
+        if 'yscrollcommand' in kwargs:
+            self.yscrollcommand = kwargs.pop('yscrollcommand')
+            self._update_scrollbar()
+        if cnf or kwargs:
+            return super().configure(cnf, **kwargs)
+
+    config = configure
+
+    # Rolagem
+    def visible_count(self) -> int:
+        return max(1, self.winfo_height() // self.row_height)
+
+    def _clamp_top(self, top: int) -> int:
+        return max(0, min(top, self.model.size() - self.visible_count()))
+
+    def yview(self, *args):
+        if not args:
+            size = max(1, self.model.size())
+            return self.top / size, min(1.0, (self.top + self.visible_count()) / size)
+        if args[0] == 'moveto':
+            self._scroll_to(round(float(args[1]) * self.model.size()))
+        elif args[0] == 'scroll':
+            self.yview_scroll(int(args[1]), args[2])
+
+    def yview_scroll(self, number: int, what: str):
+        step = self.visible_count() if what == 'pages' else 1
+        self._scroll_to(self.top + number * step)
+
+    def see(self, index: int):
+        if index < self.top:
+            self._scroll_to(index)
+        elif index >= self.top + self.visible_count():
+            self._scroll_to(index - self.visible_count() + 1)
+
+    def _scroll_to(self, top: int):
+        top = self._clamp_top(top)
+        if top != self.top:
+            self.top = top
+            self._schedule_redraw()
+
+    def _update_scrollbar(self):
+        if self.yscrollcommand is not None:
+            first, last = self.yview()
+            self.yscrollcommand(first, last)
+
+    # Desenho
+    def _resize(self):
+        needed = self.visible_count() + 1
+        width = self.winfo_width()
+        while len(self._slots) < needed:
+            y = len(self._slots) * self.row_height
+            background = self.create_rectangle(0, y, width, y + self.row_height, width=0, fill=self.colors['bg'])
+            text = self.create_text(6, y + self.row_height // 2, anchor=tk.W, font=self.font, fill=self.colors['fg'])
+            self._slots.append((background, text))
+            self._drawn.append(None)
+        for background, _ in self._slots:
+            x1, y1, _, y2 = self.coords(background)
+            self.coords(background, x1, y1, width, y2)
+        self.top = self._clamp_top(self.top)
+        self._schedule_redraw()
+
+    def _schedule_redraw(self):
+        if not self._redraw_pending:
+            self._redraw_pending = True
+            self.after_idle(self._redraw)
+
+    def _redraw(self):
+        """Atualizar apenas os slots cujo texto ou seleção mudou"""
+        self._redraw_pending = False
+        self.top = self._clamp_top(self.top)
+        rows = self.model.visible_rows(self.top, len(self._slots))
+        for slot, (background, text) in enumerate(self._slots):
+            content = (rows[slot][1], rows[slot][2]) if slot < len(rows) else ('', False)
+            if self._drawn[slot] == content:
+                continue
+            label, selected = content
+            self.itemconfigure(text, text=label, fill=self.colors['select_fg' if selected else 'fg'])
+            self.itemconfigure(background, fill=self.colors['select_bg' if selected else 'bg'])
+            self._drawn[slot] = content
+            self.rows_drawn += 1
+        self._update_scrollbar()
+
+    # Seleção
+    def _select(self, index: int):
+        if not 0 <= index < self.model.size():
+            return
+        self.model.select_only(index)
+        self.see(index)
+        self.event_generate('<<ListboxSelect>>')
+
+    def _on_click(self, event):
+        self.focus_set()
+        self._select(self.top + event.y // self.row_height)
+
+    def _move_selection(self, delta: int):
+        selection = self.model.curselection()
+        self._select(selection[0] + delta if selection else 0)
@@ -0,0 +1,748 @@
+import ntpath
+import os
+import random
+import threading
+import time
+from array import array
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Constantes Win32 usadas pelo núcleo (evita depender de win32con fora do Windows)
+GWL_EXSTYLE = -20
+WS_EX_LAYERED = 0x00080000
+LWA_ALPHA = 0x00000002
+
+# Eventos WinEvent acompanhados no modo orientado a eventos
+EVENT_SYSTEM_FOREGROUND = 0x0003
+EVENT_OBJECT_CREATE = 0x8000
+EVENT_OBJECT_DESTROY = 0x8001
+EVENT_OBJECT_SHOW = 0x8002
+EVENT_OBJECT_HIDE = 0x8003
+EVENT_OBJECT_NAMECHANGE = 0x800C
+
+# Callback de eventos: (evento, hwnd)
+EventCallback = Callable[[int, int], None]
+
+
+class ProcessUnavailable(Exception):
+    """Processo não pode ser consultado"""
+
+
+class ProcessNotFound(ProcessUnavailable):
+    """Processo não existe mais"""
+
+
+class ProcessAccessDenied(ProcessUnavailable):
+    """Sem permissão para consultar o processo"""
+
+
+class ProcessInfo:
+    """Metadados de um processo"""
+    __slots__ = ('pid', 'create_time', 'exe_path', 'exe_name', 'name')
+
+    def __init__(self, pid: int, create_time: float, exe_path: Optional[str], name: str):
+        self.pid = pid
+        self.create_time = create_time
+        self.exe_path = exe_path
+        # Caminhos são sempre do Windows, mesmo com o backend simulado em outro sistema
+        self.exe_name = ntpath.basename(exe_path) if exe_path else "Desconhecido"
+        self.name = name
+
+
+class WindowSnapshot:
+    """Resultado de uma enumeração, em colunas, reaproveitável entre atualizações
+
+    hwnds e PIDs ficam em arrays de inteiros e a visibilidade em um
+    bytearray, em vez de um objeto por janela. O título só é lido para as
+    janelas visíveis, e classe e PID só para as visíveis com título (nas
+    demais ficam vazios e 0).
+    """
+    __slots__ = ('hwnds', 'visible', 'titles', 'classes', 'pids')
+
+    def __init__(self):
+        self.hwnds = array('Q')
+        self.visible = bytearray()
+        self.titles: List[str] = []
+        self.classes: List[str] = []
+        self.pids = array('L')
+
+    def clear(self):
+        del self.hwnds[:]
+        del self.visible[:]
+        del self.titles[:]
+        del self.classes[:]
+        del self.pids[:]
+
+    def append(self, hwnd: int, visible: bool, title: str = "", class_name: str = "", pid: int = 0):
+        self.hwnds.append(hwnd)
+        self.visible.append(visible)
+        self.titles.append(title)
+        self.classes.append(class_name)
+        self.pids.append(pid)
+
+    def __len__(self) -> int:
+        return len(self.hwnds)
+
+    def rows(self) -> Iterable[Tuple[int, bool, str, str, int]]:
+        """(hwnd, visível, título, classe, pid) de cada janela"""
+        return zip(self.hwnds, map(bool, self.visible), self.titles, self.classes, self.pids)
+
+    def listable(self) -> List[Tuple[int, str, str, int]]:
+        """(hwnd, título, classe, pid) das janelas visíveis com título"""
+        return [(hwnd, title, class_name, pid) for hwnd, visible, title, class_name, pid
+                in zip(self.hwnds, self.visible, self.titles, self.classes, self.pids) if visible and title.strip()]
+
+
+class WindowBackend:
+    """Interface com o sistema de janelas
+
+    Todo acesso a janelas e processos passa por aqui, para que o núcleo possa
+    rodar tanto sobre o Win32 real quanto sobre um sistema simulado.
+    """
+
+    supports_events = False
+
+    def enum_windows(self) -> List[int]:
+        """Listar os hwnds de todas as janelas de nível superior"""
+        raise NotImplementedError
+
+    def enum_snapshot(self, snapshot: Optional[WindowSnapshot] = None) -> WindowSnapshot:
+        """Enumerar as janelas de nível superior com visibilidade, título, classe e PID
+
+        `snapshot` é reaproveitado (esvaziado e preenchido de novo) se informado.
+        Classe e PID só são lidos para janelas visíveis com título (as únicas
+        listáveis); as demais ficam com "" e 0. Esta implementação consulta
+        janela por janela pelos demais métodos.
+        """
+        if snapshot is None:
+            snapshot = WindowSnapshot()
+        else:
+            snapshot.clear()
+        for hwnd in self.enum_windows():
+            if not self.is_window_visible(hwnd):
+                snapshot.append(hwnd, False)
+                continue
+            title = self.get_window_text(hwnd)
+            if title:
+                snapshot.append(hwnd, True, title, self.get_class_name(hwnd), self.get_window_pid(hwnd))
+            else:
+                snapshot.append(hwnd, True)
+        return snapshot
+
+    def is_window(self, hwnd: int) -> bool:
+        """Verificar se o hwnd ainda identifica uma janela existente"""
+        raise NotImplementedError
+
+    def is_window_visible(self, hwnd: int) -> bool:
+        raise NotImplementedError
+
+    def get_window_text(self, hwnd: int) -> str:
+        raise NotImplementedError
+
+    def get_window_pid(self, hwnd: int) -> int:
+        raise NotImplementedError
+
+    def get_class_name(self, hwnd: int) -> str:
+        raise NotImplementedError
+
+    def get_exstyle(self, hwnd: int) -> int:
+        raise NotImplementedError
+
+    def set_exstyle(self, hwnd: int, style: int):
+        raise NotImplementedError
+
+    def set_layered_alpha(self, hwnd: int, alpha: int):
+        """Definir a opacidade (0-255) de uma janela que já tem WS_EX_LAYERED"""
+        raise NotImplementedError
+
+    def get_layered_alpha(self, hwnd: int) -> Optional[int]:
+        """Obter a opacidade atual, ou None se a janela não usa alpha em camadas"""
+        raise NotImplementedError
+
+    def get_foreground_window(self) -> int:
+        raise NotImplementedError
+
+    def get_process_create_time(self, pid: int) -> float:
+        """Obter o horário de criação do processo (levanta ProcessUnavailable)"""
+        raise NotImplementedError
+
+    def get_process_info(self, pid: int) -> ProcessInfo:
+        """Obter os metadados do processo (levanta ProcessUnavailable)"""
+        raise NotImplementedError
+
+    def list_pids(self) -> List[int]:
+        """Listar os PIDs de todos os processos em execução"""
+        raise NotImplementedError
+
+    def get_current_pid(self) -> int:
+        """PID do próprio aplicativo, cujas janelas nunca são listadas"""
+        return os.getpid()
+
+    def start_events(self, callback: EventCallback):
+        """Começar a entregar eventos de janelas de nível superior a `callback`
+
+        O callback pode ser chamado a partir de outra thread.
+        """
+        raise NotImplementedError
+
+    def stop_events(self):
+        """Parar a entrega de eventos"""
+        raise NotImplementedError
+
+    def add_event_listener(self, callback: EventCallback):
+        """Acrescentar um destinatário de eventos (vários componentes podem ouvir ao mesmo tempo)
+
+        Os eventos do sistema são assinados com o primeiro destinatário, já
+        registrado: o hook pode entregar eventos antes de `start_events` voltar.
+        """
+        listeners = getattr(self, '_event_listeners', ())
+        # Nova tupla a cada mudança: a thread dos eventos percorre sempre uma cópia estável
+        self._event_listeners = listeners + (callback,)
+        if not listeners:
+            try:
+                self.start_events(self._dispatch_event)
+            except Exception:
+                self._event_listeners = listeners
+                raise
+
+    def remove_event_listener(self, callback: EventCallback):
+        """Retirar um destinatário; os eventos param de ser assinados sem o último"""
+        listeners = getattr(self, '_event_listeners', ())
+        if callback not in listeners:
+            return
+        self._event_listeners = tuple(listener for listener in listeners if listener != callback)
+        if not self._event_listeners:
+            self.stop_events()
+
+    def _dispatch_event(self, event: int, hwnd: int):
+        for listener in self._event_listeners:
+            try:
+                listener(event, hwnd)
+            except Exception as e:
+                print(f"Erro no callback de eventos: {e}")
+
+
+class Win32Enumerator:
+    """Enumeração por ctypes com os buffers alocados uma vez e reaproveitados
+
+    O callback do EnumWindows só guarda o hwnd em um array pré-alocado
+    (dobrado e a enumeração refeita se faltar espaço); depois, para cada
+    janela visível, o título é lido, e classe e PID só se houver título, com
+    funções de argtypes fixos nos mesmos buffers. As funções vêm de uma
+    instância própria da user32, sem alterar os argtypes de
+    `ctypes.windll.user32` usada pelo restante do processo.
+
+    O custo continua proporcional às janelas: uma chamada do callback em
+    Python por hwnd (o EnumWindows não tem alternativa documentada sem
+    callback) e até quatro chamadas ctypes por janela visível com título.
+    O ganho sobre o pywin32 é não criar objetos a cada chamada.
+    """
+
+    TITLE_CHARS = 512
+    CLASS_CHARS = 256
+
+    def __init__(self, capacity: int = 1024):
+        import ctypes
+        from ctypes import wintypes
+        user32 = ctypes.WinDLL('user32', use_last_error=True)
+        WNDENUMPROC = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
+        user32.EnumWindows.argtypes = [WNDENUMPROC, wintypes.LPARAM]
+        user32.EnumWindows.restype = wintypes.BOOL
+        user32.IsWindowVisible.argtypes = [wintypes.HWND]
+        user32.IsWindowVisible.restype = wintypes.BOOL
+        for function in (user32.GetWindowTextW, user32.GetClassNameW):
+            function.argtypes = [wintypes.HWND, wintypes.LPWSTR, ctypes.c_int]
+            function.restype = ctypes.c_int
+        user32.GetWindowThreadProcessId.argtypes = [wintypes.HWND, ctypes.POINTER(wintypes.DWORD)]
+        user32.GetWindowThreadProcessId.restype = wintypes.DWORD
+        self.user32 = user32
+        self._hwnd_type = wintypes.HWND
+        self._wstring_at = ctypes.wstring_at
+        self._hwnds = (wintypes.HWND * capacity)()
+        self._count = 0
+        self._overflow = False
+        self._title = ctypes.create_unicode_buffer(self.TITLE_CHARS)
+        self._class = ctypes.create_unicode_buffer(self.CLASS_CHARS)
+        self._pid = wintypes.DWORD()
+        self._pid_ref = ctypes.byref(self._pid)
+        self._callback = WNDENUMPROC(self._collect)  # Mantido vivo enquanto o enumerador existir
+        self._lock = threading.Lock()
+
+    def _collect(self, hwnd, lparam):
+        if self._count == len(self._hwnds):
+            self._overflow = True
+            return False
+        self._hwnds[self._count] = hwnd
+        self._count += 1
+        return True
+
+    def enumerate(self, snapshot: WindowSnapshot) -> WindowSnapshot:
+        user32 = self.user32
+        wstring_at = self._wstring_at
+        with self._lock:
+            while True:
+                self._count = 0
+                self._overflow = False
+                user32.EnumWindows(self._callback, 0)
+                if not self._overflow:
+                    break
+                self._hwnds = (self._hwnd_type * (len(self._hwnds) * 2))()
+
+            snapshot.clear()
+            is_visible = user32.IsWindowVisible
+            get_text = user32.GetWindowTextW
+            get_class = user32.GetClassNameW
+            get_pid = user32.GetWindowThreadProcessId
+            title, class_name, pid, pid_ref = self._title, self._class, self._pid, self._pid_ref
+            for hwnd in self._hwnds[:self._count]:
+                if not is_visible(hwnd):
+                    snapshot.append(hwnd, False)
+                    continue
+                title_length = get_text(hwnd, title, self.TITLE_CHARS)
+                if not title_length:
+                    snapshot.append(hwnd, True)  # Sem título: não é listável, classe e PID não são lidos
+                    continue
+                class_length = get_class(hwnd, class_name, self.CLASS_CHARS)
+                get_pid(hwnd, pid_ref)
+                snapshot.append(hwnd, True, wstring_at(title, title_length), wstring_at(class_name, class_length),
+                                pid.value)
+        return snapshot
+
+
+class Win32Backend(WindowBackend):
+    """Implementação real usando pywin32 e psutil"""
+
+    supports_events = True
+
+    def __init__(self):
+        import win32gui
+        import win32process
+        self.win32gui = win32gui
+        self.win32process = win32process
+        self._psutil = None
+        self._enumerator: Optional[Win32Enumerator] = None
+
+    @property
+    def psutil(self):
+        # Importado só na primeira consulta de processo, que já roda fora da thread da interface
+        if self._psutil is None:
+            import psutil
+            self._psutil = psutil
+        return self._psutil
+
+    def enum_windows(self) -> List[int]:
+        hwnds = []
+        self.win32gui.EnumWindows(lambda hwnd, result: result.append(hwnd) or True, hwnds)
+        return hwnds
+
+    def enum_snapshot(self, snapshot: Optional[WindowSnapshot] = None) -> WindowSnapshot:
+        if self._enumerator is None:
+            self._enumerator = Win32Enumerator()
+        return self._enumerator.enumerate(snapshot if snapshot is not None else WindowSnapshot())
+
+    def is_window(self, hwnd: int) -> bool:
+        return bool(self.win32gui.IsWindow(hwnd))
+
+    def is_window_visible(self, hwnd: int) -> bool:
+        return bool(self.win32gui.IsWindowVisible(hwnd))
+
+    def get_window_text(self, hwnd: int) -> str:
+        return self.win32gui.GetWindowText(hwnd)
+
+    def get_window_pid(self, hwnd: int) -> int:
+        _, pid = self.win32process.GetWindowThreadProcessId(hwnd)
+        return pid
+
+    def get_class_name(self, hwnd: int) -> str:
+        return self.win32gui.GetClassName(hwnd)
+
+    def get_exstyle(self, hwnd: int) -> int:
+        return self.win32gui.GetWindowLong(hwnd, GWL_EXSTYLE)
+
+    def set_exstyle(self, hwnd: int, style: int):
+        self.win32gui.SetWindowLong(hwnd, GWL_EXSTYLE, style)
+
+    def set_layered_alpha(self, hwnd: int, alpha: int):
+        self.win32gui.SetLayeredWindowAttributes(hwnd, 0, alpha, LWA_ALPHA)
+
+    def get_layered_alpha(self, hwnd: int) -> Optional[int]:
+        if not self.get_exstyle(hwnd) & WS_EX_LAYERED:
+            return None
+        try:
+            _, alpha, flags = self.win32gui.GetLayeredWindowAttributes(hwnd)
+        except self.win32gui.error:
+            # Janela em camadas controlada por UpdateLayeredWindow
+            return None
+        return alpha if flags & LWA_ALPHA else None
+
+    def get_foreground_window(self) -> int:
+        return self.win32gui.GetForegroundWindow()
+
+    def get_process_create_time(self, pid: int) -> float:
+        try:
+            return self.psutil.Process(pid).create_time()
+        except self.psutil.NoSuchProcess as e:
+            raise ProcessNotFound(str(e)) from e
+        except self.psutil.AccessDenied as e:
+            raise ProcessAccessDenied(str(e)) from e
+
+    def get_process_info(self, pid: int) -> ProcessInfo:
+        try:
+            process = self.psutil.Process(pid)
+            return ProcessInfo(pid, process.create_time(), process.exe(), process.name())
+        except self.psutil.NoSuchProcess as e:
+            raise ProcessNotFound(str(e)) from e
+        except self.psutil.AccessDenied as e:
+            raise ProcessAccessDenied(str(e)) from e
+
+    def list_pids(self) -> List[int]:
+        return self.psutil.pids()
+
+    def start_events(self, callback: EventCallback):
+        if getattr(self, '_event_thread', None) is not None:
+            return
+        ready = threading.Event()
+        self._event_error = None
+        self._event_thread = threading.Thread(target=self._event_loop, args=(callback, ready),
+                                              name="WinEventHook", daemon=True)
+        self._event_thread.start()
+        ready.wait(5)
+        if self._event_error is not None:
+            self._event_thread = None
+            raise self._event_error
+
+    def stop_events(self):
+        thread = getattr(self, '_event_thread', None)
+        if thread is None:
+            return
+        import ctypes
+        WM_QUIT = 0x0012
+        ctypes.windll.user32.PostThreadMessageW(self._event_thread_id, WM_QUIT, 0, 0)
+        thread.join(2)
+        self._event_thread = None
+
+    def _event_loop(self, callback: EventCallback, ready: threading.Event):
+        """Thread com os hooks SetWinEventHook e o laço de mensagens que os atende"""
+        import ctypes
+        from ctypes import wintypes
+
+        user32 = ctypes.windll.user32
+        kernel32 = ctypes.windll.kernel32
+        WINEVENT_OUTOFCONTEXT = 0x0000
+        WINEVENT_SKIPOWNPROCESS = 0x0002
+        OBJID_WINDOW = 0
+        CHILDID_SELF = 0
+        GA_ROOT = 2
+
+        WinEventProc = ctypes.WINFUNCTYPE(None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+                                          wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD)
+        user32.SetWinEventHook.restype = wintypes.HANDLE
+        user32.SetWinEventHook.argtypes = [wintypes.UINT, wintypes.UINT, wintypes.HMODULE, WinEventProc,
+                                           wintypes.DWORD, wintypes.DWORD, wintypes.UINT]
+        user32.GetAncestor.restype = wintypes.HWND
+        user32.GetAncestor.argtypes = [wintypes.HWND, wintypes.UINT]
+
+        def on_event(hook, event, hwnd, id_object, id_child, thread_id, timestamp):
+            # Apenas a própria janela (não seus elementos) e apenas janelas de nível superior;
+            # uma janela destruída não tem mais ancestral, então DESTROY passa sempre
+            if id_object != OBJID_WINDOW or id_child != CHILDID_SELF or not hwnd:
+                return
+            if event != EVENT_OBJECT_DESTROY and user32.GetAncestor(hwnd, GA_ROOT) != hwnd:
+                return
+            try:
+                callback(event, hwnd)
+            except Exception as e:
+                print(f"Erro no callback de eventos: {e}")
+
+        proc = WinEventProc(on_event)
+        flags = WINEVENT_OUTOFCONTEXT | WINEVENT_SKIPOWNPROCESS
+        hooks = [
+            user32.SetWinEventHook(EVENT_OBJECT_CREATE, EVENT_OBJECT_HIDE, None, proc, 0, 0, flags),
+            user32.SetWinEventHook(EVENT_OBJECT_NAMECHANGE, EVENT_OBJECT_NAMECHANGE, None, proc, 0, 0, flags),
+            user32.SetWinEventHook(EVENT_SYSTEM_FOREGROUND, EVENT_SYSTEM_FOREGROUND, None, proc, 0, 0, flags)
+        ]
+        self._event_thread_id = kernel32.GetCurrentThreadId()
+        if not all(hooks):
+            self._event_error = OSError("SetWinEventHook falhou")
+            for hook in hooks:
+                if hook:
+                    user32.UnhookWinEvent(hook)
+            ready.set()
+            return
+        ready.set()
+
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+
+        for hook in hooks:
+            user32.UnhookWinEvent(hook)
+
+
+class FakeWindow:
+    """Janela simulada"""
+    __slots__ = ('hwnd', 'title', 'pid', 'class_name', 'visible', 'exstyle', 'alpha')
+
+    def __init__(self, hwnd: int, title: str, pid: int, class_name: str, visible: bool):
+        self.hwnd = hwnd
+        self.title = title
+        self.pid = pid
+        self.class_name = class_name
+        self.visible = visible
+        self.exstyle = 0
+        self.alpha = 255
+
+
+class FakeProcess:
+    """Processo simulado"""
+    __slots__ = ('pid', 'create_time', 'exe_path', 'name', 'access_denied')
+
+    def __init__(self, pid: int, create_time: float, exe_path: Optional[str], name: str,
+                 access_denied: bool):
+        self.pid = pid
+        self.create_time = create_time
+        self.exe_path = exe_path
+        self.name = name
+        self.access_denied = access_denied
+
+
+class FakeBackend(WindowBackend):
+    """Sistema de janelas em memória, determinístico, para testes e benchmarks
+
+    `latency` simula o custo (em segundos) de cada chamada ao sistema; `calls`
+    conta quantas vezes cada operação foi usada. Alterações feitas pelos
+    métodos de construção do cenário geram os eventos correspondentes.
+    """
+
+    supports_events = True
+
+    def __init__(self, latency: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.random = random.Random(seed)
+        self.windows: Dict[int, FakeWindow] = {}
+        self.processes: Dict[int, FakeProcess] = {}
+        self.calls: Counter = Counter()
+        self._event_callback: Optional[EventCallback] = None
+        self.foreground = 0
+        self.own_pid = 0  # PID simulado do próprio aplicativo (0: nenhum)
+        self._next_hwnd = 0x10000
+        self._next_pid = 1000
+        self._clock = 0.0
+
+    def _call(self, name: str):
+        self.calls[name] += 1
+        if self.latency:
+            # Espera ativa: time.sleep não tem resolução para microssegundos
+            deadline = time.perf_counter() + self.latency
+            while time.perf_counter() < deadline:
+                pass
+
+    # Construção do cenário
+
+    def add_process(self, exe_name: str = "app.exe", access_denied: bool = False,
+                    pid: Optional[int] = None) -> int:
+        """Criar um processo simulado e retornar seu PID"""
+        if pid is None:
+            pid = self._next_pid
+            self._next_pid += 4
+        self._clock += 1.0
+        exe_path = f"C:\\Program Files\\{exe_name}" if exe_name.lower().endswith('.exe') else None
+        self.processes[pid] = FakeProcess(pid, self._clock, exe_path, exe_name, access_denied)
+        return pid
+
+    def _emit(self, event: int, hwnd: int):
+        window = self.windows.get(hwnd)
+        if window is not None and self.own_pid and window.pid == self.own_pid:
+            return  # Como WINEVENT_SKIPOWNPROCESS: eventos das próprias janelas não chegam
+        if self._event_callback is not None:
+            self._event_callback(event, hwnd)
+
+    def kill_process(self, pid: int):
+        """Encerrar um processo simulado e todas as suas janelas"""
+        self.processes.pop(pid, None)
+        for hwnd in [hwnd for hwnd, window in self.windows.items() if window.pid == pid]:
+            self.close_window(hwnd)
+
+    def add_window(self, title: str, pid: Optional[int] = None, class_name: str = "FakeWindowClass",
+                   visible: bool = True, exe_name: str = "app.exe", hwnd: Optional[int] = None) -> int:
+        """Criar uma janela simulada (e seu processo, se `pid` não for informado)
+
+        `hwnd` reaproveita o handle de uma janela já fechada, como o sistema pode fazer.
+        """
+        if pid is None:
+            pid = self.add_process(exe_name)
+        if hwnd is None:
+            hwnd = self._next_hwnd
+            self._next_hwnd += 2
+        elif hwnd in self.windows:
+            raise ValueError(f"hwnd em uso: {hwnd:#x}")
+        self.windows[hwnd] = FakeWindow(hwnd, title, pid, class_name, visible)
+        self._emit(EVENT_OBJECT_CREATE, hwnd)
+        if visible:
+            self._emit(EVENT_OBJECT_SHOW, hwnd)
+        return hwnd
+
+    def close_window(self, hwnd: int):
+        if self.windows.pop(hwnd, None) is not None:
+            self._emit(EVENT_OBJECT_DESTROY, hwnd)
+
+    def set_title(self, hwnd: int, title: str):
+        self.windows[hwnd].title = title
+        self._emit(EVENT_OBJECT_NAMECHANGE, hwnd)
+
+    def set_foreground(self, hwnd: int):
+        self.foreground = hwnd
+        self._emit(EVENT_SYSTEM_FOREGROUND, hwnd)
+
+    def set_visible(self, hwnd: int, visible: bool):
+        self.windows[hwnd].visible = visible
+        self._emit(EVENT_OBJECT_SHOW if visible else EVENT_OBJECT_HIDE, hwnd)
+
+    def replay(self, trace: Iterable[Tuple], realtime: bool = False):
+        """Reproduzir um trace sintético de operações sobre as janelas
+
+        Cada item é `(atraso, operação, *argumentos)`, onde operação é o nome
+        de um método deste backend (`add_window`, `close_window`, `set_title`,
+        `set_visible`, ...). Com `realtime`, os atrasos (em segundos) são
+        respeitados.
+        """
+        for delay, operation, *args in trace:
+            if realtime and delay:
+                time.sleep(delay)
+            getattr(self, operation)(*args)
+
+    def populate(self, count: int, processes: int = 0, hidden_ratio: float = 0.2) -> List[int]:
+        """Criar `count` janelas distribuídas entre `processes` processos
+
+        Uma fração `hidden_ratio` das janelas fica invisível, como acontece
+        com as janelas auxiliares de um desktop real.
+        """
+        exe_names = ['chrome.exe', 'code.exe', 'explorer.exe', 'notepad.exe', 'firefox.exe',
+                     'slack.exe', 'cursor.exe', 'winword.exe', 'excel.exe', 'teams.exe']
+        pids = [self.add_process(exe_names[i % len(exe_names)])
+                for i in range(processes or max(1, count // 8))]
+        hwnds = []
+        for i in range(count):
+            pid = pids[self.random.randrange(len(pids))]
+            visible = self.random.random() >= hidden_ratio
+            title = f"Documento {i} - {self.processes[pid].name}" if visible else ""
+            hwnds.append(self.add_window(title, pid=pid, visible=visible))
+        return hwnds
+
+    # Interface WindowBackend
+
+    def enum_windows(self) -> List[int]:
+        self._call('enum_windows')
+        return list(self.windows)
+
+    def enum_snapshot(self, snapshot: Optional[WindowSnapshot] = None) -> WindowSnapshot:
+        # As mesmas chamadas (e latências) que o Win32 faz por janela, sem uma chamada de método para cada
+        if snapshot is None:
+            snapshot = WindowSnapshot()
+        else:
+            snapshot.clear()
+        call = self._call
+        call('enum_windows')
+        # Cópia: o cenário pode ser alterado por outra thread durante a enumeração
+        for hwnd, window in list(self.windows.items()):
+            call('is_window_visible')
+            if window.visible:
+                call('get_window_text')
+                if not window.title:
+                    snapshot.append(hwnd, True)
+                    continue
+                call('get_class_name')
+                call('get_window_pid')
+                snapshot.append(hwnd, True, window.title, window.class_name, window.pid)
+            else:
+                snapshot.append(hwnd, False)
+        return snapshot
+
+    def is_window(self, hwnd: int) -> bool:
+        self._call('is_window')
+        return hwnd in self.windows
+
+    def is_window_visible(self, hwnd: int) -> bool:
+        self._call('is_window_visible')
+        window = self.windows.get(hwnd)
+        return bool(window and window.visible)
+
+    def get_window_text(self, hwnd: int) -> str:
+        self._call('get_window_text')
+        window = self.windows.get(hwnd)
+        return window.title if window else ""
+
+    def get_window_pid(self, hwnd: int) -> int:
+        self._call('get_window_pid')
+        window = self.windows.get(hwnd)
+        return window.pid if window else 0
+
+    def get_class_name(self, hwnd: int) -> str:
+        self._call('get_class_name')
+        window = self.windows.get(hwnd)
+        return window.class_name if window else ""
+
+    def get_exstyle(self, hwnd: int) -> int:
+        self._call('get_exstyle')
+        window = self.windows.get(hwnd)
+        return window.exstyle if window else 0
+
+    def set_exstyle(self, hwnd: int, style: int):
+        self._call('set_exstyle')
+        window = self.windows.get(hwnd)
+        if window:
+            if window.exstyle & WS_EX_LAYERED and not style & WS_EX_LAYERED:
+                window.alpha = 255  # Sem WS_EX_LAYERED o sistema descarta os atributos de camada
+            window.exstyle = style
+
+    def set_layered_alpha(self, hwnd: int, alpha: int):
+        self._call('set_layered_alpha')
+        window = self.windows.get(hwnd)
+        if window:
+            window.alpha = alpha
+
+    def get_layered_alpha(self, hwnd: int) -> Optional[int]:
+        self._call('get_layered_alpha')
+        window = self.windows.get(hwnd)
+        if window is None or not window.exstyle & WS_EX_LAYERED:
+            return None
+        return window.alpha
+
+    def get_foreground_window(self) -> int:
+        self._call('get_foreground_window')
+        return self.foreground if self.foreground in self.windows else 0
+
+    def get_process_create_time(self, pid: int) -> float:
+        self._call('get_process_create_time')
+        process = self.processes.get(pid)
+        if process is None:
+            raise ProcessNotFound(f"pid={pid}")
+        return process.create_time
+
+    def get_process_info(self, pid: int) -> ProcessInfo:
+        self._call('get_process_info')
+        process = self.processes.get(pid)
+        if process is None:
+            raise ProcessNotFound(f"pid={pid}")
+        if process.access_denied:
+            raise ProcessAccessDenied(f"pid={pid}")
+        return ProcessInfo(pid, process.create_time, process.exe_path, process.name)
+
+    def list_pids(self) -> List[int]:
+        self._call('list_pids')
+        return list(self.processes)
+
+    def get_current_pid(self) -> int:
+        return self.own_pid
+
+    def start_events(self, callback: EventCallback):
+        self._event_callback = callback
+
+    def stop_events(self):
+        self._event_callback = None
+
+
+def default_backend() -> WindowBackend:
+    """Backend padrão para o sistema atual"""
+    return Win32Backend()
@@ -0,0 +1,114 @@
+import re
+from typing import Dict, Iterable, Optional, Pattern, Set, Tuple
+
+from window_backend import ProcessInfo, WindowBackend
+
+# Processos aceitos mesmo sem um caminho .exe conhecido
+DEFAULT_INCLUDE_EXE = ('cursor.exe', 'code.exe', 'notepad++.exe', 'sublime_text.exe', 'atom.exe', 'vim.exe',
+                       'emacs.exe')
+# Palavras do título que aceitam janelas de processos que não podem ser consultados
+DEFAULT_FALLBACK_TITLES = ('cursor', 'code', 'notepad', 'chrome', 'firefox', 'edge', 'opera')
+
+# Resultados da classificação
+EXCLUDE = 0
+INCLUDE = 1  # Janela de um processo conhecido
+INCLUDE_SYSTEM = 2  # Janela de um processo inacessível, listada como "Sistema"
+
+
+def combine_patterns(patterns: Iterable[str]) -> Optional[Pattern]:
+    """Juntar várias expressões regulares em uma só, sem diferenciar maiúsculas"""
+    patterns = list(patterns)
+    if not patterns:
+        return None
+    return re.compile('|'.join(f'(?:{pattern})' for pattern in patterns), re.IGNORECASE)
+
+
+class WindowClassifier:
+    """Decide quais janelas entram na lista
+
+    As regras são compiladas uma vez: nomes de executável e classes viram
+    conjuntos, e as expressões de título de cada tipo de regra viram uma
+    única expressão combinada. Uma janela é excluída se for do próprio
+    aplicativo (pelo PID ou por um hwnd registrado em `add_own_window`) ou se
+    casar com alguma regra de exclusão (`exclude_exe`, `exclude_titles`,
+    `exclude_classes` ou algum bit de `exclude_exstyle`). Das restantes, entram
+    as de processos .exe e as de `include_exe`; janelas de processos
+    inacessíveis entram se o título casar com `fallback_titles`.
+
+    O resultado fica guardado por hwnd até o título, o PID ou o processo
+    (horário de criação, ou o processo deixar de poder ser consultado) da
+    janela mudar. A classe vem da enumeração; só é consultada no sistema se
+    não for informada.
+    """
+
+    def __init__(self, backend: WindowBackend, own_pid: Optional[int] = None,
+                 include_exe: Iterable[str] = DEFAULT_INCLUDE_EXE,
+                 fallback_titles: Iterable[str] = DEFAULT_FALLBACK_TITLES,
+                 exclude_exe: Iterable[str] = (), exclude_titles: Iterable[str] = (),
+                 exclude_classes: Iterable[str] = (), exclude_exstyle: int = 0):
+        self.backend = backend
+        self.own_pid = backend.get_current_pid() if own_pid is None else own_pid
+        self.own_hwnds: Set[int] = set()
+        self.include_exe = frozenset(name.lower() for name in include_exe)
+        self.exclude_exe = frozenset(name.lower() for name in exclude_exe)
+        self.exclude_classes = frozenset(exclude_classes)
+        self.exclude_exstyle = exclude_exstyle
+        self.exclude_title_regex = combine_patterns(exclude_titles)
+        self.fallback_title_regex = combine_patterns(re.escape(word) for word in fallback_titles)
+        # hwnd -> (título, pid, create_time do processo ou None se inacessível, resultado)
+        self._cache: Dict[int, Tuple[str, int, Optional[float], int]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def add_own_window(self, hwnd: int):
+        """Registrar uma janela do próprio aplicativo"""
+        self.own_hwnds.add(hwnd)
+        self._cache.pop(hwnd, None)
+
+    def classify(self, hwnd: int, title: str, pid: int, process: Optional[ProcessInfo],
+                 class_name: Optional[str] = None) -> int:
+        """Classificar uma janela; `process` é None quando o processo não pode ser consultado"""
+        create_time = process.create_time if process is not None else None
+        cached = self._cache.get(hwnd)
+        if cached is not None and cached[0] == title and cached[1] == pid and cached[2] == create_time:
+            self.hits += 1
+            return cached[3]
+        self.misses += 1
+        verdict = self._classify(hwnd, title, pid, process, class_name)
+        self._cache[hwnd] = (title, pid, create_time, verdict)
+        return verdict
+
+    def _classify(self, hwnd: int, title: str, pid: int, process: Optional[ProcessInfo],
+                  class_name: Optional[str]) -> int:
+        if pid == self.own_pid or hwnd in self.own_hwnds:
+            return EXCLUDE
+        if self.exclude_title_regex is not None and self.exclude_title_regex.search(title):
+            return EXCLUDE
+        if self.exclude_classes:
+            if class_name is None:
+                class_name = self.backend.get_class_name(hwnd)
+            if class_name in self.exclude_classes:
+                return EXCLUDE
+        if self.exclude_exstyle and self.backend.get_exstyle(hwnd) & self.exclude_exstyle:
+            return EXCLUDE
+
+        if process is None:
+            if self.fallback_title_regex is not None and self.fallback_title_regex.search(title):
+                return INCLUDE_SYSTEM
+            return EXCLUDE
+
+        exe_name = process.exe_name.lower()
+        if exe_name in self.exclude_exe:
+            return EXCLUDE
+        if (process.exe_path and exe_name.endswith('.exe')) or exe_name in self.include_exe:
+            return INCLUDE
+        return EXCLUDE
+
+    def prune(self, hwnds: Iterable[int]):
+        """Esquecer o resultado das janelas que não existem mais"""
+        alive = hwnds if isinstance(hwnds, (set, dict)) else set(hwnds)
+        for hwnd in [hwnd for hwnd in self._cache if hwnd not in alive]:
+            del self._cache[hwnd]
+
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._cache)}
@@ -0,0 +1,403 @@
+import time
+from concurrent.futures import Executor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from metrics import Metrics, NullMetrics
+from opacity_journal import JournalEntry, OpacityJournal
+from opacity_state import OpacityState
+from process_cache import ProcessInfoCache
+from window_backend import WS_EX_LAYERED, ProcessUnavailable, WindowBackend, WindowSnapshot, default_backend
+from window_classifier import INCLUDE, INCLUDE_SYSTEM, WindowClassifier
+from window_registry import WindowRecord, WindowRegistry
+
+
+class WindowCore:
+    """Núcleo sem interface gráfica: enumeração de janelas e controle de opacidade
+
+    Usado pela interface Tk e por ferramentas sem interface (benchmarks,
+    scripts). Todo acesso ao sistema passa pelo `backend`. Durações e
+    contadores vão para `metrics` (desligado por padrão).
+    """
+
+    def __init__(self, backend: Optional[WindowBackend] = None, classifier: Optional[WindowClassifier] = None,
+                 metrics: Optional[Metrics] = None):
+        self.backend = backend or default_backend()
+        self.process_cache = ProcessInfoCache(self.backend)
+        self.classifier = classifier or WindowClassifier(self.backend)  # Quais janelas entram na lista
+        self.opacity_state = OpacityState(self.backend)
+        self.opacity_state.on_first_write = self._on_first_write  # Vale para todo escritor
+        # hwnd -> (pid, classe) lidos junto com o estado original, para restaurar só a mesma janela
+        self.original_fingerprints: Dict[int, Tuple[int, str]] = {}
+        self.fader = None  # FadeScheduler opcional para transições animadas
+        self.journal: Optional[OpacityJournal] = None  # Diário opcional para recuperar após uma falha
+        self.registry = WindowRegistry()  # Janelas conhecidas e opacidade aplicada, por hwnd
+        self.metrics = metrics or NullMetrics()
+        self.evicted = 0  # Janelas aplicadas esquecidas por terem sido fechadas ou reaproveitadas
+        self._snapshot: Optional[WindowSnapshot] = None  # Colunas da última enumeração, reaproveitadas
+        self.metrics.add_source('process_cache', self.process_cache.stats)
+        self.metrics.add_source('opacity_state', self.opacity_state.stats)
+        self.metrics.add_source('classifier', self.classifier.stats)
+
+    def _probe_window(self, hwnd: int) -> Optional[Tuple[str, str, int]]:
+        """Obter (título, classe, pid) de uma janela visível com título, ou None"""
+        backend = self.backend
+        if not backend.is_window_visible(hwnd):
+            return None
+        title = backend.get_window_text(hwnd)
+        if not (title and title.strip()):
+            return None
+        return title, backend.get_class_name(hwnd), backend.get_window_pid(hwnd)
+
+    def describe_window(self, hwnd: int) -> Optional[WindowRecord]:
+        """Obter os dados de uma janela, ou None se ela não deve ser listada"""
+        probe = self._probe_window(hwnd)
+        if probe is None:
+            return None
+        return self._describe(hwnd, *probe)
+
+    def _describe(self, hwnd: int, title: str, class_name: str, pid: int) -> Optional[WindowRecord]:
+        if not pid:
+            return None
+        try:
+            process = self.process_cache.lookup(pid)
+        except ProcessUnavailable:
+            process = None  # Processo não acessível, mas a janela ainda pode ser listada
+
+        verdict = self.classifier.classify(hwnd, title, pid, process, class_name)
+        if verdict == INCLUDE and process is not None:
+            # Incluir todos os processos aceitos, mas marcar os .exe
+            is_exe = bool(process.exe_path and process.exe_path.lower().endswith('.exe'))
+            return WindowRecord(hwnd, title, pid, process.exe_name, process.exe_path, process.name, is_exe,
+                                class_name)
+        if verdict == INCLUDE_SYSTEM:
+            return WindowRecord(hwnd, title, None, "Sistema", None, "Sistema", False, class_name)
+        return None
+
+    def scan_windows(self, executor: Optional[Executor] = None) -> Dict[int, WindowRecord]:
+        """Enumerar todas as janelas listáveis, indexadas por hwnd
+
+        Com `executor`, as consultas de processos que ainda não estão no cache
+        são distribuídas entre as threads dele antes da montagem da lista.
+        """
+        metrics = self.metrics
+        with metrics.timer('scan.total'):
+            with metrics.timer('scan.enumerate'):
+                # Uma varredura simultânea em outra thread recebe um snapshot novo em vez de disputar este
+                snapshot, self._snapshot = self._snapshot, None
+                snapshot = self.backend.enum_snapshot(snapshot)
+                candidates = snapshot.listable()
+                self._snapshot = snapshot
+
+            with metrics.timer('scan.processes'):
+                seen_pids = {pid for _, _, _, pid in candidates if pid}
+                # Antes das consultas: descarta os processos encerrados e ajusta o limite do cache
+                self.process_cache.prune(seen_pids)
+                if executor is not None:
+                    list(executor.map(self.process_cache.prefetch, seen_pids))
+
+                windows = {}
+                for hwnd, title, class_name, pid in candidates:
+                    window = self._describe(hwnd, title, class_name, pid)
+                    if window is not None:
+                        windows[hwnd] = window
+
+                # Descartar do cache do classificador as janelas que não existem mais
+                self.classifier.prune({hwnd for hwnd, _, _, _ in candidates})
+
+            # Ler uma vez o estado de transparência atual (inclusive o definido por outros programas)
+            with metrics.timer('scan.observe'):
+                self.opacity_state.observe(windows)
+        metrics.incr('scan.count')
+        metrics.incr('scan.windows_scanned', len(candidates))
+        metrics.incr('scan.windows_listed', len(windows))
+        return windows
+
+    @staticmethod
+    def sort_key(window: WindowRecord) -> Tuple[str, int]:
+        """Ordem das listas: nome do processo, e o hwnd para desempatar de forma estável"""
+        return window.exe_name.lower(), window.hwnd
+
+    def finalize_windows(self, windows) -> List[WindowRecord]:
+        """Ordenar por nome do processo (janelas de mesmo título continuam distintas)"""
+        return sorted(windows, key=self.sort_key)
+
+    def get_windows_list(self) -> List[WindowRecord]:
+        """Obter lista de janelas abertas com informações do processo"""
+        try:
+            return self.finalize_windows(self.scan_windows().values())
+        except Exception as e:
+            print(f"Erro ao obter janelas: {e}")
+            return []
+
+    def build_entries(self, windows: List[WindowRecord], only_exe: bool) -> List[Tuple[int, str]]:
+        """Montar as linhas (hwnd, texto exibido) da lista de janelas disponíveis"""
+        entries = []
+        applied = self.registry.applied
+        for window in windows:
+            # Aplicar filtro se necessário
+            if only_exe and not window.is_exe:
+                continue
+
+            # Janelas com opacidade aplicada ficam na outra lista
+            if window.hwnd not in applied:
+                entries.append((window.hwnd, self.display_title(window)))
+        return entries
+
+    @staticmethod
+    def display_title(window: WindowRecord) -> str:
+        """Texto exibido: nome do processo e título, truncado"""
+        if window.exe_name and window.exe_name != "Desconhecido":
+            display_title = f"{window.exe_name} - {window.title}"
+        else:
+            display_title = window.title
+
+        # Truncar se for muito longo
+        if len(display_title) > 60:
+            display_title = display_title[:57] + "..."
+        return display_title
+
+    def apply_opacity(self, window: WindowRecord, opacity: int, fade: bool = False) -> int:
+        """Aplicar transparência (0-100%) a uma janela e registrá-la como aplicada
+
+        Com `fade` e um `fader` configurado, a mudança é animada. Retorna o
+        valor alpha (0-255) usado.
+        """
+        hwnd = window.hwnd
+
+        # Converter porcentagem para valor de transparência (0-255)
+        alpha = int((opacity / 100) * 255)
+
+        with self.metrics.timer('opacity.apply'):
+            if fade and self.fader is not None:
+                self.fader.fade(hwnd, alpha)
+            else:
+                # Só escreve no Win32 se o estado atual for diferente
+                self.opacity_state.set_alpha(hwnd, alpha)
+
+        self.mark_applied(window, opacity)
+        return alpha
+
+    def _on_first_write(self, hwnd: int, exstyle: int, alpha: Optional[int]):
+        """Guardar a impressão digital e registrar no diário o estado original antes da primeira escrita
+
+        Chamado por `OpacityState.set_alpha`, então cobre aplicação,
+        pré-visualização, modo foco e transições, em qualquer thread.
+        """
+        pid, class_name = self.original_fingerprints[hwnd] = self.fingerprint(hwnd)
+        journal = self.journal
+        if journal is None or hwnd in journal:
+            return
+        with self.metrics.timer('journal.commit'):
+            journal.record(JournalEntry(hwnd, pid, class_name, exstyle, alpha))
+            journal.commit()
+
+    def journal_windows(self, hwnds: Iterable[int]):
+        """Registrar no diário, com um único commit, as janelas de um lote antes de escrever nelas"""
+        journal = self.journal
+        if journal is None:
+            return
+        with self.metrics.timer('journal.commit'):
+            for hwnd in hwnds:
+                if hwnd in journal:
+                    continue
+                try:
+                    pid, class_name = self.fingerprint(hwnd)
+                    exstyle, alpha = self.opacity_state.original_state(hwnd)
+                except Exception:
+                    continue  # Janela já fechada: a escrita nela também falha
+                journal.record(JournalEntry(hwnd, pid, class_name, exstyle, alpha))
+            journal.commit()
+
+    def _unjournal(self, hwnds: Iterable[int]):
+        if self.journal is not None:
+            self.journal.discard(hwnds)
+            self.journal.commit()
+
+    def recover_journal(self, adopt: bool = True) -> dict:
+        """Tratar as janelas que uma execução interrompida deixou com transparência
+
+        Lê o diário; janelas fechadas ou com o hwnd reaproveitado (PID ou
+        classe diferentes) são só esquecidas. As que continuam transparentes
+        são readotadas (voltam às aplicadas com a opacidade atual) ou, com
+        `adopt=False`, restauradas ao estado original. O diário é compactado
+        no fim.
+        """
+        start = time.perf_counter()
+        journal = self.journal
+        entries = journal.load()
+        result = {'entries': len(entries), 'adopted': 0, 'restored': 0, 'stale': 0}
+        gone = []
+        with self.metrics.timer('journal.recover'):
+            for entry in list(entries.values()):
+                hwnd = entry.hwnd
+                if not self.is_same_window(hwnd, (entry.pid, entry.class_name)):
+                    result['stale'] += 1
+                    gone.append(hwnd)
+                    continue
+                try:
+                    exstyle, alpha = self.opacity_state.current(hwnd)
+                    window = self.describe_window(hwnd) if adopt else None
+                    if window is not None and exstyle & WS_EX_LAYERED and alpha is not None and alpha < 255:
+                        self.opacity_state.set_original(hwnd, entry.exstyle, entry.alpha)
+                        self.original_fingerprints[hwnd] = (entry.pid, entry.class_name)
+                        self.mark_applied(window, round(alpha * 100 / 255))
+                        result['adopted'] += 1
+                        continue
+                    self.restore_original(hwnd, entry.exstyle, entry.alpha)
+                    result['restored'] += 1
+                except Exception:
+                    result['stale'] += 1  # Fechada durante a recuperação
+                gone.append(hwnd)
+            journal.discard(gone)
+            journal.compact()
+        result['elapsed_ms'] = (time.perf_counter() - start) * 1000
+        return result
+
+    def restore_original(self, hwnd: int, exstyle: int, alpha: Optional[int]) -> int:
+        """Voltar a janela ao alpha e ao bit WS_EX_LAYERED originais, retornando o número de escritas
+
+        Os demais bits do estilo estendido ficam como estão (podem ter mudado
+        desde então por conta do próprio programa): o estilo é lido do
+        sistema na hora, não do estado conhecido, e só o bit de camadas sai.
+        """
+        writes = 0
+        if exstyle & WS_EX_LAYERED:
+            writes += self.opacity_state.set_alpha(hwnd, 255 if alpha is None else alpha)
+        else:
+            current = self.backend.get_exstyle(hwnd)
+            if current & WS_EX_LAYERED:
+                self.backend.set_exstyle(hwnd, current & ~WS_EX_LAYERED)
+                writes += 1
+        self.opacity_state.forget(hwnd)
+        self.original_fingerprints.pop(hwnd, None)
+        return writes
+
+    def fingerprint(self, hwnd: int) -> Tuple[int, str]:
+        """Identidade da janela além do hwnd: (pid, classe)"""
+        return self.backend.get_window_pid(hwnd), self.backend.get_class_name(hwnd)
+
+    def mark_applied(self, window: WindowRecord, opacity: int):
+        """Registrar a janela como aplicada, guardando a impressão digital na primeira vez"""
+        fingerprint = None
+        if window.hwnd not in self.registry.fingerprints:
+            try:
+                fingerprint = self.original_fingerprints.get(window.hwnd) or self.fingerprint(window.hwnd)
+            except Exception:
+                fingerprint = (0, "")  # Janela já fechada: a próxima verificação a remove
+        self.registry.set_applied(window, opacity, fingerprint)
+
+    def is_same_window(self, hwnd: int, fingerprint: Tuple[int, str]) -> bool:
+        """Verificar se o hwnd ainda existe e pertence à mesma janela"""
+        try:
+            return self.backend.is_window(hwnd) and self.fingerprint(hwnd) == fingerprint
+        except Exception:
+            return False
+
+    def find_dead_applied(self) -> Dict[int, Tuple[int, str]]:
+        """Janelas aplicadas fechadas ou com o hwnd reaproveitado por outra janela
+
+        Só faz leituras (três chamadas por janela aplicada, sem enumerar as
+        demais), então pode rodar fora da thread que usa o registro. Retorna
+        hwnd -> impressão digital verificada, para `evict_applied`.
+        """
+        fingerprints = self.registry.fingerprints.copy()
+        return {hwnd: fingerprint for hwnd, fingerprint in fingerprints.items()
+                if not self.is_same_window(hwnd, fingerprint)}
+
+    def evict_applied(self, dead: Dict[int, Tuple[int, str]]) -> int:
+        """Esquecer de uma vez as janelas mortas, sem escrever nelas; retorna quantas saíram
+
+        Uma janela aplicada de novo depois da verificação (com outra impressão
+        digital) é mantida.
+        """
+        hwnds = [hwnd for hwnd, fingerprint in dead.items() if self.registry.fingerprints.get(hwnd) == fingerprint]
+        for hwnd in hwnds:
+            if self.fader is not None:
+                self.fader.cancel(hwnd)
+            self.opacity_state.forget(hwnd)
+            self.original_fingerprints.pop(hwnd, None)
+        count = self.registry.evict(hwnds)
+        self._unjournal(hwnds)
+        self.evicted += count
+        self.metrics.incr('gc.evicted', count)
+        return count
+
+    def sweep_applied(self) -> int:
+        """Verificar e esquecer as janelas aplicadas mortas na thread atual"""
+        with self.metrics.timer('gc.sweep'):
+            return self.evict_applied(self.find_dead_applied())
+
+    def _restore(self, hwnd: int) -> int:
+        """Devolver a janela ao estado anterior à nossa primeira escrita (estilo e alpha)
+
+        Sem esse estado (janela que não escrevemos nesta execução), só volta
+        à opacidade total, sem mexer no estilo.
+        """
+        if self.fader is not None:
+            self.fader.cancel(hwnd)
+        original = self.opacity_state.original.get(hwnd)
+        if original is None:
+            return self.opacity_state.reset_alpha(hwnd)
+        return self.restore_original(hwnd, *original)
+
+    def reset_opacity(self, hwnd: int) -> int:
+        """Resetar uma janela ao estado original, retornando o número de escritas
+
+        Se o hwnd foi fechado ou reaproveitado por outra janela, ela é só
+        esquecida, sem escrita.
+        """
+        fingerprint = self.registry.fingerprints.get(hwnd)
+        if fingerprint is not None and not self.is_same_window(hwnd, fingerprint):
+            self.evict_applied({hwnd: fingerprint})
+            return 0
+        with self.metrics.timer('opacity.reset'):
+            writes = self._restore(hwnd)
+        self.registry.clear_applied(hwnd)
+        self._unjournal((hwnd,))
+        return writes
+
+    def reset_all(self) -> int:
+        """Resetar todas as janelas aplicadas, retornando quantas foram resetadas
+
+        Janelas fechadas ou reaproveitadas são esquecidas antes, sem escrita.
+        """
+        self.sweep_applied()
+        count = 0
+        for hwnd in list(self.registry.applied):
+            try:
+                self._restore(hwnd)
+                count += 1
+            except Exception:
+                continue
+        self._unjournal(list(self.registry.applied))
+        self.registry.applied.clear()
+        self.registry.fingerprints.clear()
+        return count
+
+    def unlayer_all(self) -> Dict[int, int]:
+        """Devolver ao estilo e alpha originais toda janela em que escrevemos
+
+        Inclui, além das aplicadas, as que só passaram por pré-visualização,
+        modo foco ou transição. Cada janela é conferida pela impressão digital
+        lida na primeira escrita; fechadas ou reaproveitadas por outra janela
+        são só esquecidas. Retorna hwnd -> escritas das janelas restauradas.
+        """
+        self.sweep_applied()
+        restored = {}
+        hwnds = set(self.opacity_state.original) | set(self.registry.applied)
+        for hwnd in hwnds:
+            fingerprint = self.registry.fingerprints.get(hwnd) or self.original_fingerprints.get(hwnd)
+            try:
+                if fingerprint is not None and self.is_same_window(hwnd, fingerprint):
+                    restored[hwnd] = self._restore(hwnd)
+                    continue
+            except Exception:
+                pass
+            if self.fader is not None:
+                self.fader.cancel(hwnd)
+            self.opacity_state.forget(hwnd)
+            self.original_fingerprints.pop(hwnd, None)
+        self._unjournal(hwnds)
+        self.registry.applied.clear()
+        self.registry.fingerprints.clear()
+        return restored
@@ -0,0 +1,108 @@
+import queue
+import time
+from collections import deque
+from concurrent.futures import Executor
+from typing import Callable, Dict, Iterable, List, Optional
+
+from metrics import latency_stats
+from window_backend import (EVENT_OBJECT_CREATE, EVENT_OBJECT_DESTROY, EVENT_OBJECT_HIDE,
+                            EVENT_OBJECT_NAMECHANGE, EVENT_OBJECT_SHOW)
+from window_core import WindowCore
+from window_registry import WindowRecord
+
+# Eventos que alteram a lista; os demais (troca de foco, por exemplo) são ignorados
+LIST_EVENTS = frozenset((EVENT_OBJECT_CREATE, EVENT_OBJECT_DESTROY, EVENT_OBJECT_HIDE,
+                         EVENT_OBJECT_NAMECHANGE, EVENT_OBJECT_SHOW))
+
+
+class WindowEventTracker:
+    """Acompanha as janelas por eventos do sistema em vez de enumerar periodicamente
+
+    Os eventos chegam de qualquer thread e são apenas enfileirados; `drain`
+    aplica as mudanças ao snapshot e entrega só as janelas que mudaram.
+    `drain` e `resync` devem ser chamados sempre da mesma thread. Uma
+    ressincronização completa (`resync`) continua sendo feita a cada
+    `resync_interval` segundos como rede de segurança.
+    """
+
+    def __init__(self, core: WindowCore, resync_interval: float = 60.0, latency_samples: int = 1000):
+        self.core = core
+        self.resync_interval = resync_interval
+        self.windows: Dict[int, WindowRecord] = {}
+        self.events: "queue.SimpleQueue" = queue.SimpleQueue()
+        self.latencies = deque(maxlen=latency_samples)  # segundos entre evento e interface atualizada
+        self.last_resync = 0.0
+        self.events_received = 0
+        self.events_applied = 0
+        self.running = False
+
+    def start(self):
+        """Assinar os eventos do backend (a primeira enumeração é feita por `resync`)"""
+        self.core.backend.add_event_listener(self._on_event)
+        self.running = True
+
+    def stop(self):
+        if self.running:
+            self.core.backend.remove_event_listener(self._on_event)
+            self.running = False
+
+    def _on_event(self, event: int, hwnd: int):
+        # Pode ser chamado pela thread do hook: apenas enfileirar
+        if event not in LIST_EVENTS:
+            return
+        self.events.put((event, hwnd, time.perf_counter()))
+
+    def resync(self, executor: Optional[Executor] = None) -> Dict[int, WindowRecord]:
+        """Enumeração completa, descartando eventos já cobertos por ela; retorna uma cópia do snapshot"""
+        while not self.events.empty():
+            self.events.get_nowait()
+        self.windows = self.core.scan_windows(executor)
+        self.last_resync = time.monotonic()
+        return dict(self.windows)
+
+    def drain(self, apply: Callable[[Dict[int, Optional[WindowRecord]], List[float]], None]) -> int:
+        """Aplicar os eventos pendentes e entregar a `apply` as janelas que mudaram
+
+        Vários eventos da mesma janela são consolidados em uma única consulta.
+        `apply` recebe hwnd -> registro novo ou alterado (ou None para as
+        janelas que saíram) e os instantes dos eventos do lote, e só é chamado
+        se algo mudou. Quem exibe a mudança informa `record_latency` com esses
+        instantes. Retorna o número de eventos processados.
+        """
+        pending = {}
+        timestamps = []
+        while not self.events.empty():
+            event, hwnd, timestamp = self.events.get_nowait()
+            timestamps.append(timestamp)
+            if event in (EVENT_OBJECT_DESTROY, EVENT_OBJECT_HIDE):
+                pending[hwnd] = False
+            elif event in (EVENT_OBJECT_CREATE, EVENT_OBJECT_SHOW, EVENT_OBJECT_NAMECHANGE):
+                # describe_window confere de novo visibilidade e título
+                pending[hwnd] = True
+        if not timestamps:
+            return 0
+        self.events_received += len(timestamps)
+
+        changes = {}
+        for hwnd, alive in pending.items():
+            window = self.core.describe_window(hwnd) if alive else None
+            if window is None:
+                if self.windows.pop(hwnd, None) is not None:
+                    changes[hwnd] = None
+            elif self.windows.get(hwnd) != window:
+                self.windows[hwnd] = window
+                changes[hwnd] = window
+
+        if changes:
+            apply(changes, timestamps)
+            self.events_applied += len(timestamps)
+        return len(timestamps)
+
+    def record_latency(self, timestamps: Iterable[float]):
+        """Registrar a latência dos eventos cuja mudança acabou de ser exibida"""
+        done = time.perf_counter()
+        self.latencies.extend(done - timestamp for timestamp in timestamps)
+
+    def latency_stats(self) -> dict:
+        """Latência entre o evento e a lista atualizada na interface, em milissegundos"""
+        return latency_stats(self.latencies)
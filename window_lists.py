@@ -0,0 +1,127 @@
+import itertools
+from typing import Dict, Iterable, Mapping, Optional
+
+from list_reconciler import ListboxReconciler
+from window_core import WindowCore
+from window_registry import WindowRecord
+from window_search import WindowSearchIndex
+
+
+class WindowLists:
+    """Conteúdo das listas de janelas disponíveis e aplicadas, mantido por diferenças
+
+    Não depende do Tk: recebe os dois Listbox (ou objetos com a mesma
+    interface). `apply_changes` recebe só as janelas que mudaram desde a
+    entrega anterior (a comparação é feita pelo RefreshWorker, fora da thread
+    da interface) e atualiza o registro, o índice de busca e apenas as linhas
+    dessas janelas: o custo acompanha o número de mudanças, não o total de
+    janelas. A lista de disponíveis fica na ordem de `WindowCore.sort_key`, e
+    a de aplicadas, na ordem de aplicação.
+
+    Deve ser usado só pela thread da interface, como o registro.
+    """
+
+    def __init__(self, core: WindowCore, available_listbox, applied_listbox, only_exe: bool = True):
+        self.core = core
+        self.registry = core.registry
+        self.search_index = WindowSearchIndex()
+        self.available_reconciler = ListboxReconciler(available_listbox, key=self._available_key)
+        # Chave crescente na inserção: janelas aplicadas entram no fim e não mudam de lugar
+        order = itertools.count()
+        self.applied_reconciler = ListboxReconciler(applied_listbox, key=lambda hwnd: next(order))
+        self.only_exe = only_exe
+        self.available: Dict[int, str] = {}  # hwnd -> texto das janelas disponíveis, antes da busca
+        self.query = ''
+
+    def _available_key(self, hwnd: int):
+        return self.core.sort_key(self.registry.get(hwnd))
+
+    def available_label(self, hwnd: int) -> Optional[str]:
+        """Texto da janela na lista de disponíveis, ou None se ela não deve aparecer lá"""
+        window = self.registry.get(hwnd)
+        if window is None or hwnd in self.registry.applied or (self.only_exe and not window.is_exe):
+            return None
+        return self.core.display_title(window)
+
+    @staticmethod
+    def applied_label(window: WindowRecord, opacity: int) -> str:
+        title = window.title
+        return f"{title[:45]}... ({opacity}%)" if len(title) > 45 else f"{title} ({opacity}%)"
+
+    def apply_changes(self, changes: Mapping[int, Optional[WindowRecord]]) -> tuple:
+        """Aplicar as janelas que mudaram (hwnd -> registro, ou None se saiu do snapshot)
+
+        Retorna (janelas novas, janelas removidas) do registro.
+        """
+        added, removed = self.registry.apply_changes(changes)
+        self.search_index.apply_changes(changes)
+        self.refresh(changes)
+        return added, removed
+
+    def refresh(self, hwnds: Iterable[int]) -> dict:
+        """Recalcular as linhas destas janelas nas duas listas (após aplicar, resetar ou remover)"""
+        upserts: Dict[int, str] = {}
+        removed = []
+        applied_upserts: Dict[int, str] = {}
+        applied_removed = []
+        for hwnd in hwnds:
+            label = self.available_label(hwnd)
+            if label is None:
+                self.available.pop(hwnd, None)
+                removed.append(hwnd)
+            else:
+                self.available[hwnd] = label
+                if self.search_index.matches(hwnd):
+                    upserts[hwnd] = label
+                else:
+                    removed.append(hwnd)
+            opacity = self.registry.applied.get(hwnd)
+            if opacity is None:
+                applied_removed.append(hwnd)
+            else:
+                applied_upserts[hwnd] = self.applied_label(self.registry.get(hwnd), opacity)
+        self.applied_reconciler.apply(applied_upserts, applied_removed)
+        return self.available_reconciler.apply(upserts, removed)
+
+    def rebuild(self) -> dict:
+        """Recalcular as duas listas a partir do registro inteiro (filtro trocado, reset de todas)"""
+        available = {}
+        for hwnd in self.registry.records:
+            label = self.available_label(hwnd)
+            if label is not None:
+                available[hwnd] = label
+        self.available = available
+        self.rebuild_applied()
+        matches = self.search_index.search(self.query)
+        if matches is not None:
+            available = {hwnd: available[hwnd] for hwnd in matches if hwnd in available}
+        return self.available_reconciler.reconcile(available)
+
+    def rebuild_applied(self) -> dict:
+        """Recalcular a lista de aplicadas a partir do registro (proporcional às aplicadas)"""
+        return self.applied_reconciler.reconcile({window.hwnd: self.applied_label(window, opacity)
+                                                  for window, opacity in self.registry.applied_records()})
+
+    def set_only_exe(self, only_exe: bool) -> dict:
+        self.only_exe = only_exe
+        return self.rebuild()
+
+    def search(self, query: str) -> dict:
+        """Restringir a lista de disponíveis ao que casa com a busca
+
+        Só as janelas que entram ou saem da lista são tocadas (os textos
+        exibidos já estão atualizados por `refresh`): o custo acompanha as
+        janelas que casavam com a consulta anterior e as que casam com a nova.
+        O pior caso é apagar o termo que restringia a lista: boa parte das
+        janelas volta, e a lista é remontada de uma vez (proporcional às
+        linhas exibidas, não às teclas).
+        """
+        self.query = query
+        matches = self.search_index.search(query)
+        wanted = self.available.keys() if matches is None else matches & self.available.keys()
+        shown = self.available_reconciler.labels.keys()
+        upserts = {hwnd: self.available[hwnd] for hwnd in wanted - shown}
+        return self.available_reconciler.apply(upserts, shown - wanted)
+
+    def visible_count(self) -> int:
+        return len(self.available_reconciler.rows)
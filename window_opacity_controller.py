@@ -1,14 +1,27 @@
+from startup_profiler import IMPORT_TIME, StartupProfiler
+startup_profiler = StartupProfiler(IMPORT_TIME)  # Antes das demais importações, para medi-las
+
 import tkinter as tk
 from tkinter import ttk, messagebox
-import win32gui
-import win32con
-import win32api
-import win32process
-import psutil
-from typing import Dict, List
-import threading
-import time
+from typing import List, Optional
+import logging
 import os
+from window_backend import WindowBackend
+from window_core import WindowCore
+from window_registry import WindowRecord
+from window_events import WindowEventTracker
+from window_lists import WindowLists
+from refresh_worker import RefreshScheduler, RefreshWorker, WindowChanges
+from fade_scheduler import FadeScheduler, PreviewThrottle
+from focus_dimmer import FocusDimmer
+from virtual_list import VirtualListbox
+from metrics import Metrics, MetricsDumper, NullMetrics
+from opacity_journal import OpacityJournal
+# Perfis e regras (opacity_profiles, opacity_rules) só são importados quando os perfis são carregados
+
+startup_profiler.mark('import')
+
+logger = logging.getLogger(__name__)  # Mensagens de diagnóstico, desligadas por padrão (--debug)
 
 class ModernButton(tk.Button):
     """Botão moderno personalizado"""
@@ -69,24 +82,46 @@ class ModernSlider(tk.Scale):
             sliderlength=20
         )
 
-class ModernListbox(tk.Listbox):
-    """Listbox moderno personalizado"""
+class ModernListbox(VirtualListbox):
+    """Listbox moderno personalizado (desenha só as linhas visíveis)"""
+    def __init__(self, master, **kwargs):
+        super().__init__(
+            master,
+            font=('Segoe UI', 9),
+            bg='#334155',
+            fg='#ffffff',
+            selectbackground='#6366f1',
+            selectforeground='#ffffff',
+            **kwargs
+        )
+
+class ModernEntry(tk.Entry):
+    """Campo de texto moderno personalizado"""
     def __init__(self, master, **kwargs):
         super().__init__(master, **kwargs)
         self.configure(
             relief="flat",
-            borderwidth=1,
+            borderwidth=0,
             font=('Segoe UI', 9),
             bg='#334155',
             fg='#ffffff',
-            selectbackground='#6366f1',
-            selectforeground='#ffffff',
-            highlightthickness=0,
-            activestyle='none'
+            insertbackground='#ffffff',
+            highlightthickness=1,
+            highlightbackground='#475569',
+            highlightcolor='#6366f1'
         )
 
 class WindowOpacityController:
-    def __init__(self):
+    def __init__(self, backend: Optional[WindowBackend] = None, event_driven: bool = True,
+                 profile_startup: Optional[str] = None, metrics_path: Optional[str] = None):
+        # Tempos de inicialização: None desativa, '-' imprime, outro valor é um arquivo JSON lines
+        self.profiler = startup_profiler
+        self.profile_startup = profile_startup
+        # Métricas do ciclo de atualização, gravadas periodicamente só quando há um arquivo
+        self.metrics = Metrics() if metrics_path else NullMetrics()
+        self.metrics_dumper = MetricsDumper(self.metrics, metrics_path) if metrics_path else None
+        self.background_started = False
+        
         self.root = tk.Tk()
         self.root.title("🎛️ Controlador de Transparência")
         self.root.geometry("900x750")
@@ -136,21 +171,63 @@ class WindowOpacityController:
             # Se não conseguir carregar o ícone, continua sem ele
             pass
         
+        self.profiler.mark('window')
+        
         # Configurar cores e estilo
         self.setup_styles()
+        self.profiler.mark('styles')
+        
+        # Núcleo sem interface (enumeração, cache de processos e opacidade)
+        self.core = WindowCore(backend, metrics=self.metrics)
+        self.core.fader = FadeScheduler(self.core.opacity_state)
+        # Diário das janelas aplicadas: uma execução interrompida não as deixa transparentes sem controle
+        self.core.journal = OpacityJournal()
+        # A janela principal nunca aparece na própria lista (além da exclusão pelo PID)
+        self.core.classifier.add_own_window(int(self.root.wm_frame(), 16))
+        
+        # Acompanhamento por eventos do sistema (com ressincronização periódica)
+        self.event_tracker = None
+        if event_driven and self.core.backend.supports_events:
+            self.event_tracker = WindowEventTracker(self.core)
+        
+        # Perfis salvos: carregados depois que a janela aparece (load_profiles)
+        self.profile_store = None
+        self.profile_applier = None
+        
+        # Enumeração em segundo plano; os resultados chegam por poll_refresh
+        self.refresh_worker = RefreshWorker(self.core, self.event_tracker)
+        # Intervalo adaptativo; minimizado, só verifica se as janelas aplicadas ainda existem
+        self.refresh_scheduler = RefreshScheduler(self.scheduled_refresh, liveness=self.refresh_worker.request_sweep)
         
         # Variáveis
-        self.windows_data: Dict[str, dict] = {}
-        self.applied_windows: Dict[str, dict] = {}  # Janelas com opacidade aplicada
-        self.selected_window = tk.StringVar()
+        self.registry = self.core.registry  # Janelas conhecidas e aplicadas, por hwnd
+        self.window_count = 0  # Janelas no snapshot mais recente
+        self.selected_hwnd: Optional[int] = None
         self.opacity_value = tk.DoubleVar(value=100)
         self.show_only_exe = tk.BooleanVar(value=True)  # Filtrar apenas .exe
+        self.search_text = tk.StringVar()  # Busca digitada sobre a lista de disponíveis
+        self.live_preview = tk.BooleanVar(value=True)  # Janela acompanha o slider
+        self.preview = PreviewThrottle(self.core.opacity_state,
+                                       schedule=lambda delay, callback: self.root.after(int(delay * 1000), callback))
+        self.focus_mode = tk.BooleanVar(value=False)  # Janela ativa opaca, demais aplicadas transparentes
+        # Reage na thread dos eventos (só escreve alpha, sem tocar no Tk)
+        self.focus_dimmer = FocusDimmer(self.core.opacity_state)
+        self.focus_dimmer.fader = self.core.fader
         
         # Criar interface
         self.create_widgets()
-        
-        # Atualizar lista de janelas periodicamente
+        self.profiler.mark('widgets')
+        self.recover_journal()
+        # O hook de foco não vê as janelas deste processo: avisar o modo foco diretamente
+        self.root.bind('<FocusIn>', self.on_own_focus, add='+')
+        self.root.bind('<Map>', self.on_first_map, add='+')
+        self.root.bind('<Map>', self.on_visibility_changed, add='+')
+        self.root.bind('<Unmap>', self.on_visibility_changed, add='+')
+        
+        # A primeira enumeração roda em segundo plano enquanto a janela é exibida
+        self.status_label.config(text="🔍 Procurando janelas...")
         self.update_windows_list()
+        self.root.after(50, self.poll_refresh)
         
     def setup_styles(self):
         """Configurar estilos modernos para a interface"""
@@ -237,14 +314,18 @@ class WindowOpacityController:
                                    style='Subtitle.TLabel')
         available_title.pack(anchor=tk.W, pady=(0, 8))
         
-        # Checkbox para filtrar apenas .exe
+        # Busca e checkbox para filtrar apenas .exe
         filter_frame = ttk.Frame(available_card, style='Card.TFrame')
         filter_frame.pack(fill=tk.X, pady=(0, 8))
         
+        self.search_entry = ModernEntry(filter_frame, textvariable=self.search_text)
+        self.search_entry.pack(fill=tk.X, ipady=4, pady=(0, 6))
+        self.search_text.trace_add('write', self.on_search_changed)
+        
         self.filter_checkbox = ttk.Checkbutton(filter_frame, 
                                                text="Mostrar apenas processos .exe", 
                                                variable=self.show_only_exe,
-                                               command=self.update_windows_list,
+                                               command=self.reshow_windows,
                                                style='Text.TLabel')
         self.filter_checkbox.pack(anchor=tk.W)
         
@@ -276,6 +357,8 @@ class WindowOpacityController:
         applied_listbox_frame.pack(fill=tk.BOTH, expand=True)
         
         self.applied_listbox = ModernListbox(applied_listbox_frame, height=10)
+        # Conteúdo das duas listas, atualizado só nas linhas que mudam
+        self.lists = WindowLists(self.core, self.available_listbox, self.applied_listbox, self.show_only_exe.get())
         applied_scrollbar = ttk.Scrollbar(applied_listbox_frame, orient=tk.VERTICAL, command=self.applied_listbox.yview)
         self.applied_listbox.configure(yscrollcommand=applied_scrollbar.set)
         
@@ -307,6 +390,7 @@ class WindowOpacityController:
                                           variable=self.opacity_value,
                                           command=self.on_opacity_change)
         self.opacity_slider.pack(fill=tk.X)
+        self.opacity_slider.bind("<ButtonRelease-1>", self.on_slider_release)
         
         # Label para valor atual
         self.opacity_value_label = ttk.Label(slider_frame, 
@@ -314,6 +398,21 @@ class WindowOpacityController:
                                             style='Text.TLabel')
         self.opacity_value_label.pack(pady=(3, 0))
         
+        # Checkbox para pré-visualização ao vivo
+        self.preview_checkbox = ttk.Checkbutton(slider_frame, 
+                                                text="Pré-visualizar na janela selecionada", 
+                                                variable=self.live_preview,
+                                                style='Text.TLabel')
+        self.preview_checkbox.pack(anchor=tk.W, pady=(3, 0))
+        
+        # Checkbox para o modo foco
+        self.focus_checkbox = ttk.Checkbutton(slider_frame, 
+                                              text="Modo foco: janela ativa fica opaca", 
+                                              variable=self.focus_mode,
+                                              command=self.on_focus_mode_changed,
+                                              style='Text.TLabel')
+        self.focus_checkbox.pack(anchor=tk.W, pady=(3, 0))
+        
         # Card para botões
         buttons_card = ttk.Frame(main_frame, style='Card.TFrame', padding="12")
         buttons_card.pack(fill=tk.X, pady=(0, 12))
@@ -350,6 +449,15 @@ class WindowOpacityController:
                                    active_bg=self.colors['warning_hover'])
         reset_button.pack(side=tk.LEFT, padx=(0, 5), fill=tk.X, expand=True)
         
+        # Botão salvar perfil do processo selecionado
+        profile_button = ModernButton(buttons_row1, 
+                                     text="💾 Salvar Perfil", 
+                                     command=self.save_profile,
+                                     bg=self.colors['primary'],
+                                     hover_bg=self.colors['primary_hover'],
+                                     active_bg=self.colors['primary_active'])
+        profile_button.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
         # Segunda linha de botões
         buttons_row2 = ttk.Frame(buttons_frame, style='Card.TFrame')
         buttons_row2.pack(fill=tk.X)
@@ -382,191 +490,246 @@ class WindowOpacityController:
         self.status_label.pack()
         
     def get_windows_list(self) -> List[dict]:
-        """Obter lista de janelas abertas com informações do processo"""
-        windows = []
-        try:
-            # Usar win32gui para enumerar todas as janelas
-            def enum_windows_callback(hwnd, windows_list):
-                if win32gui.IsWindowVisible(hwnd):
-                    title = win32gui.GetWindowText(hwnd)
-                    if title and title.strip():
-                        try:
-                            # Obter informações do processo
-                            _, pid = win32process.GetWindowThreadProcessId(hwnd)
-                            if pid:
-                                process = psutil.Process(pid)
-                                exe_path = process.exe()
-                                exe_name = os.path.basename(exe_path) if exe_path else "Desconhecido"
-                                
-                                # Filtrar apenas janelas do próprio aplicativo
-                                if not any(exclude in title.lower() for exclude in ['controlador de transparência', 'opacity']):
-                                    # Incluir todos os processos, mas marcar os .exe
-                                    is_exe = exe_path and exe_path.lower().endswith('.exe')
-                                    
-                                    # Verificar se é uma janela de aplicação válida (não apenas janelas do sistema)
-                                    if is_exe or exe_name.lower() in ['cursor.exe', 'code.exe', 'notepad++.exe', 'sublime_text.exe', 'atom.exe', 'vim.exe', 'emacs.exe']:
-                                        windows_list.append({
-                                            'title': title,
-                                            'hwnd': hwnd,
-                                            'pid': pid,
-                                            'exe_name': exe_name,
-                                            'exe_path': exe_path,
-                                            'process_name': process.name(),
-                                            'is_exe': is_exe
-                                        })
-                        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                            # Processo não acessível, mas ainda pode ser uma janela válida
-                            try:
-                                # Incluir janelas do sistema que podem ser úteis
-                                if any(keyword in title.lower() for keyword in ['cursor', 'code', 'notepad', 'chrome', 'firefox', 'edge', 'opera']):
-                                    windows_list.append({
-                                        'title': title,
-                                        'hwnd': hwnd,
-                                        'pid': None,
-                                        'exe_name': "Sistema",
-                                        'exe_path': None,
-                                        'process_name': "Sistema",
-                                        'is_exe': False
-                                    })
-                            except:
-                                pass
-                return True
-            
-            win32gui.EnumWindows(enum_windows_callback, windows)
-            
-            # Filtrar janelas duplicadas e ordenar por nome do processo
-            unique_windows = []
-            seen_titles = set()
-            
-            for window in windows:
-                if window['title'] not in seen_titles:
-                    seen_titles.add(window['title'])
-                    unique_windows.append(window)
-            
-            # Ordenar por nome do processo
-            unique_windows.sort(key=lambda x: x['exe_name'].lower())
-            
-        except Exception as e:
-            print(f"Erro ao obter janelas: {e}")
-            
-        return unique_windows
+        """Obter lista de janelas abertas com informações do processo (síncrono)"""
+        return self.core.get_windows_list()
     
     def update_windows_list(self):
-        """Atualizar a lista de janelas na interface"""
+        """Atualizar a lista de janelas na interface (a varredura roda em segundo plano)"""
+        self.metrics.incr('ui.refresh_requests')
+        self.refresh_worker.request_scan()
+    
+    def reshow_windows(self):
+        """Remontar as listas a partir do registro, após mudar o filtro ou as janelas aplicadas"""
+        self.lists.set_only_exe(self.show_only_exe.get())
+        self.update_status()
+    
+    def on_search_changed(self, *args):
+        """Callback a cada tecla no campo de busca"""
+        with self.metrics.timer('ui.keystroke', 'ui.blocked'):
+            self.apply_search()
+    
+    def apply_search(self):
+        """Restringir a lista de disponíveis ao que casa com a busca digitada"""
+        with self.metrics.timer('ui.search'):
+            # Aplicar apenas as diferenças em relação ao que está na lista
+            stats = self.lists.search(self.search_text.get())
+        logger.debug("Linhas alteradas: %d (+%d -%d ~%d), busca em %.2f ms",
+                     stats['touched'], stats['added'], stats['removed'], stats['retitled'],
+                     self.lists.search_index.last_search_time * 1000)
+        self.update_status()
+    
+    def update_status(self):
+        """Mostrar quantas janelas estão na lista (e quantas casam com a busca)"""
+        if not self.lists.query.strip():
+            self.status_label.config(text=f"📊 Encontradas {self.window_count} janelas disponíveis")
+        else:
+            self.status_label.config(text=f"🔎 {self.lists.visible_count()} de {self.window_count} janelas")
+    
+    def apply_profiles(self, changes: dict) -> List[int]:
+        """Aplicar os perfis salvos às janelas novas entre `changes`; retorna os hwnds aplicados"""
+        if self.profile_applier is None:
+            return []
+        first_apply = self.profile_applier.first_apply_time is None
+        result = self.profile_applier.apply_changes(changes)
+        if first_apply and self.profile_applier.first_apply_time is not None:
+            logger.debug("Primeira aplicação de perfis: %.1f ms", self.profile_applier.first_apply_time * 1000)
+        if result is None or not result.results:
+            return []
+        logger.debug("Perfis aplicados a %d janelas (%d escritas, %.1f ms)",
+                     len(result.results), result.writes, result.elapsed * 1000)
+        if self.focus_dimmer.running:
+            self.focus_dimmer.set_members(self.applied_alphas())
+        return [item['hwnd'] for item in result.results]
+    
+    def show_changes(self, delta: WindowChanges):
+        """Aplicar às listas só as janelas que mudaram desde o último snapshot exibido"""
         try:
-            self.available_listbox.delete(0, tk.END)
-            self.windows_data.clear()
-            
-            windows = self.get_windows_list()
-            print(f"DEBUG: Encontradas {len(windows)} janelas no total")
-            
-            for window in windows:
-                title = window['title']
-                exe_name = window.get('exe_name', 'Desconhecido')
-                is_exe = window.get('is_exe', False)
-                print(f"DEBUG: Janela encontrada: {title} ({exe_name}) - EXE: {is_exe}")
-                
-                # Aplicar filtro se necessário
-                if self.show_only_exe.get() and not is_exe:
-                    continue
-                
-                # Verificar se a janela já tem opacidade aplicada
-                if title not in self.applied_windows:
-                    # Criar display com nome do processo e título
-                    if exe_name and exe_name != "Desconhecido":
-                        display_title = f"{exe_name} - {title}"
-                    else:
-                        display_title = title
-                    
-                    # Truncar se for muito longo
-                    if len(display_title) > 60:
-                        display_title = display_title[:57] + "..."
-                    
-                    self.available_listbox.insert(tk.END, display_title)
-                    self.windows_data[display_title] = window
-                    print(f"DEBUG: Adicionada à lista: {display_title}")
-            
-            self.status_label.config(text=f"📊 Encontradas {len(windows)} janelas disponíveis")
+            changes = delta.changes
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Encontradas %d janelas no total (%d mudaram)", delta.total, len(changes))
+                cache_stats = self.core.process_cache.stats()
+                logger.debug("Cache de processos: %d acertos, %d faltas, %d entradas",
+                             cache_stats['hits'], cache_stats['misses'], cache_stats['entries'])
+                state_stats = self.core.opacity_state.stats()
+                logger.debug("Escritas Win32: %d feitas, %d evitadas, %d janelas alteradas por outros programas",
+                             state_stats['writes_issued'], state_stats['writes_suppressed'], state_stats['external'])
+                for window in changes.values():
+                    if window is not None:
+                        logger.debug("Janela encontrada: %s (%s) - EXE: %s", window.title, window.exe_name, window.is_exe)
+            
+            # Aplicar perfis salvos às janelas novas (as aplicadas já entram na lista certa a seguir)
+            self.apply_profiles(changes)
+            
+            added, removed = self.lists.apply_changes(changes)
+            self.window_count = delta.total
+            self.update_status()
+            self.refresh_scheduler.report(bool(added or removed))
+            
+            if not self.profiler.has('first_enumeration'):
+                self.profiler.mark('first_enumeration')
+                self.dump_startup_profile()
             
         except Exception as e:
             self.status_label.config(text=f"⚠️ Erro: {str(e)}")
-            print(f"DEBUG: Erro na atualização: {e}")
+            logger.debug("Erro na atualização: %s", e)
+    
+    def poll_refresh(self):
+        """Exibir na thread da interface o snapshot mais recente produzido em segundo plano"""
+        if self.event_tracker and self.event_tracker.running:
+            self.refresh_worker.request_drain()
+        self.evict_dead_windows()
+        delta = self.refresh_worker.slot.take()
+        if delta is not None:
+            # Tempo em que a interface fica ocupada com cada snapshot
+            with self.metrics.timer('ui.show_windows', 'ui.blocked'):
+                self.show_changes(delta)
+            self.metrics.incr('ui.snapshots_shown')
+            if delta.event_times and self.event_tracker:
+                # Latência dos eventos medida até a lista atualizada na tela
+                self.event_tracker.record_latency(delta.event_times)
+        self.root.after(50, self.poll_refresh)
+    
+    def scheduled_refresh(self):
+        """Atualização periódica (thread do agendador): varredura e verificação das aplicadas"""
+        self.refresh_worker.request_scan()
+        self.refresh_worker.request_sweep()
+    
+    def evict_dead_windows(self):
+        """Remover do registro as janelas aplicadas que a verificação encontrou fechadas"""
+        evicted = 0
+        dead = []
+        while not self.refresh_worker.dead_windows.empty():
+            hwnds = self.refresh_worker.dead_windows.get_nowait()
+            evicted += self.core.evict_applied(hwnds)
+            dead.extend(hwnds)
+        if evicted:
+            logger.debug("%d janelas aplicadas fechadas removidas (%d no total)", evicted, self.core.evicted)
+            self.refresh_windows(dead)
+    
+    def refresh_windows(self, hwnds: List[int]):
+        """Atualizar nas listas só as linhas destas janelas (após aplicar, resetar ou remover)"""
+        with self.metrics.timer('ui.refresh_windows'):
+            self.lists.refresh(hwnds)
+            if self.focus_dimmer.running:
+                self.focus_dimmer.set_members(self.applied_alphas())
+        self.update_status()
     
     def update_applied_list(self):
         """Atualizar a lista de janelas com opacidade aplicada"""
         try:
-            self.applied_listbox.delete(0, tk.END)
-            
-            for title, data in self.applied_windows.items():
-                display_title = f"{title[:45]}... ({data['opacity']}%)" if len(title) > 45 else f"{title} ({data['opacity']}%)"
-                self.applied_listbox.insert(tk.END, display_title)
+            with self.metrics.timer('ui.update_applied_list'):
+                self.lists.rebuild_applied()
+                if self.focus_dimmer.running:
+                    self.focus_dimmer.set_members(self.applied_alphas())
                 
         except Exception as e:
             print(f"Erro ao atualizar lista aplicada: {e}")
     
+    def recover_journal(self):
+        """Readotar as janelas que a execução anterior deixou transparentes"""
+        try:
+            result = self.core.recover_journal(adopt=True)
+        except Exception as e:
+            print(f"❌ Erro ao recuperar o diário de janelas: {e}")
+            return
+        logger.debug("Diário: %s", result)
+        if result['adopted']:
+            self.update_applied_list()
+            print(f"♻️ {result['adopted']} janelas transparentes da execução anterior recuperadas")
+    
+    def applied_alphas(self) -> dict:
+        """Alpha (0-255) de cada janela aplicada, usado fora de foco no modo foco"""
+        return {hwnd: int((opacity / 100) * 255) for hwnd, opacity in self.registry.applied.items()}
+    
+    def on_focus_mode_changed(self):
+        """Ligar ou desligar o modo foco sobre as janelas aplicadas"""
+        if not self.focus_mode.get():
+            self.focus_dimmer.stop()
+            self.status_label.config(text="🔄 Modo foco desligado")
+            return
+        try:
+            self.focus_dimmer.start(self.applied_alphas())
+            self.status_label.config(text="🎯 Modo foco: a janela ativa fica opaca")
+        except Exception as e:
+            self.focus_mode.set(False)
+            self.status_label.config(text=f"⚠️ Modo foco indisponível: {e}")
+    
+    def on_own_focus(self, event):
+        """A interface ganhou o foco: a janela aplicada que estava em foco volta ao seu alpha"""
+        if self.focus_dimmer.running:
+            self.focus_dimmer.focus_own()
+    
     def on_available_select(self, event):
         """Callback quando uma janela disponível é selecionada"""
         selection = self.available_listbox.curselection()
         if selection:
             index = selection[0]
-            window_title = self.available_listbox.get(index)
-            self.selected_window.set(window_title)
-            self.status_label.config(text=f"🎯 Selecionado: {window_title}")
+            self.selected_hwnd = self.lists.available_reconciler.hwnd_at(index)
+            self.status_label.config(text=f"🎯 Selecionado: {self.available_listbox.get(index)}")
     
     def on_applied_select(self, event):
         """Callback quando uma janela aplicada é selecionada"""
         selection = self.applied_listbox.curselection()
         if selection:
-            index = selection[0]
-            display_title = self.applied_listbox.get(index)
-            # Extrair o título original
-            original_title = display_title.split(" (")[0]
-            if len(original_title) > 45:
-                original_title = original_title[:-3]  # Remover "..."
-            self.selected_window.set(original_title)
-            self.status_label.config(text=f"🎨 Selecionado: {original_title}")
+            self.selected_hwnd = self.lists.applied_reconciler.hwnd_at(selection[0])
+            window = self.registry.get(self.selected_hwnd)
+            if window:
+                self.status_label.config(text=f"🎨 Selecionado: {window.title}")
     
     def on_opacity_change(self, value):
         """Callback quando o slider é movido"""
         opacity = int(float(value))
         self.opacity_value_label.config(text=f"{opacity}%")
+        
+        # Pré-visualização: apenas o alpha, com taxa limitada e sem mexer nas listas
+        if self.live_preview.get():
+            window = self.get_selected_window()
+            if window:
+                if self.preview.hwnd is None:
+                    self.core.fader.cancel(window.hwnd)
+                self.preview.begin(window.hwnd)
+                self.preview.update(int((opacity / 100) * 255))
+    
+    def on_slider_release(self, event):
+        """Fim do arraste: enviar o valor final e registrar a janela como aplicada"""
+        hwnd = self.preview.end()
+        if hwnd is None:
+            return
+        window = self.get_selected_window()
+        if not window or window.hwnd != hwnd:
+            return
+        try:
+            opacity = int(self.opacity_value.get())
+            self.core.apply_opacity(window, opacity)
+            self.refresh_windows([window.hwnd])
+            self.status_label.config(text=f"✅ Transparência aplicada: {opacity}%")
+        except Exception as e:
+            self.status_label.config(text=f"❌ Erro ao aplicar transparência: {e}")
+    
+    def get_selected_window(self) -> Optional[WindowRecord]:
+        """Registro da janela selecionada em qualquer uma das listas"""
+        return self.registry.get(self.selected_hwnd)
     
     def apply_opacity(self):
         """Aplicar transparência à janela selecionada"""
-        if not self.selected_window.get():
+        if self.selected_hwnd is None:
             messagebox.showwarning("Aviso", "Por favor, selecione uma janela primeiro!")
             return
         
         try:
-            window_title = self.selected_window.get()
-            window_data = self.windows_data.get(window_title)
+            window_data = self.get_selected_window()
             
             if not window_data:
                 messagebox.showerror("Erro", "Janela não encontrada!")
                 return
             
-            hwnd = window_data['hwnd']
             opacity = int(self.opacity_value.get())
             
-            # Converter porcentagem para valor de transparência (0-255)
-            alpha = int((opacity / 100) * 255)
-            
-            # Aplicar transparência usando win32gui
-            win32gui.SetWindowLong(hwnd, win32con.GWL_EXSTYLE, 
-                                  win32gui.GetWindowLong(hwnd, win32con.GWL_EXSTYLE) | win32con.WS_EX_LAYERED)
-            win32gui.SetLayeredWindowAttributes(hwnd, 0, alpha, win32con.LWA_ALPHA)
+            # Aplicar transparência (com transição suave) e adicionar à lista de janelas aplicadas
+            self.core.apply_opacity(window_data, opacity, fade=True)
             
-            # Adicionar à lista de janelas aplicadas
-            original_title = window_data['title']
-            self.applied_windows[original_title] = {
-                'hwnd': hwnd,
-                'opacity': opacity,
-                'alpha': alpha
-            }
-            
-            # Atualizar listas
-            self.update_windows_list()
-            self.update_applied_list()
+            # Atualizar só a linha desta janela nas listas
+            self.refresh_windows([window_data.hwnd])
             
             self.status_label.config(text=f"✅ Transparência aplicada: {opacity}%")
             
@@ -574,37 +737,54 @@ class WindowOpacityController:
             messagebox.showerror("Erro", f"Erro ao aplicar transparência: {str(e)}")
             self.status_label.config(text="❌ Erro ao aplicar transparência")
     
+    def save_profile(self):
+        """Salvar a transparência atual como perfil do processo da janela selecionada"""
+        window_data = self.get_selected_window()
+        if not window_data:
+            messagebox.showwarning("Aviso", "Por favor, selecione uma janela primeiro!")
+            return
+        
+        exe_name = window_data.exe_name
+        if not exe_name or exe_name in ("Desconhecido", "Sistema"):
+            messagebox.showerror("Erro", "Não foi possível identificar o processo da janela!")
+            return
+        
+        try:
+            from opacity_profiles import ProfileMatcher
+            from opacity_rules import OpacityRule
+            if self.profile_store is None:
+                self.load_profiles()
+            opacity = int(self.opacity_value.get())
+            profile = OpacityRule(opacity, exe=exe_name, name=exe_name.lower())
+            self.profile_store.set_profile(profile)
+            self.profile_store.save()
+            # Reaplicar só às janelas deste perfil (resets manuais de outras janelas continuam valendo)
+            result = self.profile_applier.set_matcher(ProfileMatcher(self.profile_store.profiles), [profile],
+                                                      self.registry.records.values())
+            if result is not None and result.results:
+                self.refresh_windows([item['hwnd'] for item in result.results])
+            self.status_label.config(text=f"💾 Perfil salvo: {exe_name} em {opacity}%")
+        except Exception as e:
+            messagebox.showerror("Erro", f"Erro ao salvar perfil: {str(e)}")
+            self.status_label.config(text="❌ Erro ao salvar perfil")
+    
     def reset_selected_opacity(self):
         """Resetar transparência da janela selecionada"""
-        if not self.selected_window.get():
+        if self.selected_hwnd is None:
             messagebox.showwarning("Aviso", "Por favor, selecione uma janela primeiro!")
             return
         
         try:
-            window_title = self.selected_window.get()
-            
             # Procurar na lista de janelas aplicadas
-            original_title = None
-            for title in self.applied_windows.keys():
-                if title.startswith(window_title) or window_title.startswith(title):
-                    original_title = title
-                    break
-            
-            if not original_title:
+            if self.selected_hwnd not in self.registry.applied:
                 messagebox.showerror("Erro", "Janela não encontrada na lista de aplicadas!")
                 return
             
-            hwnd = self.applied_windows[original_title]['hwnd']
+            # Resetar para opacidade total e remover da lista de aplicadas
+            self.core.reset_opacity(self.selected_hwnd)
             
-            # Resetar para opacidade total
-            win32gui.SetLayeredWindowAttributes(hwnd, 0, 255, win32con.LWA_ALPHA)
-            
-            # Remover da lista de aplicadas
-            del self.applied_windows[original_title]
-            
-            # Atualizar listas
-            self.update_windows_list()
-            self.update_applied_list()
+            # Atualizar só a linha desta janela nas listas
+            self.refresh_windows([self.selected_hwnd])
             
             self.status_label.config(text="🔄 Transparência resetada com sucesso")
             
@@ -615,24 +795,16 @@ class WindowOpacityController:
     def reset_all_opacity(self):
         """Resetar transparência de todas as janelas"""
         try:
-            if not self.applied_windows:
+            if not self.registry.applied and not self.core.opacity_state.original:
                 messagebox.showinfo("Info", "Nenhuma janela com transparência aplicada!")
                 return
             
-            # Resetar todas as janelas
-            for title, data in self.applied_windows.items():
-                try:
-                    hwnd = data['hwnd']
-                    win32gui.SetLayeredWindowAttributes(hwnd, 0, 255, win32con.LWA_ALPHA)
-                except:
-                    continue
+            # Devolver o estilo original a toda janela alterada (inclusive por pré-visualização) e limpar a lista
+            applied = list(self.registry.applied)
+            self.core.unlayer_all()
             
-            # Limpar lista de aplicadas
-            self.applied_windows.clear()
-            
-            # Atualizar listas
-            self.update_windows_list()
-            self.update_applied_list()
+            # Atualizar as linhas das janelas que estavam aplicadas
+            self.refresh_windows(applied)
             
             self.status_label.config(text="🔄 Todas as transparências foram resetadas")
             
@@ -640,6 +812,74 @@ class WindowOpacityController:
             messagebox.showerror("Erro", f"Erro ao resetar todas as transparências: {str(e)}")
             self.status_label.config(text="❌ Erro ao resetar todas as transparências")
     
+    def load_profiles(self):
+        """Carregar os perfis salvos, aplicados automaticamente às janelas que aparecem"""
+        from opacity_profiles import ProfileAutoApplier, ProfileMatcher, ProfileStore
+        self.profile_store = ProfileStore()
+        try:
+            self.profile_store.load()
+            logger.debug("%d perfis carregados em %.1f ms",
+                         len(self.profile_store.profiles), self.profile_store.load_time * 1000)
+        except Exception as e:
+            print(f"❌ Erro ao carregar perfis: {e}")
+        self.profile_applier = ProfileAutoApplier(self.core, ProfileMatcher(self.profile_store.profiles))
+        # Aplicar às janelas que já estão na lista
+        self.lists.refresh(self.apply_profiles(dict(self.registry.records)))
+    
+    def on_first_map(self, event):
+        """Primeira exibição da janela principal"""
+        if event.widget is not self.root or self.profiler.has('first_paint'):
+            return
+        self.root.update_idletasks()  # Concluir os desenhos pendentes
+        self.profiler.mark('first_paint')
+        self.dump_startup_profile()
+        self.root.after(1, self.start_background)
+    
+    def on_visibility_changed(self, event):
+        """Pausar a atualização periódica enquanto a janela estiver minimizada"""
+        if event.widget is self.root:
+            self.refresh_scheduler.set_paused(self.root.state() == 'iconic')
+    
+    def dump_startup_profile(self):
+        """Mostrar os tempos de inicialização quando habilitado e todas as fases tiverem ocorrido"""
+        if (self.profile_startup is None or not self.profiler.has('first_paint')
+                or not self.profiler.has('first_enumeration')):
+            return
+        try:
+            self.profiler.dump(None if self.profile_startup == '-' else self.profile_startup)
+        except OSError as e:
+            print(f"❌ Erro ao gravar tempos de inicialização: {e}")
+        self.profile_startup = None
+    
+    def start_background(self):
+        """Etapas adiadas para depois da primeira exibição: perfis, eventos e atualização periódica"""
+        if self.background_started:
+            return
+        self.background_started = True
+        
+        self.load_profiles()
+        
+        # Modo orientado a eventos: a enumeração completa vira apenas ressincronização
+        if self.event_tracker:
+            try:
+                self.event_tracker.start()
+                resync = self.event_tracker.resync_interval
+                self.refresh_scheduler.set_range(resync, resync * 4)
+                self.update_windows_list()
+            except Exception as e:
+                print(f"⚠️ Eventos de janelas indisponíveis, usando atualização periódica: {e}")
+                self.event_tracker = None
+                self.refresh_worker.tracker = None
+        
+        # Thread das transições de transparência
+        self.core.fader.start()
+        
+        if self.metrics_dumper is not None:
+            self.metrics_dumper.start()
+        
+        # Atualização periódica, mais espaçada enquanto nada muda
+        self.refresh_scheduler.start()
+    
     def run(self):
         """Executar o programa"""
         # Centralizar janela
@@ -658,24 +898,34 @@ class WindowOpacityController:
         except:
             pass
         
-        # Iniciar thread para atualizar lista periodicamente
-        def update_loop():
-            while True:
-                time.sleep(3)  # Atualizar a cada 3 segundos
-                try:
-                    self.root.after(0, self.update_windows_list)
-                except:
-                    break
-        
-        update_thread = threading.Thread(target=update_loop, daemon=True)
-        update_thread.start()
+        # O restante começa na primeira exibição (on_first_map), ou logo depois se a janela começar minimizada
+        self.root.after(500, self.start_background)
         
         # Executar interface
         self.root.mainloop()
+        
+        self.refresh_scheduler.stop()
+        self.refresh_worker.shutdown()
+        self.focus_dimmer.stop()
+        self.core.fader.stop()
+        self.core.journal.close()
+        if self.event_tracker:
+            self.event_tracker.stop()
+        if self.metrics_dumper is not None:
+            self.metrics_dumper.stop()
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Controlador de Transparência")
+    parser.add_argument('--profile-startup', nargs='?', const='-', metavar='ARQUIVO',
+                        help="mostrar os tempos de inicialização (ou acrescentá-los a ARQUIVO)")
+    parser.add_argument('--debug', action='store_true', help="mostrar mensagens de diagnóstico no console")
+    parser.add_argument('--metrics', metavar='ARQUIVO', help="gravar métricas de atualização a cada minuto (JSON lines)")
+    args, _ = parser.parse_known_args()
+    if args.debug:
+        logging.basicConfig(level=logging.DEBUG, format="DEBUG: %(message)s")
     try:
-        app = WindowOpacityController()
+        app = WindowOpacityController(profile_startup=args.profile_startup, metrics_path=args.metrics)
         app.run()
     except Exception as e:
         print(f"Erro ao iniciar aplicação: {e}")
@@ -0,0 +1,148 @@
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+
+class WindowRecord:
+    """Dados de uma janela listável (um por hwnd, sem dicionário por instância)"""
+    __slots__ = ('hwnd', 'title', 'pid', 'exe_name', 'exe_path', 'process_name', 'is_exe', 'class_name')
+
+    def __init__(self, hwnd: int, title: str, pid: Optional[int], exe_name: str,
+                 exe_path: Optional[str], process_name: str, is_exe: bool, class_name: str = ""):
+        self.hwnd = hwnd
+        self.title = title
+        self.pid = pid
+        self.exe_name = exe_name
+        self.exe_path = exe_path
+        self.process_name = process_name
+        self.is_exe = is_exe
+        self.class_name = class_name  # Classe lida na enumeração, para não consultá-la de novo
+
+    def __eq__(self, other):
+        if not isinstance(other, WindowRecord):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    __hash__ = None
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"WindowRecord({self.hwnd}, {self.title!r}, {self.exe_name!r})"
+
+
+class WindowRegistry:
+    """Janelas conhecidas indexadas por hwnd, com índice por executável
+
+    `update` recebe cada snapshot e ajusta os índices só para as janelas que
+    mudaram. A opacidade aplicada fica em `applied` (hwnd -> porcentagem); uma
+    janela aplicada que sai do snapshot (por exemplo, escondida) mantém o
+    último registro para continuar aparecendo e podendo ser resetada. Janelas
+    com o mesmo título são entradas distintas. Cada janela aplicada guarda em
+    `fingerprints` o (pid, classe) do momento da aplicação, para reconhecer um
+    hwnd fechado e reaproveitado pelo sistema; `evict` remove essas janelas.
+
+    Não é thread-safe: deve ser usado pela thread que consome os snapshots.
+    """
+
+    def __init__(self):
+        self.records: Dict[int, WindowRecord] = {}
+        self.by_exe: Dict[str, Set[int]] = {}  # nome do executável em minúsculas -> hwnds
+        self.applied: Dict[int, int] = {}  # hwnd -> opacidade aplicada (0-100)
+        self.fingerprints: Dict[int, Tuple[int, str]] = {}  # hwnd aplicado -> (pid, classe)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __contains__(self, hwnd: int) -> bool:
+        return hwnd in self.records
+
+    def get(self, hwnd: Optional[int]) -> Optional[WindowRecord]:
+        return self.records.get(hwnd)
+
+    def _index(self, record: WindowRecord):
+        self.by_exe.setdefault(record.exe_name.lower(), set()).add(record.hwnd)
+
+    def _unindex(self, record: WindowRecord):
+        key = record.exe_name.lower()
+        hwnds = self.by_exe.get(key)
+        if hwnds is not None:
+            hwnds.discard(record.hwnd)
+            if not hwnds:
+                del self.by_exe[key]
+
+    def add(self, record: WindowRecord):
+        """Incluir ou substituir o registro de uma janela"""
+        old = self.records.get(record.hwnd)
+        if old is not None:
+            if old.exe_name == record.exe_name:
+                self.records[record.hwnd] = record
+                return
+            self._unindex(old)
+        self.records[record.hwnd] = record
+        self._index(record)
+
+    def remove(self, hwnd: int) -> Optional[WindowRecord]:
+        record = self.records.pop(hwnd, None)
+        if record is not None:
+            self._unindex(record)
+        self.applied.pop(hwnd, None)
+        self.fingerprints.pop(hwnd, None)
+        return record
+
+    def update(self, windows: Iterable[WindowRecord]) -> Tuple[int, int]:
+        """Sincronizar com um snapshot; retorna (janelas novas, janelas removidas)"""
+        current = {record.hwnd: record for record in windows}
+        removed = [hwnd for hwnd in self.records if hwnd not in current and hwnd not in self.applied]
+        for hwnd in removed:
+            self.remove(hwnd)
+        added = 0
+        for record in current.values():
+            if record.hwnd not in self.records:
+                added += 1
+            self.add(record)
+        return added, len(removed)
+
+    def apply_changes(self, changes: Mapping[int, Optional[WindowRecord]]) -> Tuple[int, int]:
+        """Aplicar só as janelas que mudaram (hwnd -> registro novo, ou None se saiu do snapshot)
+
+        Retorna (janelas novas, janelas removidas), como `update`.
+        """
+        added = removed = 0
+        for hwnd, record in changes.items():
+            if record is None:
+                if hwnd in self.records and hwnd not in self.applied:
+                    self.remove(hwnd)
+                    removed += 1
+            else:
+                if hwnd not in self.records:
+                    added += 1
+                self.add(record)
+        return added, removed
+
+    def windows_of_exe(self, exe_name: str) -> List[WindowRecord]:
+        return [self.records[hwnd] for hwnd in self.by_exe.get(exe_name.lower(), ())]
+
+    def set_applied(self, record: WindowRecord, opacity: int, fingerprint: Optional[Tuple[int, str]] = None):
+        """Registrar a opacidade aplicada a uma janela (a impressão digital só na primeira vez)"""
+        self.add(record)
+        self.applied[record.hwnd] = opacity
+        if fingerprint is not None:
+            self.fingerprints.setdefault(record.hwnd, fingerprint)
+
+    def clear_applied(self, hwnd: int) -> Optional[int]:
+        """Esquecer a opacidade aplicada, retornando a que estava registrada"""
+        self.fingerprints.pop(hwnd, None)
+        return self.applied.pop(hwnd, None)
+
+    def evict(self, hwnds: Iterable[int]) -> int:
+        """Remover de uma vez janelas que não existem mais, retornando quantas estavam registradas"""
+        count = 0
+        for hwnd in hwnds:
+            if hwnd in self.records or hwnd in self.applied:
+                count += 1
+            self.remove(hwnd)
+        return count
+
+    def applied_records(self) -> List[Tuple[WindowRecord, int]]:
+        """Pares (registro, opacidade) das janelas aplicadas, na ordem de aplicação"""
+        return [(self.records[hwnd], opacity) for hwnd, opacity in self.applied.items()]
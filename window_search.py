@@ -0,0 +1,167 @@
+import bisect
+import re
+import time
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from window_registry import WindowRecord
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# Até este tamanho, o resultado anterior é filtrado janela a janela; acima,
+# é cruzado com as janelas do termo (operação de conjuntos, mais barata por item)
+NARROW_FILTER_LIMIT = 512
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class WindowSearchIndex:
+    """Índice de busca por palavras do executável, do título e da classe das janelas
+
+    Cada termo digitado casa com o início de alguma palavra da janela, e todos
+    os termos precisam casar. As palavras ficam em uma lista ordenada (para
+    achar por bisseção todas as que começam com um termo) e em um mapa
+    palavra -> hwnds. `update` aplica só a diferença em relação ao snapshot
+    anterior, e `apply_changes` só as janelas que mudaram. A classe vem do
+    próprio registro (lida na enumeração), sem consultar o sistema. Quando a
+    consulta nova apenas estende a anterior (o usuário continuou digitando),
+    só o resultado anterior é filtrado pelos termos novos, em vez de refazer
+    a busca inteira: o custo acompanha o número de janelas que casam.
+    """
+
+    def __init__(self):
+        self.tokens: Dict[int, Tuple[str, ...]] = {}  # hwnd -> palavras da janela
+        self.postings: Dict[str, Set[int]] = {}  # palavra -> hwnds
+        self.sorted_tokens: List[str] = []
+        self._signatures: Dict[int, Tuple[str, str, str]] = {}  # hwnd -> (título, executável, classe) indexados
+        self._query = ''
+        self._result: Optional[Set[int]] = None
+        self.full_searches = 0
+        self.narrowed_searches = 0
+        self.last_search_time = 0.0
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def _add(self, window: WindowRecord):
+        tokens = tuple(set(tokenize(f"{window.exe_name} {window.title} {window.class_name}")))
+        self.tokens[window.hwnd] = tokens
+        self._signatures[window.hwnd] = (window.title, window.exe_name, window.class_name)
+        for token in tokens:
+            hwnds = self.postings.get(token)
+            if hwnds is None:
+                self.postings[token] = {window.hwnd}
+                bisect.insort(self.sorted_tokens, token)
+            else:
+                hwnds.add(window.hwnd)
+
+    def _remove(self, hwnd: int):
+        for token in self.tokens.pop(hwnd, ()):
+            hwnds = self.postings[token]
+            hwnds.discard(hwnd)
+            if not hwnds:
+                del self.postings[token]
+                del self.sorted_tokens[bisect.bisect_left(self.sorted_tokens, token)]
+        self._signatures.pop(hwnd, None)
+
+    def update(self, windows: Iterable[WindowRecord]) -> Tuple[int, int, int]:
+        """Sincronizar com um snapshot; retorna (novas, removidas, alteradas)"""
+        current = {window.hwnd: window for window in windows}
+        changes: Dict[int, Optional[WindowRecord]] = dict.fromkeys(hwnd for hwnd in self.tokens if hwnd not in current)
+        changes.update(current)
+        return self.apply_changes(changes)
+
+    def apply_changes(self, changes: Mapping[int, Optional[WindowRecord]]) -> Tuple[int, int, int]:
+        """Aplicar só as janelas que mudaram (hwnd -> registro, ou None se saiu do snapshot)
+
+        Retorna (novas, removidas, alteradas), como `update`.
+        """
+        added = changed = 0
+        removed = []
+        touched = []
+        for hwnd, window in changes.items():
+            if window is None:
+                if hwnd in self.tokens:
+                    self._remove(hwnd)
+                    removed.append(hwnd)
+                continue
+            signature = self._signatures.get(hwnd)
+            if signature is None:
+                added += 1
+            elif signature != (window.title, window.exe_name, window.class_name):
+                changed += 1
+                self._remove(hwnd)
+            else:
+                continue
+            self._add(window)
+            touched.append(hwnd)
+
+        # Manter o último resultado coerente com a mudança, sem refazer a busca
+        if self._result is not None:
+            self._result.difference_update(removed)
+            terms = tokenize(self._query)
+            for hwnd in touched:
+                if self._matches(hwnd, terms):
+                    self._result.add(hwnd)
+                else:
+                    self._result.discard(hwnd)
+        return added, len(removed), changed
+
+    def matches(self, hwnd: int) -> bool:
+        """Se a janela casa com a última consulta (sem consulta, todas casam)"""
+        return self._result is None or hwnd in self._result
+
+    def _matches(self, hwnd: int, terms: List[str]) -> bool:
+        tokens = self.tokens.get(hwnd, ())
+        return all(any(token.startswith(term) for token in tokens) for term in terms)
+
+    def _lookup(self, term: str) -> Set[int]:
+        """Janelas com alguma palavra que começa com `term`"""
+        start = bisect.bisect_left(self.sorted_tokens, term)
+        end = bisect.bisect_left(self.sorted_tokens, term + '\uffff', start)
+        if end - start == 1:
+            return set(self.postings[self.sorted_tokens[start]])
+        result: Set[int] = set()
+        for token in self.sorted_tokens[start:end]:
+            result.update(self.postings[token])
+        return result
+
+    def search(self, query: str) -> Optional[Set[int]]:
+        """hwnds que casam com a consulta, ou None se a consulta estiver vazia"""
+        start = time.perf_counter()
+        query = query.strip().lower()
+        terms = tokenize(query)
+        if not terms:
+            result = None
+        elif self._result is not None and query == self._query:
+            result = self._result
+        elif self._result is not None and self._query and query.startswith(self._query):
+            # Consulta mais restrita que a anterior: cada termo antigo é prefixo
+            # de um termo novo, então basta restringir o resultado anterior
+            # pelos termos que mudaram
+            previous = set(tokenize(self._query))
+            new_terms = [term for term in terms if term not in previous]
+            result = self._result
+            for term in new_terms:
+                if len(result) <= NARROW_FILTER_LIMIT:
+                    # Poucas janelas: filtrar sem percorrer as de um termo curto
+                    result = {hwnd for hwnd in result if self._matches(hwnd, [term])}
+                else:
+                    result = result & self._lookup(term)
+            if result is self._result:
+                result = set(result)
+            self.narrowed_searches += 1
+        else:
+            # Começar pelo termo mais longo, que tende a ser o mais seletivo
+            terms.sort(key=len, reverse=True)
+            result = self._lookup(terms[0])
+            for term in terms[1:]:
+                if not result:
+                    break
+                result &= self._lookup(term)
+            self.full_searches += 1
+        self._query = query if result is not None else ''
+        self._result = result
+        self.last_search_time = time.perf_counter() - start
+        return None if result is None else set(result)